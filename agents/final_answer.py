@@ -1,8 +1,14 @@
-from groq_client import chat_with_groq
+from groq_client import chat_with_groq, chat_with_groq_stream
 
-def generate_advice(financial_summary):
-    prompt = [
+def _build_prompt(financial_summary):
+    return [
         {"role": "system", "content": "Based on this summary, offer financial advice (buy/hold/sell)."},
         {"role": "user", "content": financial_summary}
     ]
-    return chat_with_groq(prompt)
+
+def generate_advice(financial_summary):
+    return chat_with_groq(_build_prompt(financial_summary), agent="final_answer")
+
+def generate_advice_stream(financial_summary):
+    """Same as generate_advice, yielding the text as it is generated"""
+    return chat_with_groq_stream(_build_prompt(financial_summary), agent="final_answer")
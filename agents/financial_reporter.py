@@ -1,8 +1,19 @@
-from groq_client import chat_with_groq
+from groq_client import chat_with_groq, chat_with_groq_stream
+from prompt_budget import budget_for, truncate_text
 
-def generate_report(news_analysis, price_analysis):
-    prompt = [
+def _build_prompt(news_analysis, price_analysis):
+    # Split the input budget between the two analyses so neither crowds out the other
+    share = budget_for("financial_reporter")["input"] // 2 - 50
+    news_analysis = truncate_text(news_analysis, share)
+    price_analysis = truncate_text(price_analysis, share)
+    return [
         {"role": "system", "content": "Combine news and price analysis into a structured financial summary."},
         {"role": "user", "content": f"News Analysis:\n{news_analysis}\n\nPrice Analysis:\n{price_analysis}"}
     ]
-    return chat_with_groq(prompt)
+
+def generate_report(news_analysis, price_analysis):
+    return chat_with_groq(_build_prompt(news_analysis, price_analysis), agent="financial_reporter")
+
+def generate_report_stream(news_analysis, price_analysis):
+    """Same as generate_report, yielding the text as it is generated"""
+    return chat_with_groq_stream(_build_prompt(news_analysis, price_analysis), agent="financial_reporter")
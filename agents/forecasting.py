@@ -0,0 +1,164 @@
+"""
+Offline statistical price forecasts (no network calls).
+
+All models run vectorized over a (symbols, bars) close matrix, NaN
+left-padded for shorter histories (see indicators.to_matrix):
+
+- drift: geometric random walk with the recent mean log return
+- ets:   Holt's linear exponential smoothing (level + trend)
+- ar:    AR(1) fit on daily log returns
+
+The prediction interval comes from the 30-day volatility of daily log
+returns, scaled to the horizon.
+"""
+import numpy as np
+
+from agents import indicators
+
+METHODS = ("drift", "ets", "ar")
+VOL_WINDOW = 30
+DRIFT_LOOKBACK = 60
+Z_SCORE = 1.645  # 90% two-sided interval
+
+ETS_ALPHA = 0.3
+ETS_BETA = 0.1
+
+# Interval half-width (fraction of the forecast) below which confidence is high/medium
+HIGH_CONFIDENCE_WIDTH = 0.06
+MEDIUM_CONFIDENCE_WIDTH = 0.12
+
+
+def _last_valid(close):
+    """Most recent non-NaN close per row"""
+    idx = close.shape[1] - 1 - np.argmax(~np.isnan(close[:, ::-1]), axis=1)
+    return close[np.arange(close.shape[0]), idx]
+
+
+def _tail(values, n):
+    return values[:, -n:] if values.shape[1] > n else values
+
+
+def volatility(close, window=VOL_WINDOW):
+    """Daily log-return volatility over the last `window` bars, per symbol"""
+    with np.errstate(invalid="ignore"):
+        return np.nanstd(_tail(indicators.log_returns(close), window), axis=1)
+
+
+def _drift(close, horizon):
+    with np.errstate(invalid="ignore"):
+        mu = np.nanmean(_tail(indicators.log_returns(close), DRIFT_LOOKBACK), axis=1)
+    return _last_valid(close) * np.exp(np.nan_to_num(mu) * horizon)
+
+
+def _ets(close, horizon):
+    """Holt's linear method, stepping all symbols together bar by bar"""
+    values = np.ascontiguousarray(close.T)
+    level = values[0].copy()
+    trend = np.zeros(values.shape[1])
+    for t in range(1, len(values)):
+        cur = values[t]
+        new_level = ETS_ALPHA * cur + (1 - ETS_ALPHA) * (level + trend)
+        new_trend = ETS_BETA * (new_level - level) + (1 - ETS_BETA) * trend
+        # rows still in their NaN padding start at their first close
+        starting = np.isnan(level)
+        np.copyto(new_level, cur, where=starting)
+        np.copyto(new_trend, 0.0, where=starting)
+        # gaps carry the previous state forward
+        gap = np.isnan(cur) & ~starting
+        np.copyto(new_level, level + trend, where=gap)
+        np.copyto(new_trend, trend, where=gap)
+        level, trend = new_level, new_trend
+    return level + horizon * trend
+
+
+def _ar(close, horizon):
+    """AR(1) on log returns; sums the expected returns over the horizon"""
+    returns = _tail(indicators.log_returns(close), DRIFT_LOOKBACK)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mu = np.nanmean(returns, axis=1)
+        x = returns - mu[:, None]
+        lagged, current = x[:, :-1], x[:, 1:]
+        both = ~np.isnan(lagged) & ~np.isnan(current)
+        phi = (np.where(both, lagged * current, 0.0).sum(axis=1)
+               / np.where(both, lagged * lagged, 0.0).sum(axis=1))
+    phi = np.clip(np.nan_to_num(phi), -0.99, 0.99)
+    mu = np.nan_to_num(mu)
+    last_dev = np.nan_to_num(x[:, -1])
+    # sum_{k=1..h} phi^k
+    decay = np.where(np.abs(phi) > 1e-12, phi * (1 - phi ** horizon) / (1 - phi), 0.0)
+    expected = horizon * mu + last_dev * decay
+    return _last_valid(close) * np.exp(expected)
+
+
+_MODELS = {"drift": _drift, "ets": _ets, "ar": _ar}
+
+
+def forecast(close, horizon=7, method="drift"):
+    """
+    Point forecasts and intervals for a batch.
+    Returns arrays (one value per symbol): predicted, lower, upper, volatility.
+    """
+    if method not in _MODELS:
+        raise ValueError(f"Unknown forecast method {method!r}; expected one of {METHODS}")
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    predicted = _MODELS[method](close, horizon)
+    vol = np.nan_to_num(volatility(close))
+    spread = np.exp(Z_SCORE * vol * np.sqrt(horizon))
+    return {
+        "predicted": predicted,
+        "lower": predicted / spread,
+        "upper": predicted * spread,
+        "volatility": vol,
+    }
+
+
+def _confidence(predicted, lower, upper):
+    """Narrow intervals -> higher confidence"""
+    half_width = (upper - lower) / 2 / predicted
+    if half_width < HIGH_CONFIDENCE_WIDTH:
+        return "high"
+    if half_width < MEDIUM_CONFIDENCE_WIDTH:
+        return "medium"
+    return "low"
+
+
+def confidence_levels(predicted, lower, upper):
+    """_confidence() for arrays of forecasts"""
+    half_width = (upper - lower) / 2 / predicted
+    return np.select([half_width < HIGH_CONFIDENCE_WIDTH, half_width < MEDIUM_CONFIDENCE_WIDTH],
+                     ["high", "medium"], "low")
+
+
+def _prediction(result, i, method, horizon):
+    predicted = float(result["predicted"][i])
+    lower, upper = float(result["lower"][i]), float(result["upper"][i])
+    return {
+        "predicted_price": round(predicted, 2),
+        "confidence": _confidence(predicted, lower, upper),
+        "reasoning": (
+            f"Statistical {method} forecast over {horizon} days; "
+            f"90% interval ${lower:.2f} - ${upper:.2f} from "
+            f"{result['volatility'][i] * 100:.2f}% daily volatility (30d)"
+        ),
+        "lower": round(lower, 2),
+        "upper": round(upper, 2),
+        "method": method,
+    }
+
+
+def predict(close_prices, horizon=7, method="drift"):
+    """Prediction dict (same shape as the LLM predictor's) for one ticker"""
+    return _prediction(forecast(close_prices, horizon, method), 0, method, horizon)
+
+
+def predict_many(histories, horizon=7, method="drift"):
+    """
+    Forecast many tickers in one vectorized pass.
+    histories: {ticker: list of closes} -> {ticker: prediction dict}
+    """
+    tickers = list(histories)
+    if not tickers:
+        return {}
+    close = indicators.to_matrix([histories[t] for t in tickers])
+    result = forecast(close, horizon, method)
+    return {t: _prediction(result, i, method, horizon) for i, t in enumerate(tickers)}
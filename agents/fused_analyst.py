@@ -0,0 +1,103 @@
+import json
+import re
+
+import numpy as np
+from groq_client import chat_with_groq
+
+# Expected shape of the fused response: field -> type (nested dict for objects)
+FUSED_SCHEMA = {
+    "news_analysis": str,
+    "summary": str,
+    "prediction": {
+        "predicted_price": (int, float),
+        "confidence": str,
+        "reasoning": str,
+    },
+    "advice": str,
+}
+CONFIDENCE_LEVELS = ("low", "medium", "high")
+
+
+def validate(result, schema=FUSED_SCHEMA, path=""):
+    """
+    Check a parsed response against the schema.
+    Raises ValueError naming the first offending field.
+    """
+    if not isinstance(result, dict):
+        raise ValueError(f"{path or 'response'} is not an object")
+    for field, expected in schema.items():
+        name = f"{path}{field}"
+        if field not in result:
+            raise ValueError(f"missing field '{name}'")
+        value = result[field]
+        if isinstance(expected, dict):
+            validate(value, expected, path=f"{name}.")
+        elif isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError(f"field '{name}' has type {type(value).__name__}")
+        elif expected is str and not value.strip():
+            raise ValueError(f"field '{name}' is empty")
+
+    if not path:
+        confidence = result["prediction"]["confidence"].strip().lower()
+        if confidence not in CONFIDENCE_LEVELS:
+            raise ValueError(f"confidence '{confidence}' is not one of {CONFIDENCE_LEVELS}")
+        result["prediction"]["confidence"] = confidence
+        result["prediction"]["predicted_price"] = float(result["prediction"]["predicted_price"])
+    return result
+
+
+def analyze_ticker(ticker, news_list, price_summary, historical_data):
+    """
+    One structured LLM call that returns the news analysis, summary report,
+    7-day prediction and recommendation together.
+    Returns the validated dict, or None if the response is unusable.
+    """
+    close_prices = historical_data.get('close') or []
+    if len(close_prices) >= 7:
+        current_price = close_prices[-1]
+        recent_trend = (close_prices[-1] - close_prices[-7]) / close_prices[-7] * 100
+        volatility = np.std(close_prices[-30:])
+        market_data = (f"Current Price: ${current_price:.2f}\n"
+                       f"7-day Trend: {recent_trend:+.2f}%\n"
+                       f"30-day Volatility: ${volatility:.2f}")
+    else:
+        market_data = "Historical prices unavailable."
+
+    prompt = [{
+        "role": "system",
+        "content": "You are a financial analyst. Respond with a single JSON object only."
+    }, {
+        "role": "user",
+        "content": f"""Analyze {ticker} stock.
+
+Recent news:
+{chr(10).join(news_list)}
+
+Price analysis:
+{price_summary}
+
+Market data:
+{market_data}
+
+Return JSON with exactly these fields:
+{{
+  "news_analysis": "<sentiment and insights from the news>",
+  "summary": "<structured financial summary combining news and price analysis, markdown>",
+  "prediction": {{"predicted_price": <number, price in 7 days>, "confidence": "<low/medium/high>", "reasoning": "<brief>"}},
+  "advice": "<financial advice (buy/hold/sell) based on the summary, markdown>"
+}}"""
+    }]
+
+    response = chat_with_groq(
+        prompt, agent="fused_analyst", response_format={"type": "json_object"}
+    )
+
+    try:
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if not json_match:
+            raise ValueError("no JSON object in response")
+        return validate(json.loads(json_match.group()))
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError too
+        print(f"[Fused Analysis] Invalid response for {ticker}: {e}")
+        return None
@@ -0,0 +1,178 @@
+"""
+Vectorized technical indicators.
+
+Every function takes 2D float arrays shaped (symbols, bars) - 1D input is
+treated as a single symbol - and computes all symbols in one pass with
+NumPy. Histories of different lengths are left-padded with NaN (see
+to_matrix); leading NaNs are skipped, so each row starts when its data does.
+"""
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def to_matrix(series_list):
+    """Stack ragged per-symbol price lists into a NaN left-padded 2D array"""
+    length = max((len(s) for s in series_list), default=0)
+    matrix = np.full((len(series_list), length), np.nan)
+    for i, series in enumerate(series_list):
+        if len(series):
+            matrix[i, length - len(series):] = series
+    return matrix
+
+
+def _as_2d(values):
+    return np.atleast_2d(np.asarray(values, dtype=float))
+
+
+def _rolling_moments(values, window):
+    """
+    Trailing-window mean and (population) std via cumulative sums, O(bars).
+    Windows that contain a NaN are NaN; the first window-1 bars are NaN.
+    """
+    values = _as_2d(values)
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+    if values.shape[1] < window:
+        return mean, std
+
+    gaps = np.isnan(values)
+    filled = np.where(gaps, 0.0, values)
+    zero = np.zeros((values.shape[0], 1))
+    csum = np.concatenate([zero, np.cumsum(filled, axis=1)], axis=1)
+    csq = np.concatenate([zero, np.cumsum(filled * filled, axis=1)], axis=1)
+    cgaps = np.concatenate([zero, np.cumsum(gaps, axis=1)], axis=1)
+
+    total = csum[:, window:] - csum[:, :-window]
+    total_sq = csq[:, window:] - csq[:, :-window]
+    has_gap = (cgaps[:, window:] - cgaps[:, :-window]) > 0
+
+    m = total / window
+    var = np.maximum(total_sq / window - m * m, 0.0)
+    mean[:, window - 1:] = np.where(has_gap, np.nan, m)
+    std[:, window - 1:] = np.where(has_gap, np.nan, np.sqrt(var))
+    return mean, std
+
+
+def _smooth(values, alpha):
+    """
+    Exponential smoothing along the bar axis, vectorized across symbols.
+    Starts at each row's first value and carries through NaN gaps.
+    """
+    # Bars-major copy so each step touches one contiguous row
+    values = np.ascontiguousarray(_as_2d(values).T)
+    gaps = np.isnan(values)
+    out = np.empty(values.shape)
+    prev = values[0].copy()
+    out[0] = prev
+    for t in range(1, len(values)):
+        step = alpha * values[t] + (1 - alpha) * prev
+        np.copyto(step, prev, where=gaps[t])
+        np.copyto(step, values[t], where=np.isnan(prev))
+        out[t] = prev = step
+    return out.T
+
+
+def sma(close, window=20):
+    return _rolling_moments(close, window)[0]
+
+
+def ema(close, span=20):
+    return _smooth(close, 2.0 / (span + 1))
+
+
+def rsi(close, period=14):
+    """Wilder's relative strength index (0-100)"""
+    delta = np.diff(_as_2d(close), axis=1, prepend=np.nan)
+    gains = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+    losses = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    avg_gain = _smooth(gains, 1.0 / period)
+    avg_loss = _smooth(losses, 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100.0 - 100.0 / (1.0 + rs)
+    out[avg_loss == 0] = 100.0
+    # Not enough price changes yet (per row) for a meaningful reading
+    out[np.cumsum(~np.isnan(delta), axis=1) < period] = np.nan
+    return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd_line, signal_line, histogram)"""
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window=20, num_std=2.0):
+    """Returns (middle, upper, lower) bands"""
+    middle, std = _rolling_moments(close, window)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def atr(high, low, close, period=14):
+    """Average true range (Wilder smoothing)"""
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return _smooth(true_range, 1.0 / period)
+
+
+def log_returns(close):
+    close = _as_2d(close)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.diff(np.log(close), axis=1, prepend=np.nan)
+
+
+def realized_volatility(close, window=20, annualize=True):
+    """Rolling standard deviation of daily log returns"""
+    vol = _rolling_moments(log_returns(close), window)[1]
+    return vol * np.sqrt(TRADING_DAYS) if annualize else vol
+
+
+def drawdown(close):
+    """Fractional distance below the running peak (0 at a new high)"""
+    close = _as_2d(close)
+    peak = np.fmax.accumulate(np.where(np.isnan(close), -np.inf, close), axis=1)
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isnan(close), np.nan, close / peak - 1.0)
+
+
+def compute_indicators(close, high=None, low=None):
+    """
+    Full indicator set for a (symbols, bars) batch.
+    ATR is included only when high/low are given.
+    """
+    close = _as_2d(close)
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_mid, bb_upper, bb_lower = bollinger(close)
+    dd = drawdown(close)
+    result = {
+        "close": close,
+        "sma_20": sma(close, 20),
+        "sma_50": sma(close, 50),
+        "ema_12": ema(close, 12),
+        "ema_26": ema(close, 26),
+        "rsi_14": rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_signal,
+        "macd_hist": macd_hist,
+        "bb_middle": bb_mid,
+        "bb_upper": bb_upper,
+        "bb_lower": bb_lower,
+        "volatility_20": realized_volatility(close, 20),
+        "drawdown": dd,
+        "max_drawdown": np.nanmin(np.where(np.isnan(dd), 0.0, dd), axis=1),
+    }
+    if high is not None and low is not None:
+        result["atr_14"] = atr(high, low, close, 14)
+    return result
+
+
+def latest(indicators, row=0):
+    """Most recent value of every indicator for one symbol (NaN if unavailable)"""
+    snapshot = {}
+    for name, values in indicators.items():
+        values = np.asarray(values)
+        snapshot[name] = float(values[row] if values.ndim == 1 else values[row, -1])
+    return snapshot
@@ -1,8 +1,16 @@
+import os
+
 from groq_client import chat_with_groq
+from agents import sentiment
+
+# "llm" for the model's narrative, "lexicon" for the local sentiment summary
+NEWS_ANALYSIS_MODE = os.getenv("NEWS_ANALYSIS_MODE", "llm")
 
 def analyze_news(news_list):
+    if NEWS_ANALYSIS_MODE == "lexicon":
+        return sentiment.summarize(news_list)
     prompt = [
         {"role": "system", "content": "Analyze the sentiment and insights from financial news."},
         {"role": "user", "content": "\n".join(news_list)}
     ]
-    return chat_with_groq(prompt)
+    return chat_with_groq(prompt, agent="news_analyst")
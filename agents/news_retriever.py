@@ -1,26 +1,62 @@
+import os
+import time
+
 import requests
-import streamlit as st
+
+import config
+import http_client
+import news_store
+import rate_limiter
+import tracing
+
 NEWS_API_URL = "https://newsapi.org/v2/everything"
-NEWS_API_KEY = st.secrets["NEWS_API_KEY"]
-
-def get_news_for_ticker(ticker):
-    params = {
-        "q": ticker,
-        "sortBy": "publishedAt",
-        "language": "en",
-        "pageSize": 5,
-        "apiKey": NEWS_API_KEY
-    }
-    
-    try:
-        response = requests.get(NEWS_API_URL, params=params)
-        response.raise_for_status()
-        articles = response.json().get("articles", [])
-        return [f"{a['title']} - {a['source']['name']}" for a in articles]
-    
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching news: {e}")
-        return ["Failed to fetch news."]
+
+# The stored headlines are reused for this long before asking for newer ones
+NEWS_MAX_AGE = int(os.getenv("NEWS_CACHE_SECONDS", str(10 * 60)))
+# Articles requested per call (only those newer than the last fetch)
+PAGE_SIZE = int(os.getenv("NEWS_PAGE_SIZE", "20"))
+# Distinct stories passed on to the news analyst
+NEWS_LIMIT = int(os.getenv("NEWS_LIMIT", "8"))
+
+@tracing.traced("fetch_news", provider="newsapi")
+@rate_limiter.coalesced(lambda ticker, max_age=None: ("newsapi", ticker, max_age == 0))
+def get_news_for_ticker(ticker, max_age=NEWS_MAX_AGE):
+    """
+    Latest distinct headlines for ticker from the news store. Only articles
+    published since the last fetch are requested, and only once the store
+    is older than max_age seconds (max_age=0 forces a fetch).
+    """
+    with news_store.symbol_lock(ticker):
+        state = news_store.load(ticker)
+        if max_age and state and time.time() - state.get("fetched_at", 0) < max_age:
+            tracing.annotate(ticker=ticker, cache="hit")
+            return news_store.headlines(state, NEWS_LIMIT)
+
+        try:
+            params = {
+                "q": ticker,
+                "sortBy": "publishedAt",
+                "language": "en",
+                "pageSize": PAGE_SIZE,
+                "apiKey": config.get_secret("NEWS_API_KEY")
+            }
+            if state.get("latest"):
+                params["from"] = state["latest"]
+            response = http_client.get_session().get(NEWS_API_URL, params=params)
+            response.raise_for_status()
+            articles = response.json().get("articles", [])
+        except (requests.exceptions.RequestException, config.MissingSecret) as e:
+            print(f"Error fetching news: {e}")
+            if state.get("articles"):
+                return news_store.headlines(state, NEWS_LIMIT)
+            return ["Failed to fetch news."]
+
+        added = news_store.merge(state, articles)
+        state["fetched_at"] = time.time()
+        news_store.save(ticker, state)
+        tracing.annotate(ticker=ticker, bytes=len(response.content), articles=len(articles),
+                         new_articles=added, cache="partial" if "from" in params else "miss")
+        return news_store.headlines(state, NEWS_LIMIT)
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,20 +1,54 @@
-import pandas as pd
+import numpy as np
+
+from agents import indicators
+
+
+def _fmt(value, template="{:.2f}"):
+    return "n/a" if np.isnan(value) else template.format(value)
+
+
+def _series(hist_data):
+    """(close, high, low) from a candle dict or a plain list of closes"""
+    if isinstance(hist_data, dict):
+        return hist_data['close'], hist_data.get('high'), hist_data.get('low')
+    return hist_data, None, None
+
+
+def compute_price_indicators(hist_data):
+    """
+    Indicator arrays for one ticker (1D, aligned with its bars); used for the
+    LLM summary and the chart overlays
+    """
+    close, high, low = _series(hist_data)
+    batch = indicators.compute_indicators(close, high, low)
+    return {name: values[0] for name, values in batch.items()}
+
 
 def analyze_price_data(hist_data):
     try:
-        # Convert list to a pandas Series
-        series = pd.Series(hist_data)
+        close, high, low = _series(hist_data)
+        closes = np.asarray(close, dtype=float)
+        snap = indicators.latest(indicators.compute_indicators(closes, high, low))
 
-        # Use describe() for quick stats
-        description = series.describe().to_string()
+        trend = "increasing" if closes[-1] > closes[0] else "decreasing"
+        change_pct = (closes[-1] - closes[0]) / closes[0] * 100
 
-        # You can also calculate trends or percent changes here
-        trend = "increasing" if series.iloc[-1] > series.iloc[0] else "decreasing"
+        rsi = snap['rsi_14']
+        rsi_note = " (overbought)" if rsi > 70 else " (oversold)" if rsi < 30 else ""
+        atr = snap.get('atr_14', np.nan)
 
         return f"""
-📈 Price Trend: {trend}
-📊 Summary Stats:
-{description}
+📈 Price Trend: {trend} ({change_pct:+.2f}% over {len(closes)} bars)
+📊 Range: low {closes.min():.2f}, high {closes.max():.2f}, last {closes[-1]:.2f}
+📐 Indicators:
+SMA 20 / 50: {_fmt(snap['sma_20'])} / {_fmt(snap['sma_50'])}
+EMA 12 / 26: {_fmt(snap['ema_12'])} / {_fmt(snap['ema_26'])}
+RSI 14: {_fmt(rsi, "{:.1f}")}{rsi_note}
+MACD / signal / histogram: {_fmt(snap['macd'])} / {_fmt(snap['macd_signal'])} / {_fmt(snap['macd_hist'])}
+Bollinger (20, 2σ): {_fmt(snap['bb_lower'])} - {_fmt(snap['bb_upper'])}
+ATR 14: {_fmt(atr)}
+Realized volatility (20d, annualized): {_fmt(snap['volatility_20'] * 100, "{:.1f}%")}
+Drawdown from peak: {_fmt(snap['drawdown'] * 100, "{:.1f}%")} (max {_fmt(snap['max_drawdown'] * 100, "{:.1f}%")})
 """
     except Exception as e:
         return f"Error analyzing price data: {e}"
@@ -1,17 +1,35 @@
+import os
+
 import numpy as np
 from groq_client import chat_with_groq
+from prompt_budget import truncate_text
+from agents import forecasting, sentiment
+
+# Tokens of the news summary passed into the prediction prompt
+NEWS_SENTIMENT_TOKENS = 400
 
-def predict_future_price(historical_data, news_sentiment, ticker):
+# "llm" or one of forecasting.METHODS ("drift", "ets", "ar")
+PREDICTION_MODE = os.getenv("PREDICTION_MODE", "llm")
+
+def predict_future_price(historical_data, news_sentiment, ticker, mode=None):
     """
-    Predict future price using LLM analysis + simple momentum
+    Predict future price using LLM analysis + simple momentum,
+    or fully offline with a statistical model when mode is drift/ets/ar.
+    news_sentiment is a sentiment.analyze() result (or free text).
     """
+    mode = mode or PREDICTION_MODE
     try:
         close_prices = historical_data['close']
+
+        if mode in forecasting.METHODS:
+            return forecasting.predict(close_prices, horizon=7, method=mode)
         
         # Calculate momentum indicators
         recent_trend = (close_prices[-1] - close_prices[-7]) / close_prices[-7] * 100
         volatility = np.std(close_prices[-30:])
         current_price = close_prices[-1]
+        if isinstance(news_sentiment, dict):
+            news_sentiment = sentiment.describe(news_sentiment)
         
         # Use LLM for prediction reasoning
         prompt = [{
@@ -24,7 +42,7 @@ def predict_future_price(historical_data, news_sentiment, ticker):
 Current Price: ${current_price:.2f}
 7-day Trend: {recent_trend:+.2f}%
 30-day Volatility: ${volatility:.2f}
-News Sentiment: {news_sentiment}
+News Sentiment: {truncate_text(str(news_sentiment), NEWS_SENTIMENT_TOKENS)}
 
 Predict the price in 7 days. Consider:
 1. Recent momentum
@@ -34,7 +52,7 @@ Predict the price in 7 days. Consider:
 Return ONLY a JSON: {{"predicted_price": <number>, "confidence": "<low/medium/high>", "reasoning": "<brief>"}}"""
         }]
         
-        response = chat_with_groq(prompt, model="llama-3.3-70b-versatile")
+        response = chat_with_groq(prompt, model="llama-3.3-70b-versatile", agent="price_predictor")
         
         # Parse LLM response
         import json
@@ -44,18 +62,14 @@ Return ONLY a JSON: {{"predicted_price": <number>, "confidence": "<low/medium/hi
             prediction = json.loads(json_match.group())
             return prediction
         else:
-            # Fallback to simple momentum-based prediction
-            predicted_price = current_price * (1 + recent_trend/100 * 0.5)
-            return {
-                "predicted_price": round(predicted_price, 2),
-                "confidence": "medium",
-                "reasoning": "Based on recent momentum and volatility"
-            }
+            # Fallback to the offline statistical forecast (LLM down or unparseable)
+            return forecasting.predict(close_prices, horizon=7, method="drift")
             
     except Exception as e:
         print(f"[Prediction Error] {e}")
         return {
             "predicted_price": close_prices[-1],
             "confidence": "low",
-            "reasoning": "Insufficient data for prediction"
+            "reasoning": "Insufficient data for prediction",
+            "method": "last_close"
         }
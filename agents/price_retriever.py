@@ -1,27 +1,78 @@
-import finnhub
-import streamlit as st
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
-# Get API key from Streamlit secrets
-FINNHUB_API_KEY = st.secrets["FINNHUB_API_KEY"]
+import candle_store
+import config
+import market_hours
+import http_client
+import rate_limiter
+import result_cache
+import tracing
 
-# Setup client
-finnhub_client = finnhub.Client(api_key=FINNHUB_API_KEY)
+_finnhub_client = None
+_client_lock = threading.Lock()
 
+# Quotes are reused for this long during the session, and for longer outside
+# it when prices barely move (prefetch refreshes watchlist quotes just before)
+QUOTE_MAX_AGE = int(os.getenv("QUOTE_CACHE_SECONDS", "30"))
+QUOTE_CLOSED_MAX_AGE = int(os.getenv("QUOTE_CLOSED_CACHE_SECONDS", str(30 * 60)))
+_quote_cache = result_cache.ResultMemo(max_entries=1024)
 
-def get_historical_data(ticker, days=90):
+# Symbols per bulk yfinance download request
+BATCH_SIZE = 100
+# Concurrent per-symbol quote requests in get_price_data_many
+QUOTE_WORKERS = int(os.getenv("QUOTE_WORKERS", "8"))
+
+
+def get_finnhub_client():
     """
-    Fetch historical data with fallback to yfinance
+    The shared Finnhub client, created on first use (raises
+    config.MissingSecret without FINNHUB_API_KEY)
+    """
+    global _finnhub_client
+    with _client_lock:
+        if _finnhub_client is None:
+            import finnhub
+
+            client = finnhub.Client(api_key=config.get_secret("FINNHUB_API_KEY"))
+            # reuse the shared pooled/retrying transport on its session
+            http_client.configure_session(client._session)
+            _finnhub_client = client
+        return _finnhub_client
+
+
+def quote_max_age(is_open=None):
+    """How long a cached quote is reused, depending on the market session"""
+    if is_open is None:
+        is_open = market_hours.market_open()
+    return QUOTE_MAX_AGE if is_open else QUOTE_CLOSED_MAX_AGE
+
+
+def _frame_to_candles(hist):
+    """Convert a yfinance OHLCV DataFrame into the candle dict format"""
+    return {
+        'timestamps': [int(dt.timestamp()) for dt in hist.index],
+        'open': hist['Open'].tolist(),
+        'high': hist['High'].tolist(),
+        'low': hist['Low'].tolist(),
+        'close': hist['Close'].tolist(),
+        'volume': hist['Volume'].tolist()
+    }
+
+
+def _fetch_candles(ticker, start_time, end_time):
+    """
+    Download daily candles between two unix timestamps, with fallback to yfinance
     """
     # Try Finnhub first
     try:
-        end_time = int(datetime.now().timestamp())
-        start_time = int((datetime.now() - timedelta(days=days)).timestamp())
-        
-        candles = finnhub_client.stock_candles(ticker, 'D', start_time, end_time)
+        candles = get_finnhub_client().stock_candles(ticker, 'D', start_time, end_time)
         
         if candles and candles.get('s') == 'ok' and candles.get('t'):
             print(f"[Success] Finnhub provided data for {ticker}")
+            tracing.annotate(provider="finnhub")
             return {
                 'timestamps': candles['t'],
                 'open': candles['o'],
@@ -41,21 +92,16 @@ def get_historical_data(ticker, days=90):
         import yfinance as yf
         
         stock = yf.Ticker(ticker)
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        start_date = datetime.fromtimestamp(start_time)
+        # yfinance's end date is exclusive
+        end_date = datetime.fromtimestamp(end_time) + timedelta(days=1)
+        rate_limiter.acquire("yahoo")
         hist = stock.history(start=start_date, end=end_date)
         
         if not hist.empty:
-            timestamps = [int(dt.timestamp()) for dt in hist.index]
-            print(f"[Success] Yahoo Finance provided {len(timestamps)} days of data")
-            return {
-                'timestamps': timestamps,
-                'open': hist['Open'].tolist(),
-                'high': hist['High'].tolist(),
-                'low': hist['Low'].tolist(),
-                'close': hist['Close'].tolist(),
-                'volume': hist['Volume'].tolist()
-            }
+            print(f"[Success] Yahoo Finance provided {len(hist)} days of data")
+            tracing.annotate(provider="yfinance")
+            return _frame_to_candles(hist)
         else:
             print(f"[YFinance] No data available for {ticker}")
     except ImportError:
@@ -70,12 +116,86 @@ def get_historical_data(ticker, days=90):
     }
 
 
-def get_price_data(ticker):
+def _store_fetched(ticker, stored, meta, fetched, end_time):
     """
-    Get current price quote data (Finnhub works fine for this)
+    Merge downloaded (range_start, range_end, candle dict) ranges into the
+    stored candles and save them (call with the symbol lock held).
+    Returns the merged candles.
     """
+    new_meta = dict(meta)
+    updated = False
+    for range_start, range_end, fresh in fetched:
+        if 'error' in fresh:
+            continue
+        updated = True
+        stored = candle_store.merge(stored, candle_store.from_dict(fresh))
+        new_meta['covered_from'] = min(range_start, new_meta.get('covered_from', range_start))
+        if range_end == end_time:
+            # only a refreshed tail makes the stored bars current
+            new_meta['fetched_at'] = end_time
+
+    if updated:
+        candle_store.save(ticker, stored, new_meta)
+    elif len(stored):
+        print(f"[Candle Store] Refresh failed, serving stored data for {ticker}")
+    return stored
+
+
+def _window_result(candles, start_time):
+    candles = candle_store.window(candles, start_time)
+    if len(candles) == 0:
+        return {
+            'error': "Historical data unavailable from all sources",
+            'timestamps': []
+        }
+    return candle_store.to_dict(candles)
+
+
+@tracing.traced("fetch_history")
+def get_historical_data(ticker, days=90, max_age=candle_store.REFRESH_SECONDS):
+    """
+    Historical daily candles for the last `days` days.
+    Served from the local candle store; only the missing head/tail is
+    downloaded, the tail once it is older than max_age seconds (0 forces it).
+    """
+    end_time = int(datetime.now().timestamp())
+    start_time = int((datetime.now() - timedelta(days=days)).timestamp())
+
+    with candle_store.symbol_lock(ticker):
+        stored = candle_store.load(ticker)
+        meta = candle_store.load_meta(ticker)
+        missing = candle_store.missing_ranges(meta, stored, start_time, end_time, max_age=max_age)
+        tracing.annotate(ticker=ticker, provider="candle_store",
+                         cache="miss" if not len(stored) else "partial" if missing else "hit")
+
+        if missing:
+            fetched = [(range_start, range_end, _fetch_candles(ticker, range_start, range_end))
+                       for range_start, range_end in missing]
+            stored = _store_fetched(ticker, stored, meta, fetched, end_time)
+
+    result = _window_result(stored, start_time)
+    tracing.annotate(bars=len(result['timestamps']))
+    return result
+
+
+@tracing.traced("fetch_quote", provider="finnhub")
+@rate_limiter.coalesced(lambda ticker, max_age=None: ("finnhub:quote", ticker, max_age == 0))
+def get_price_data(ticker, max_age=None):
+    """
+    Get current price quote data (Finnhub works fine for this).
+    Served from the cache when younger than max_age seconds (0 forces a
+    refresh; by default quote_max_age()).
+    """
+    if max_age is None:
+        max_age = quote_max_age()
+    cached = _quote_cache.get(ticker, max_age=max_age) if max_age else None
+    if cached is not None:
+        tracing.annotate(ticker=ticker, cache="hit")
+        return cached
+
     try:
-        quote = finnhub_client.quote(ticker)
+        tracing.annotate(ticker=ticker, cache="miss")
+        quote = get_finnhub_client().quote(ticker)
 
         if not quote or quote.get("c", 0) == 0:
             return {
@@ -83,7 +203,7 @@ def get_price_data(ticker):
                 "historical": []
             }
 
-        return {
+        price_data = {
             "symbol": ticker,
             "current_price": quote["c"],
             "high_price": quote["h"],
@@ -92,6 +212,8 @@ def get_price_data(ticker):
             "previous_close": quote["pc"],
             "historical": [quote["pc"], quote["o"], quote["h"], quote["l"], quote["c"]]
         }
+        _quote_cache.set(ticker, price_data)
+        return price_data
 
     except Exception as e:
         print(f"[Price Retriever Error] {e}")
@@ -99,3 +221,115 @@ def get_price_data(ticker):
             "error": f"Failed to fetch price data: {str(e)}",
             "historical": []
         }
+
+
+def _download_many(tickers, start_time, end_time):
+    """
+    Daily candles for many symbols using yfinance bulk downloads, one
+    rate-limited request per BATCH_SIZE symbols. Returns {ticker: candle dict}
+    for the symbols the download served.
+    """
+    try:
+        import yfinance as yf
+    except ImportError:
+        print("[Error] yfinance not installed. Run: pip install yfinance")
+        return {}
+
+    start_date = datetime.fromtimestamp(start_time)
+    # yfinance's end date is exclusive
+    end_date = datetime.fromtimestamp(end_time) + timedelta(days=1)
+    results = {}
+    for i in range(0, len(tickers), BATCH_SIZE):
+        chunk = tickers[i:i + BATCH_SIZE]
+        try:
+            rate_limiter.acquire("yahoo")
+            # auto_adjust matches yf.Ticker.history() in _fetch_candles
+            frame = yf.download(
+                chunk, start=start_date, end=end_date, group_by='ticker',
+                auto_adjust=True, progress=False, threads=True
+            )
+        except Exception as e:
+            print(f"[YFinance Batch Error] {e}")
+            continue
+
+        for ticker in chunk:
+            try:
+                hist = frame[ticker] if frame.columns.nlevels > 1 else frame
+            except KeyError:
+                continue
+            hist = hist.dropna(subset=['Close'])
+            if not hist.empty:
+                results[ticker] = _frame_to_candles(hist)
+
+    print(f"[Success] Yahoo Finance bulk download served {len(results)}/{len(tickers)} symbols")
+    return results
+
+
+@tracing.traced("fetch_history_many", provider="candle_store")
+def get_historical_data_many(tickers, days=90, max_age=candle_store.REFRESH_SECONDS):
+    """
+    Historical candles for many symbols, as {ticker: candle dict} in input
+    order (same results as get_historical_data per symbol).
+    Missing ranges are filled with at most two bulk downloads (full windows
+    for symbols that need a backfill, stale tails for the rest) and merged
+    into the candle store; symbols the bulk path can't serve fall back to
+    get_historical_data.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    end_time = int(datetime.now().timestamp())
+    start_time = int((datetime.now() - timedelta(days=days)).timestamp())
+
+    full, tails = [], {}
+    for ticker in tickers:
+        stored = candle_store.load(ticker)
+        missing = candle_store.missing_ranges(
+            candle_store.load_meta(ticker), stored, start_time, end_time, max_age=max_age
+        )
+        if not missing:
+            continue
+        if missing[0][0] == start_time:
+            full.append(ticker)
+        else:
+            tails[ticker] = missing[0][0]
+    tracing.annotate(symbols=len(tickers), stale=len(full) + len(tails))
+
+    downloads = []
+    if full:
+        downloads.append((start_time, _download_many(full, start_time, end_time)))
+    if tails:
+        tail_start = min(tails.values())
+        downloads.append((tail_start, _download_many(list(tails), tail_start, end_time)))
+
+    results = {}
+    for range_start, fetched in downloads:
+        for ticker, candles in fetched.items():
+            with candle_store.symbol_lock(ticker):
+                stored = _store_fetched(ticker, candle_store.load(ticker),
+                                        candle_store.load_meta(ticker),
+                                        [(range_start, end_time, candles)], end_time)
+            results[ticker] = _window_result(stored, start_time)
+
+    for ticker in tickers:
+        if ticker in results:
+            continue
+        if ticker in full or ticker in tails:
+            results[ticker] = get_historical_data(ticker, days, max_age)
+        else:
+            results[ticker] = _window_result(candle_store.load(ticker), start_time)
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def get_price_data_many(tickers, max_age=None, workers=QUOTE_WORKERS):
+    """
+    Current quotes for many symbols, as {ticker: quote dict} in input order.
+    Finnhub has no multi-symbol quote endpoint, so the symbols are quoted
+    concurrently through get_price_data: the same source, cache and rate
+    limit as a single quote, and cached symbols cost no request.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(tickers))) as executor:
+        futures = [executor.submit(tracing.wrap(get_price_data), ticker, max_age)
+                   for ticker in tickers]
+        return {ticker: future.result() for ticker, future in zip(tickers, futures)}
@@ -0,0 +1,146 @@
+"""
+Local headline sentiment scoring (no network calls).
+
+A linear model over hashed unigrams and bigrams: each n-gram is hashed
+(crc32) into a fixed weight vector, and a headline's score is the squashed
+sum of its n-gram weights, with a unigram's sign flipped within a few
+words after a negator ("not", "no", ...). A batch of headlines is scored
+with one gather and one bincount over all of its n-grams.
+
+The weights come from the bundled finance lexicon (data/finance_lexicon.csv)
+or, when SENTIMENT_MODEL_PATH is set, from a trained .npy weight vector of
+the same size.
+"""
+import csv
+import os
+import re
+import zlib
+
+import numpy as np
+
+LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "finance_lexicon.csv")
+MODEL_PATH = os.getenv("SENTIMENT_MODEL_PATH")
+
+HASH_BITS = 20
+NEGATORS = {"not", "no", "never", "without", "fails", "failed", "despite"}
+NEGATION_WINDOW = 3  # words after a negator whose sign is flipped
+# Squashing scale: a headline whose weights sum to SCALE scores tanh(1) ~ 0.76
+SCALE = 2.0
+# Aggregate scores beyond this are labelled positive/negative
+NEUTRAL_BAND = 0.15
+
+_REPRINTS_RE = re.compile(r" \(\+(\d+) similar\)$")
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def _hash(terms):
+    mask = (1 << HASH_BITS) - 1
+    return np.fromiter((zlib.crc32(t.encode("utf-8")) & mask for t in terms),
+                       dtype=np.int64, count=len(terms))
+
+
+def load_weights(lexicon_path=LEXICON_PATH, model_path=MODEL_PATH):
+    """Hashed weight vector from a trained model file, else from the lexicon"""
+    if model_path:
+        weights = np.load(model_path)
+        if weights.shape != (1 << HASH_BITS,):
+            raise ValueError(f"sentiment model must have {1 << HASH_BITS} weights")
+        return weights.astype(np.float32)
+
+    with open(lexicon_path, newline="", encoding="utf-8") as f:
+        rows = [(" ".join(_WORD_RE.findall(r["term"].lower())), float(r["weight"]))
+                for r in csv.DictReader(f)]
+    weights = np.zeros(1 << HASH_BITS, dtype=np.float32)
+    weights[_hash([term for term, _ in rows])] = [weight for _, weight in rows]
+    return weights
+
+
+_weights = None
+
+
+def _get_weights():
+    global _weights
+    if _weights is None:
+        _weights = load_weights()
+    return _weights
+
+
+def parse_headline(line):
+    """(title, reprints) from a retriever line 'Title - Source (+N similar)'"""
+    match = _REPRINTS_RE.search(line)
+    reprints = int(match.group(1)) if match else 0
+    if match:
+        line = line[:match.start()]
+    title = line.rsplit(" - ", 1)[0] if " - " in line else line
+    return title, reprints
+
+
+def score_headlines(titles):
+    """Sentiment in [-1, 1] for each title, as one array"""
+    terms, owners, signs = [], [], []
+    for i, title in enumerate(titles):
+        words = _WORD_RE.findall(title.lower())
+        bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+        word_signs = [1.0] * len(words)
+        for k, word in enumerate(words):
+            if word in NEGATORS:
+                for j in range(k + 1, min(k + 1 + NEGATION_WINDOW, len(words))):
+                    word_signs[j] = -1.0
+        terms += words + bigrams
+        owners += [i] * (len(words) + len(bigrams))
+        signs += word_signs + [1.0] * len(bigrams)
+
+    if not terms:
+        return np.zeros(len(titles))
+    values = _get_weights()[_hash(terms)] * np.asarray(signs)
+    totals = np.bincount(np.asarray(owners), weights=values, minlength=len(titles))
+    return np.tanh(totals / SCALE)
+
+
+def analyze(news_list):
+    """
+    Per-headline and aggregate sentiment for the retriever's headline lines.
+    The aggregate is the mean score weighted by each story's copies (1 + reprints).
+    """
+    parsed = [parse_headline(line) for line in news_list or []]
+    scores = score_headlines([title for title, _ in parsed])
+    copies = np.asarray([1 + reprints for _, reprints in parsed], dtype=float)
+    score = float(np.average(scores, weights=copies)) if len(scores) else 0.0
+
+    if score > NEUTRAL_BAND:
+        label = "positive"
+    elif score < -NEUTRAL_BAND:
+        label = "negative"
+    else:
+        label = "neutral"
+    return {
+        "score": round(score, 3),
+        "label": label,
+        "count": len(scores),
+        "positive": int((scores > NEUTRAL_BAND).sum()),
+        "negative": int((scores < -NEUTRAL_BAND).sum()),
+        "articles": [{"headline": title, "score": round(float(s), 3)}
+                     for (title, _), s in zip(parsed, scores)],
+    }
+
+
+def describe(result):
+    """One-line text form of an analyze() result"""
+    return (f"{result['label']} ({result['score']:+.2f}; {result['positive']} positive, "
+            f"{result['negative']} negative of {result['count']} headlines)")
+
+
+def summarize(news_list, top=3):
+    """Short news summary built from the scores alone (stands in for the LLM narrative)"""
+    result = analyze(news_list)
+    ranked = sorted(result["articles"], key=lambda a: a["score"])
+    lines = [f"**News sentiment:** {describe(result)}"]
+    positive = [a for a in reversed(ranked) if a["score"] > NEUTRAL_BAND][:top]
+    negative = [a for a in ranked if a["score"] < -NEUTRAL_BAND][:top]
+    if positive:
+        lines.append("\nMost positive headlines:")
+        lines += [f"- {a['headline']} ({a['score']:+.2f})" for a in positive]
+    if negative:
+        lines.append("\nMost negative headlines:")
+        lines += [f"- {a['headline']} ({a['score']:+.2f})" for a in negative]
+    return "\n".join(lines)
@@ -0,0 +1,180 @@
+"""
+Local symbol/company-name index used to resolve tickers without an LLM call.
+
+Company names and aliases from the bundled symbols.csv are loaded into a
+word-level trie, so a query is scanned once with longest-match lookups.
+Aliases written with capitals in the file ("Target") only match when
+capitalized mid-sentence in the query, for names that are also common
+words. Explicit symbols ("AAPL", "$TSLA") are resolved by exact lookup;
+symbols that are English words ("NOW", "LOW") need a cashtag or a nearby
+"stock"/"shares"/"ticker".
+
+match() returns tickers in query order and also reports what the index
+couldn't account for: unknown symbol-like words, and capitalized words
+that may name a company it is missing. Holidays, places, people in the
+news and other proper nouns listed in not_names.txt are not reported, so
+"Should I buy Apple before Christmas?" needs no LLM call.
+"""
+import csv
+import os
+import re
+
+SYMBOLS_PATH = os.path.join(os.path.dirname(__file__), "data", "symbols.csv")
+NOT_NAMES_PATH = os.path.join(os.path.dirname(__file__), "data", "not_names.txt")
+
+# Uppercase words that show up in questions but aren't meant as tickers
+NOT_TICKERS = {
+    "I", "A", "AI", "CEO", "CFO", "CTO", "IPO", "ETF", "EPS", "PE", "USA", "US",
+    "UK", "EU", "GDP", "CPI", "FED", "SEC", "API", "ATH", "YTD", "EOD", "AM",
+    "PM", "OK", "EV", "IT", "TV", "Q1", "Q2", "Q3", "Q4", "FY", "ROI", "NYSE",
+    "DCA", "LLM", "USD", "EUR", "OTC",
+}
+# Listed symbols that are also everyday words (often typed in caps for emphasis)
+COMMON_WORDS = {
+    "NOW", "LOW", "SHOP", "SNOW", "NET", "ARM", "HOOD", "COIN", "CAT", "DE",
+    "SPY", "MO", "EL", "MS", "GE", "HD", "EA", "CL", "TM", "BA", "MA",
+}
+# Words next to a symbol that mark it as one
+STOCK_WORDS = {"stock", "stocks", "share", "shares", "ticker", "symbol", "equity"}
+_SYMBOL_RE = re.compile(r"(?<![\w&.])(\$?)([A-Z]{1,5}(?:\.[A-Z])?)(?![\w&]|\.\w)")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+|&")
+_END = "$"  # trie terminal marker
+
+
+def _normalize(text):
+    """Lowercase word tokens; possessives dropped and '&' spelled out"""
+    return [word.lower() for word, _, _ in _words(text)]
+
+
+def _words(text):
+    """
+    (word, starts_sentence, offset) for each word, with possessives dropped
+    and '&' spelled out; offsets index the original text
+    """
+    # blank possessives out in place so offsets still line up
+    text = re.sub(r"['’]s\b", "  ", text)
+    words, end = [], 0
+    for m in _WORD_RE.finditer(text):
+        gap = text[end:m.start()]
+        word = "and" if m.group() == "&" else m.group()
+        words.append((word, end == 0 or any(c in gap for c in ".!?"), m.start()))
+        end = m.end()
+    return words
+
+
+def _is_capitalized(word, starts_sentence):
+    return word[0].isupper() and not starts_sentence
+
+
+def load_not_names(path=NOT_NAMES_PATH):
+    """Lowercase words from a stoplist file ('#' starts a comment)"""
+    with open(path, encoding="utf-8") as f:
+        return {line.split("#", 1)[0].strip().lower() for line in f} - {""}
+
+
+class SymbolIndex:
+    def __init__(self, rows, not_names=()):
+        self.symbols = {}
+        self.trie = {}
+        self.not_names = set(not_names)
+        for row in rows:
+            symbol = row["symbol"].strip().upper()
+            self.symbols[symbol] = row["name"].strip()
+            self._insert(_normalize(row["name"]), symbol, cased=False)
+            for alias in (row.get("aliases") or "").split("|"):
+                if alias:
+                    self._insert(_normalize(alias), symbol, cased=alias != alias.lower())
+
+    @classmethod
+    def load(cls, path=SYMBOLS_PATH, not_names_path=NOT_NAMES_PATH):
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(csv.DictReader(f), load_not_names(not_names_path))
+
+    def _insert(self, tokens, symbol, cased):
+        if not tokens:
+            return
+        node = self.trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, (symbol, cased))
+
+    def lookup_symbol(self, symbol):
+        """Exact symbol lookup; returns the company name or None"""
+        return self.symbols.get(symbol.upper())
+
+    def _scan(self, words):
+        """(symbol, start, end) word spans of company names/aliases, longest match first"""
+        tokens = [word.lower() for word, _, _ in words]
+        found = []
+        i = 0
+        while i < len(tokens):
+            node, match, match_end = self.trie, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if _END in node:
+                    symbol, cased = node[_END]
+                    if not cased or all(_is_capitalized(word, starts)
+                                          for word, starts, _ in words[i:j + 1]):
+                        match, match_end = symbol, j + 1
+            if match:
+                found.append((match, i, match_end))
+                i = match_end
+            else:
+                i += 1
+        return found
+
+    def match_names(self, text):
+        """Symbols for company names/aliases in text, longest match first"""
+        return [symbol for symbol, _, _ in self._scan(_words(text))]
+
+    def match(self, text):
+        """
+        Resolve tickers in a query, in the order they appear.
+        Returns (tickers, unresolved) where unresolved lists uppercase words
+        that look like symbols but aren't in the index, and capitalized
+        words that may name a company no known name covers (anything in
+        the not_names stoplist is assumed not to).
+        """
+        found, unresolved = [], []  # found: (offset, symbol)
+        words = _words(text)
+        covered = set()
+        for symbol, start, end in self._scan(words):
+            found.append((words[start][2], symbol))
+            covered.update(range(start, end))
+        covered_offsets = {words[i][2] for i in covered}
+
+        for m in _SYMBOL_RE.finditer(text):
+            cashtag, word = m.groups()
+            if not cashtag and (len(word) == 1 or word in NOT_TICKERS):
+                continue
+            if word in self.symbols:
+                if cashtag or word not in COMMON_WORDS or _has_stock_context(text, m.start(), m.end()):
+                    found.append((m.start(2), word))
+            elif m.start(2) not in covered_offsets:  # e.g. "TESLA" is a name match
+                unresolved.append(word)
+
+        for i, (word, starts_sentence, _) in enumerate(words):
+            if (i not in covered and _is_capitalized(word, starts_sentence)
+                    and not word.isupper() and word.lower() not in self.not_names):
+                unresolved.append(word)
+        return list(dict.fromkeys(symbol for _, symbol in sorted(found))), unresolved
+
+
+def _has_stock_context(text, start, end):
+    """True when a word next to text[start:end] is 'stock', 'shares', ..."""
+    before = _WORD_RE.findall(text[:start])[-2:]
+    after = _WORD_RE.findall(text[end:])[:2]
+    return any(w.lower() in STOCK_WORDS for w in before + after)
+
+
+_index = None
+
+
+def get_index():
+    """Shared index, loaded from the bundled file on first use"""
+    global _index
+    if _index is None:
+        _index = SymbolIndex.load()
+    return _index
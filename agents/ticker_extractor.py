@@ -1,7 +1,21 @@
 import re
 from groq_client import chat_with_groq
+from agents import symbol_index
+import tracing
 
+@tracing.traced("extract")
 def extract_tickers(user_input):
+    # Resolve from the local symbol index first; only ask the LLM when it finds
+    # nothing, or a leftover word may be a symbol or company it doesn't know
+    # (not a holiday, place or person), and merge its answer with the local matches
+    local, unresolved = symbol_index.get_index().match(user_input)
+    if local and not unresolved:
+        print(f"[Ticker Index] Resolved locally: {local}")
+        tracing.annotate(source="symbol_index", tickers=local)
+        return local
+    if unresolved:
+        print(f"[Ticker Index] Not in the index: {unresolved}; asking the LLM")
+
     messages = [{
         "role": "system",
         "content": "You are a stock ticker extraction assistant. Extract ONLY valid stock ticker symbols from user queries."
@@ -20,13 +34,12 @@ Return format: ["TICKER1", "TICKER2"]
 If no tickers found, return: []"""
     }]
     
-    response = chat_with_groq(messages, model="llama-3.3-70b-versatile")
-    
-    print(f"[DEBUG] Groq Response: {response}")  # Debug line
+    tracing.annotate(source="llm")
+    response = chat_with_groq(messages, model="llama-3.3-70b-versatile", agent="ticker_extractor")
     
     if "Error" in response:
         print(f"[ERROR] Groq API failed: {response}")
-        return []
+        return local
     
     # Try to extract list from response
     try:
@@ -35,8 +48,9 @@ If no tickers found, return: []"""
         list_match = re.search(r'\[.*?\]', response)
         if list_match:
             tickers = ast.literal_eval(list_match.group())
-            return tickers if isinstance(tickers, list) else []
+            if isinstance(tickers, list):
+                return list(dict.fromkeys(local + [str(t).upper() for t in tickers]))
     except Exception as e:
         print(f"[ERROR] Failed to parse: {e}")
     
-    return []
+    return local
@@ -1,128 +1,138 @@
+import itertools
+import uuid
+
 import streamlit as st
-import plotly.graph_objects as go
-from pdf_generator import create_stock_report
+import pdf_generator
 from datetime import datetime
 
-from plotly.subplots import make_subplots
 import pandas as pd
-from datetime import datetime
-from agents import (
-    ticker_extractor, news_retriever, price_retriever,
-    news_analyst, price_analyst, financial_reporter, final_answer, price_predictor
-)
+from agents import ticker_extractor, price_analyst, sentiment
+import charting
+import pipeline
+import prefetch
+import quote_stream
+import llm_cache
+import result_cache
+import tracing
 
 st.set_page_config(page_title="StockWise AI", layout="wide")
+tracing.start_metrics_server()
+prefetch.start()
 st.title("📈 StockWise AI – LLM-powered Stock Advisor")
 
-query = st.text_input("Ask about a stock:", placeholder="e.g., Apple, TSLA, Microsoft stock")
+# This session's claim on streamed symbols, and the tickers it streams in this run
+stream_owner = st.session_state.setdefault("quote_stream_owner", uuid.uuid4().hex)
+live_tickers = set()
 
-if query:
-    tickers = ticker_extractor.extract_tickers(query)
-    
-    if not tickers:
-        st.error("Could not extract a valid ticker. Try again.")
-        st.stop()
 
-    st.write(f"**Identified Ticker(s):** {', '.join(tickers)}")
-    
-    for ticker in tickers:
-        st.markdown("---")
-        st.header(f" {ticker} Analysis")
-        
-        # Fetch all data
-        with st.spinner(f"Fetching data for {ticker}..."):
-            news = news_retriever.get_news_for_ticker(ticker)
-            price_data = price_retriever.get_price_data(ticker)
-            historical_data = price_retriever.get_historical_data(ticker, days=90)
-        
-        if "error" in price_data:
-            st.error(f" Price retrieval failed: {price_data['error']}")
-            continue
-        
+def render_prediction(prediction, price_data):
+    """
+    Render the predicted price, confidence and reasoning for one ticker
+    """
+    pred_col1, pred_col2, pred_col3 = st.columns(3)
+
+    with pred_col1:
+        price_change = prediction['predicted_price'] - price_data['current_price']
+        price_change_pct = (price_change / price_data['current_price']) * 100
+        st.metric(
+            "Predicted Price (7 days)",
+            f"${prediction['predicted_price']:.2f}",
+            delta=f"{price_change_pct:+.2f}%"
+        )
+
+    with pred_col2:
+        confidence_emoji = {
+            'low': '🟡',
+            'medium': '🟠', 
+            'high': '🟢'
+        }.get(prediction['confidence'].lower(), '⚪')
+        st.metric(
+            "Confidence Level", 
+            f"{confidence_emoji} {prediction['confidence'].upper()}"
+        )
+
+    with pred_col3:
+        st.metric(
+            "Current Price", 
+            f"${price_data['current_price']:.2f}"
+        )
+
+    st.info(f"**💡 Prediction Reasoning:** {prediction['reasoning']}")
+
+
+def report_args(ticker, price_data, results):
+    """
+    create_stock_report arguments for a ticker's finished analysis
+    """
+    return {
+        "ticker": ticker,
+        "price_data": price_data,
+        "prediction": results["prediction"] or {
+            'predicted_price': price_data['current_price'],
+            'confidence': 'low',
+            'reasoning': 'Insufficient historical data'
+        },
+        "news_analysis": results["news_summary"],
+        "price_analysis": results["price_summary"],
+    }
+
+
+def render_market_data(ticker, price_data, historical_data, live=False):
+    """
+    Price metrics and the history chart. With live quotes this is a fragment
+    that refreshes itself from the trade stream every few seconds (latest
+    price, and the current candle merged into the chart) without rerunning
+    the query or the analysis stages.
+    """
+    has_history = "error" not in historical_data and bool(historical_data.get('timestamps'))
+    # Overlays come from the closed bars; only the last candle moves live
+    indicators = price_analyst.compute_price_indicators(historical_data) if has_history else None
+    stream = quote_stream.get_stream() if live else None
+    if stream:
+        live_tickers.add(ticker)
+
+    @st.fragment(run_every=quote_stream.REFRESH_SECONDS if stream else None)
+    def market_data():
+        # every refresh renews this session's lease on the symbol
+        streaming = stream and stream.subscribe(ticker, price_data, owner=stream_owner)
+        snapshot = stream.snapshot(ticker) if streaming else None
+        candle = snapshot["candle"] if snapshot and snapshot["updated"] else None
+        current = candle["close"] if candle else price_data['current_price']
+        high = max(price_data['high_price'], candle["high"]) if candle else price_data['high_price']
+        low = min(price_data['low_price'], candle["low"]) if candle else price_data['low_price']
+
         # Display current price prominently
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Current Price", f"${price_data['current_price']:.2f}")
+            st.metric("Current Price", f"${current:.2f}")
         with col2:
-            change = price_data['current_price'] - price_data['previous_close']
+            change = current - price_data['previous_close']
             change_pct = (change / price_data['previous_close']) * 100
             st.metric("Change", f"${change:.2f}", f"{change_pct:+.2f}%")
         with col3:
-            st.metric("High", f"${price_data['high_price']:.2f}")
+            st.metric("High", f"${high:.2f}")
         with col4:
-            st.metric("Low", f"${price_data['low_price']:.2f}")
-        
+            st.metric("Low", f"${low:.2f}")
+        if snapshot:
+            if candle:
+                st.caption(f"🔴 Live · last trade {datetime.fromtimestamp(snapshot['updated']):%H:%M:%S}"
+                           f" · {snapshot['ticks']} trades streamed")
+            else:
+                st.caption("Live quotes: " + ("waiting for trades..." if snapshot["connected"]
+                                              else "connecting..."))
+
         # Historical Price Chart
-        if "error" not in historical_data and historical_data.get('timestamps'):
-            st.subheader(" Historical Price Chart (90 Days)")
-            
-            # Convert timestamps to datetime
-            dates = [datetime.fromtimestamp(ts) for ts in historical_data['timestamps']]
-            
-            # Create subplots: Candlestick + Volume
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.05,
-                subplot_titles=(f'{ticker} Price Movement', 'Trading Volume'),
-                row_heights=[0.7, 0.3]
-            )
-            
-            # Candlestick Chart
-            fig.add_trace(
-                go.Candlestick(
-                    x=dates,
-                    open=historical_data['open'],
-                    high=historical_data['high'],
-                    low=historical_data['low'],
-                    close=historical_data['close'],
-                    name='OHLC',
-                    increasing_line_color='#26a69a',
-                    decreasing_line_color='#ef5350',
-                    increasing_fillcolor='#26a69a',
-                    decreasing_fillcolor='#ef5350'
-                ),
-                row=1, col=1
-            )
-            
-            # Volume bars with color coding
-            colors = ['#26a69a' if historical_data['close'][i] >= historical_data['open'][i] 
-                      else '#ef5350' for i in range(len(historical_data['close']))]
-            
-            fig.add_trace(
-                go.Bar(
-                    x=dates,
-                    y=historical_data['volume'],
-                    name='Volume',
-                    marker_color=colors,
-                    showlegend=False,
-                    opacity=0.7
-                ),
-                row=2, col=1
-            )
-            
-            # Update layout
-            fig.update_layout(
-                height=700,
-                xaxis_rangeslider_visible=False,
-                hovermode='x unified',
-                template='plotly_white',
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                )
-            )
-            
-            fig.update_yaxes(title_text="Price ($)", row=1, col=1)
-            fig.update_yaxes(title_text="Volume", row=2, col=1)
-            fig.update_xaxes(title_text="Date", row=2, col=1)
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
+        if has_history:
+            chart_data = charting.with_live_candle(historical_data, candle)
+            timestamps = chart_data['timestamps']
+            span_days = (timestamps[-1] - timestamps[0]) // 86400 + 1
+            st.subheader(f" Historical Price Chart ({span_days} Days)")
+
+            # Candles and overlays are downsampled to the chart's pixel budget;
+            # indicators come from the same vectorized engine as the price analysis
+            fig = charting.price_chart(ticker, chart_data, indicators)
+            st.plotly_chart(fig, use_container_width=True, key=f"chart_{ticker}")
+
             # Alternative: Simple Line Chart (uncomment if you prefer)
             # st.subheader("📉 Price Trend")
             # line_fig = go.Figure()
@@ -144,138 +154,264 @@ if query:
             #     hovermode='x'
             # )
             # st.plotly_chart(line_fig, use_container_width=True)
-        
-        else:
-            st.warning(" Historical data not available. Showing current price info only.")
-            
-            # Fallback to simple price overview
-            if "historical" in price_data and price_data["historical"]:
-                price_points = ["Previous Close", "Open", "High", "Low", "Current"]
-                price_values = price_data["historical"]
-                
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=price_points,
-                    y=price_values,
-                    mode='lines+markers',
-                    line=dict(color='royalblue', width=3),
-                    marker=dict(size=10, color='royalblue'),
-                    name='Price'
-                ))
-                
-                fig.update_layout(
-                    title=f"{ticker} Price Overview",
-                    xaxis_title="Price Points",
-                    yaxis_title="Price ($)",
-                    template="plotly_white",
-                    height=400
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
-        
-        # Analysis section
-        col_left, col_right = st.columns([1, 1])
-        
-        with col_left:
-            with st.spinner("📰 Analyzing news..."):
-                news_summary = news_analyst.analyze_news(news)
-                st.success(" News analyzed")
-        
-        with col_right:
-            with st.spinner(" Analyzing price trends..."):
-                if "error" not in historical_data and historical_data.get('close'):
-                    price_summary = price_analyst.analyze_price_data(historical_data['close'])
-                else:
-                    price_summary = price_analyst.analyze_price_data(price_data["historical"])
-                st.success(" Price analyzed")
-        
-        # Financial Report
-        st.subheader("📄 Financial Summary Report")
-        with st.spinner("Generating comprehensive report..."):
-            summary = financial_reporter.generate_report(news_summary, price_summary)
-            st.markdown(summary)
-        
-        # Price Prediction
-        if "error" not in historical_data and historical_data.get('close'):
+
+    market_data()
+
+
+def render_ticker(ticker, news, price_data, historical_data, prediction_mode=None, fused=False,
+                  results=None, live=False):
+    """
+    Render the full analysis section for one ticker from its fetched data.
+    `results` replays memoized stage results instead of running the pipeline.
+    `live` streams quotes into the metrics and chart.
+    Returns the stage results (None if the ticker couldn't be analyzed).
+    """
+    st.markdown("---")
+    st.header(f" {ticker} Analysis")
+    
+    if "error" in price_data:
+        st.error(f" Price retrieval failed: {price_data['error']}")
+        return
+    
+    # Metrics and chart (refreshed from the trade stream when live)
+    render_market_data(ticker, price_data, historical_data, live)
+    
+    if "error" in historical_data or not historical_data.get('timestamps'):
+        st.warning(" Historical data not available. Showing current price info only.")
+    
+        # Fallback to simple price overview
+        if "historical" in price_data and price_data["historical"]:
+            st.plotly_chart(charting.quote_chart(ticker, price_data), use_container_width=True)
+    
+    # Analysis section: the agent stages run as a dependency graph, so
+    # independent stages overlap and each section fills in as soon as its
+    # stage completes
+    has_history = pipeline.has_history(historical_data)
+    
+    col_left, col_right = st.columns([1, 1])
+    news_status = col_left.empty()
+    news_status.info("📰 Analyzing news...")
+    price_status = col_right.empty()
+    price_status.info(" Analyzing price trends...")
+    
+    # Financial Report
+    st.subheader("📄 Financial Summary Report")
+    summary_slot = st.empty()
+    summary_slot.info("Generating comprehensive report...")
+    
+    # Price Prediction
+    prediction_slot = st.empty()
+    if has_history:
+        with prediction_slot.container():
             st.subheader(" 7-Day Price Prediction")
+            st.info("Predicting future price using AI...")
+    
+    # Final Investment Advice
+    st.subheader("💡 Investment Recommendation")
+    advice_slot = st.empty()
+    advice_slot.info("Generating final investment advice...")
+    
+    # The report and the advice stream in token by token
+    streaming_slots = {"summary": summary_slot, "advice": advice_slot}
+    streamed = {"summary": "", "advice": ""}
+    
+    if results is not None:
+        events = [("done", stage, value) for stage, value in results.items()]
+    else:
+        events = pipeline.run_analysis(ticker, news, price_data, historical_data,
+                                       prediction_mode=prediction_mode, fused=fused)
+    
+    results = {}
+    try:
+        for event, stage, value in events:
+            if event == "delta":
+                streamed[stage] += value
+                streaming_slots[stage].markdown(streamed[stage] + "▌")
+                continue
             
-            with st.spinner("Predicting future price using AI..."):
-                prediction = price_predictor.predict_future_price(
-                    historical_data, 
-                    news_summary, 
-                    ticker
-                )
-            
-            pred_col1, pred_col2, pred_col3 = st.columns(3)
-            
-            with pred_col1:
-                price_change = prediction['predicted_price'] - price_data['current_price']
-                price_change_pct = (price_change / price_data['current_price']) * 100
-                st.metric(
-                    "Predicted Price (7 days)",
-                    f"${prediction['predicted_price']:.2f}",
-                    delta=f"{price_change_pct:+.2f}%"
-                )
+            results[stage] = value
+            if stage == "sentiment" and "news_summary" not in results:
+                news_status.info(f"📰 Sentiment {sentiment.describe(value)}; analyzing news...")
+            elif stage == "news_summary":
+                news_sentiment = results.get("sentiment")
+                news_status.success(" News analyzed" + (
+                    f" (sentiment {news_sentiment['score']:+.2f})" if news_sentiment else ""))
+            elif stage == "price_summary":
+                price_status.success(" Price analyzed")
+            elif stage == "summary":
+                summary_slot.markdown(value)
+            elif stage == "prediction" and value:
+                with prediction_slot.container():
+                    st.subheader(" 7-Day Price Prediction")
+                    render_prediction(value, price_data)
+            elif stage == "advice":
+                advice_slot.markdown(value)
+    except Exception as e:
+        # A failed stage only takes down this ticker's section; nothing is
+        # memoized, so the next run retries it
+        st.error(f" Analysis failed for {ticker}: {type(e).__name__}: {e}")
+        return None
+    
+    # Start rendering the PDF in the background so the button is instant
+    pdf_future = pdf_generator.submit_report(**report_args(ticker, price_data, results))
+
+            # PDF Report Download
+    st.subheader("📥 Download Report")
+    
+    col_download1, col_download2 = st.columns([2, 1])
+    
+    with col_download1:
+        if st.button(f"📄 Generate PDF Report for {ticker}", key=f"pdf_{ticker}"):
+            with st.spinner("Generating PDF report..."):
+                pdf_bytes = pdf_future.result()
             
-            with pred_col2:
-                confidence_emoji = {
-                    'low': '🟡',
-                    'medium': '🟠', 
-                    'high': '🟢'
-                }.get(prediction['confidence'].lower(), '⚪')
-                st.metric(
-                    "Confidence Level", 
-                    f"{confidence_emoji} {prediction['confidence'].upper()}"
+                st.download_button(
+                    label=f"⬇️ Download {ticker}_Report_{datetime.now().strftime('%Y%m%d')}.pdf",
+                    data=pdf_bytes,
+                    file_name=f"{ticker}_StockWise_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf",
+                    key=f"download_{ticker}"
                 )
-            
-            with pred_col3:
-                st.metric(
-                    "Current Price", 
-                    f"${price_data['current_price']:.2f}"
+    
+    with col_download2:
+        st.info(f"📊 Report includes:\n- Current metrics\n- Price prediction\n- Analysis")
+
+    
+    # Disclaimer
+    st.caption("⚠️ **Disclaimer:** This analysis is for informational purposes only and should not be considered financial advice. Always consult with a licensed financial advisor before making investment decisions.")
+    
+    return results
+
+
+# Prediction engine: the LLM, or an offline statistical model (no API calls)
+PREDICTION_MODES = {
+    "llm": "AI (Groq LLM)",
+    "drift": "Statistical: drift/volatility",
+    "ets": "Statistical: exponential smoothing",
+    "ar": "Statistical: AR(1) on returns",
+}
+prediction_mode = st.sidebar.selectbox(
+    "Prediction engine", list(PREDICTION_MODES), format_func=PREDICTION_MODES.get
+)
+# Fused mode: one structured LLM call instead of four sequential ones
+fused_mode = st.sidebar.checkbox(
+    "Fast mode (single AI call)",
+    help="Get the news analysis, report, prediction and advice from one structured "
+         "request; falls back to separate calls if the response is invalid."
+)
+
+query = st.text_input("Ask about a stock:", placeholder="e.g., Apple, TSLA, Microsoft stock")
+
+# Longer histories feed the chart, indicators and statistical forecasts
+HISTORY_WINDOWS = {90: "90 days", 365: "1 year", 3 * 365: "3 years", 10 * 365: "10 years"}
+history_days = st.sidebar.selectbox(
+    "Price history", list(HISTORY_WINDOWS), format_func=HISTORY_WINDOWS.get
+)
+
+# Per-query span timings (durations, cache hits, tokens) in the sidebar
+show_timings = st.sidebar.checkbox("Show query timings")
+TIMING_COLUMNS = ["name", "duration_ms", "ticker", "provider", "agent", "cache",
+                  "input_tokens", "output_tokens", "bytes", "status"]
+
+# Live quotes: metrics and the last candle follow the trade stream
+live_quotes = st.sidebar.checkbox(
+    "Live quotes", disabled=not quote_stream.available(),
+    help="Stream trades into the price metrics and chart without re-running the analysis"
+         + ("" if quote_stream.available() else " (requires websocket-client)")
+)
+
+# Finished results are reused across reruns for this long
+max_age = st.sidebar.number_input(
+    "Reuse results for (minutes)", min_value=0, max_value=240,
+    value=result_cache.DEFAULT_MAX_AGE // 60
+) * 60
+
+if query:
+    with tracing.trace("query", query=query) as query_trace:
+        query_key = ("tickers", result_cache.normalize_query(query))
+        # Refresh re-fetches quote, candles and news and skips cached LLM answers
+        refresh = st.button("🔄 Refresh analysis")
+        if refresh:
+            for ticker in result_cache.memo.get(query_key, max_age=float("inf")) or []:
+                result_cache.memo.invalidate(ticker)
+            result_cache.memo.invalidate(query_key)
+
+        tickers = result_cache.memo.get(query_key, max_age=max_age)
+        if tickers is None:
+            tickers = ticker_extractor.extract_tickers(query)
+            if tickers:
+                result_cache.memo.set(query_key, tickers)
+    
+        if not tickers:
+            st.error("Could not extract a valid ticker. Try again.")
+            st.stop()
+
+        st.write(f"**Identified Ticker(s):** {', '.join(tickers)}")
+    
+        # One section per ticker, in query order. Tickers analyzed within the
+        # freshness window (e.g. before a button click triggered this rerun)
+        # fill theirs from the memo right away
+        sections = {t: st.container() for t in tickers}
+        memo_keys = {t: ("analysis", t, prediction_mode, fused_mode, history_days) for t in tickers}
+        pending = []
+        for ticker in tickers:
+            memoized = result_cache.memo.get(memo_keys[ticker], max_age=max_age)
+            if memoized:
+                with sections[ticker]:
+                    render_ticker(ticker, **memoized["data"], results=memoized["results"],
+                                  live=live_quotes)
+            else:
+                pending.append(ticker)
+                prefetch.record_query(ticker)
+    
+        # Fetch news, quote and history for all remaining tickers at once and
+        # fill each ticker's section as soon as its data is ready
+        if pending:
+            with st.spinner(f"Fetching data for {', '.join(pending)}..."):
+                fetched = pipeline.fetch_all(pending, days=history_days, refresh=refresh)
+                first = next(fetched, None)
+            with llm_cache.bypass(refresh):
+                for ticker, data in itertools.chain([first] if first else [], fetched):
+                    with sections[ticker]:
+                        results = render_ticker(ticker, **data, prediction_mode=prediction_mode,
+                                                fused=fused_mode, live=live_quotes)
+                    if results is not None:
+                        result_cache.memo.set(memo_keys[ticker], {"data": data, "results": results})
+    
+        # One combined report for multi-ticker queries
+        analyzed = [(t, result_cache.memo.get(memo_keys[t], max_age=float("inf"))) for t in tickers]
+        reports = [report_args(t, m["data"]["price_data"], m["results"]) for t, m in analyzed if m]
+        if len(reports) > 1:
+            st.subheader("📥 Portfolio Report")
+            if st.button(f"📄 Generate Portfolio Report ({len(reports)} tickers)", key="pdf_portfolio"):
+                with st.spinner("Generating portfolio report..."):
+                    portfolio_bytes = pdf_generator.create_portfolio_report(reports)
+                st.download_button(
+                    label="⬇️ Download Portfolio Report",
+                    data=portfolio_bytes,
+                    file_name=f"StockWise_Portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf",
+                    key="download_portfolio"
                 )
-            
-            st.info(f"**💡 Prediction Reasoning:** {prediction['reasoning']}")
-        
-        # Final Investment Advice
-        st.subheader("💡 Investment Recommendation")
-        with st.spinner("Generating final investment advice..."):
-            advice = final_answer.generate_advice(summary)
-            st.markdown(advice)
-
-                # PDF Report Download
-        st.subheader("📥 Download Report")
-        
-        col_download1, col_download2 = st.columns([2, 1])
-        
-        with col_download1:
-            if st.button(f"📄 Generate PDF Report for {ticker}", key=f"pdf_{ticker}"):
-                with st.spinner("Generating PDF report..."):
-                    pdf_bytes = create_stock_report(
-                        ticker=ticker,
-                        price_data=price_data,
-                        prediction=prediction if "error" not in historical_data else {
-                            'predicted_price': price_data['current_price'],
-                            'confidence': 'low',
-                            'reasoning': 'Insufficient historical data'
-                        },
-                        news_analysis=news_summary,
-                        price_analysis=price_summary
-                    )
-                    
-                    st.download_button(
-                        label=f"⬇️ Download {ticker}_Report_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        data=pdf_bytes,
-                        file_name=f"{ticker}_StockWise_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                        mime="application/pdf",
-                        key=f"download_{ticker}"
-                    )
-        
-        with col_download2:
-            st.info(f"📊 Report includes:\n- Current metrics\n- Price prediction\n- Analysis")
-
-        
-        # Disclaimer
-        st.caption("⚠️ **Disclaimer:** This analysis is for informational purposes only and should not be considered financial advice. Always consult with a licensed financial advisor before making investment decisions.")
+
+    # Per-query timing breakdown from the trace spans
+    if show_timings:
+        with st.sidebar.expander("Query timings", expanded=True):
+            spans = pd.DataFrame(query_trace.summary())
+            st.dataframe(spans.reindex(columns=TIMING_COLUMNS), hide_index=True)
+
+# Stop streaming tickers this session no longer shows (unrenewed leases lapse anyway)
+stream = quote_stream.current_stream()
+if stream:
+    for ticker in st.session_state.get("live_tickers", set()) - live_tickers:
+        stream.unsubscribe(ticker, owner=stream_owner)
+st.session_state["live_tickers"] = live_tickers
+
+# LLM response cache counters (this process)
+with st.sidebar.expander("LLM cache"):
+    stats = llm_cache.cache_stats()
+    st.write(f"Hits: {stats['hits']} (memory {stats['memory_hits']}, disk {stats['disk_hits']})")
+    st.write(f"Misses: {stats['misses']} | Hit rate: {stats['hit_rate']:.0%}")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,325 @@
+"""
+Walk-forward backtest of the price predictors over stored candle history.
+
+    python backtest.py -w watchlist.txt --methods naive,momentum,drift,ets,ar \
+        --lookback 90 --horizon 7 --step 5 --workers 8
+    python backtest.py AAPL MSFT --llm-windows 50 --mock-llm
+
+Every `step` bars, each symbol's history is cut at an origin: the previous
+`lookback` closes are the model's input and the close `horizon` bars later
+is the target. The windows of a chunk of symbols are stacked into one
+(windows, lookback) matrix, so each statistical method forecasts all of
+them in one vectorized pass (agents.forecasting); chunks run on a process
+pool. The LLM predictor can't be batched: it is evaluated on a random
+sample of windows through groq_client (LLM cache applies), or against the
+local mock provider with --mock-llm.
+
+Symbols come from the candle store (all stored ones by default); --fetch
+fills it first. Reported per method: MAE, MAPE, directional accuracy
+(windows where both the forecast and the price moved), 90% interval
+coverage, the same by reported confidence level, and windows/second.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import candle_store
+from agents import forecasting
+
+# Baselines evaluated alongside forecasting.METHODS
+BASELINES = ("naive", "momentum")
+METHODS = BASELINES + forecasting.METHODS
+CONFIDENCE_LEVELS = ("low", "medium", "high")
+# The momentum baseline extrapolates the trend the LLM prompt is given
+MOMENTUM_BARS = 7
+MIN_LOOKBACK = forecasting.VOL_WINDOW + 1
+
+
+def walk_forward(close, lookback, horizon, step):
+    """(inputs, targets) of one close series: a (windows, lookback) view and the closes to predict"""
+    count = len(close) - lookback - horizon + 1
+    if count <= 0:
+        return np.empty((0, lookback)), np.empty(0)
+    inputs = sliding_window_view(close, lookback)[:count:step]
+    targets = close[lookback - 1 + horizon::step][:len(inputs)]
+    return inputs, targets
+
+
+def predict_windows(inputs, horizon, method):
+    """(predicted, lower, upper) for every row of inputs"""
+    if method in forecasting.METHODS:
+        result = forecasting.forecast(inputs, horizon, method)
+        return result["predicted"], result["lower"], result["upper"]
+
+    last = inputs[:, -1]
+    if method == "naive":
+        predicted = last.copy()
+    elif method == "momentum":
+        predicted = last * (last / inputs[:, -1 - MOMENTUM_BARS]) ** (horizon / MOMENTUM_BARS)
+    else:
+        raise ValueError(f"Unknown method {method!r}; expected one of {METHODS}")
+    spread = np.exp(forecasting.Z_SCORE * forecasting.volatility(inputs) * np.sqrt(horizon))
+    return predicted, predicted / spread, predicted * spread
+
+
+def evaluate_chunk(symbols, store_dir, lookback, horizon, step, methods):
+    """
+    Forecast every window of a chunk of symbols with each method (runs in a
+    worker process). Returns the stacked last closes, targets, per-method
+    forecasts and per-method compute seconds.
+    """
+    inputs, targets = [], []
+    for symbol in symbols:
+        close = np.asarray(candle_store.load(symbol, store_dir)["c"], dtype=float)
+        x, y = walk_forward(close, lookback, horizon, step)
+        if len(x):
+            inputs.append(x)
+            targets.append(y)
+    if not inputs:
+        return None
+    inputs = np.concatenate(inputs)
+
+    forecasts, seconds = {}, {}
+    for method in methods:
+        start = time.perf_counter()
+        forecasts[method] = predict_windows(inputs, horizon, method)
+        seconds[method] = time.perf_counter() - start
+    return {"last": inputs[:, -1].copy(), "actual": np.concatenate(targets),
+            "forecasts": forecasts, "seconds": seconds}
+
+
+def score(last, actual, predicted, lower=None, upper=None, confidence=None):
+    """Error, direction and interval metrics; broken down by confidence level when given"""
+    if not len(actual):
+        return {"windows": 0}
+    error = np.abs(predicted - actual)
+    called = (predicted != last) & (actual != last)
+    stats = {
+        "windows": int(len(actual)),
+        "mae": float(error.mean()),
+        "mape_pct": float((error / actual).mean() * 100),
+        "directional_accuracy": (float((np.sign(predicted - last) == np.sign(actual - last))[called].mean())
+                                 if called.any() else None),
+    }
+    if lower is not None:
+        stats["interval_coverage"] = float(((actual >= lower) & (actual <= upper)).mean())
+    if confidence is not None:
+        stats["by_confidence"] = {
+            level: score(last[mask], actual[mask], predicted[mask],
+                         None if lower is None else lower[mask],
+                         None if upper is None else upper[mask])
+            for level in CONFIDENCE_LEVELS
+            for mask in [confidence == level]
+            if mask.any()
+        }
+    return stats
+
+
+def _chunks(items, count):
+    size = max(math.ceil(len(items) / count), 1)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_backtest(symbols, methods=METHODS, lookback=90, horizon=7, step=5, workers=None,
+                 store_dir=None):
+    """Evaluate the statistical methods over all walk-forward windows; returns the report"""
+    workers = workers or os.cpu_count() or 1
+    store_dir = store_dir or candle_store.STORE_DIR
+    started = time.perf_counter()
+    # a few chunks per worker keeps the pool busy when symbols differ in length
+    chunks = _chunks(list(symbols), workers * 4)
+    args = [(chunk, store_dir, lookback, horizon, step, methods) for chunk in chunks]
+    if workers == 1:
+        results = [evaluate_chunk(*a) for a in args]
+    else:
+        # spawn, as in pdf_generator: safe next to threads in the parent
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(evaluate_chunk, *zip(*args)))
+    results = [r for r in results if r]
+    wall = time.perf_counter() - started
+
+    report = {"symbols": len(symbols), "lookback": lookback, "horizon": horizon, "step": step,
+              "workers": workers, "wall_seconds": wall, "methods": {}}
+    if not results:
+        report["windows"] = 0
+        return report
+    last = np.concatenate([r["last"] for r in results])
+    actual = np.concatenate([r["actual"] for r in results])
+    report["windows"] = int(len(actual))
+    report["windows_per_second"] = len(actual) * len(methods) / wall
+    for method in methods:
+        predicted, lower, upper = (np.concatenate([r["forecasts"][method][i] for r in results])
+                                   for i in range(3))
+        stats = score(last, actual, predicted, lower, upper,
+                      forecasting.confidence_levels(predicted, lower, upper))
+        stats["compute_seconds"] = sum(r["seconds"][method] for r in results)
+        report["methods"][method] = stats
+    return report
+
+
+def sample_windows(symbols, count, lookback, horizon, step, store_dir=None, seed=0):
+    """Random (symbol, inputs, target) walk-forward windows, for predictors that can't batch"""
+    pool = []
+    for symbol in symbols:
+        close = np.asarray(candle_store.load(symbol, store_dir)["c"], dtype=float)
+        inputs, targets = walk_forward(close, lookback, horizon, step)
+        pool.extend((symbol, x, y) for x, y in zip(inputs, targets))
+    return random.Random(seed).sample(pool, min(count, len(pool)))
+
+
+def evaluate_llm(samples, workers=4):
+    """
+    Score price_predictor's LLM path on sampled windows (neutral news sentiment).
+    Windows where the predictor fell back to a statistical forecast (LLM
+    error or unparseable reply; the fallback sets "method") count as invalid.
+    """
+    import rate_limiter
+    from agents import price_predictor, sentiment
+
+    neutral = sentiment.analyze([])
+
+    def predict(sample):
+        symbol, inputs, _ = sample
+        with rate_limiter.priority(rate_limiter.BATCH):
+            prediction = price_predictor.predict_future_price(
+                {"close": inputs.tolist()}, neutral, symbol, mode="llm")
+        if "method" in prediction:
+            return math.nan, "low"
+        try:
+            return float(prediction["predicted_price"]), prediction.get("confidence", "low")
+        except (KeyError, TypeError, ValueError):
+            return math.nan, "low"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        predictions = list(executor.map(predict, samples))
+    wall = time.perf_counter() - started
+
+    predicted = np.array([p for p, _ in predictions])
+    confidence = np.array([str(c).lower() for _, c in predictions])
+    valid = ~np.isnan(predicted)
+    last = np.array([s[1][-1] for s in samples])[valid]
+    actual = np.array([s[2] for s in samples])[valid]
+    stats = score(last, actual, predicted[valid], confidence=confidence[valid])
+    stats.update(invalid=int((~valid).sum()), compute_seconds=wall,
+                 windows_per_second=len(samples) / wall if wall else None)
+    return stats
+
+
+def ensure_history(symbols, days, workers=4):
+    """Fill the candle store with `days` of history per symbol through the retriever"""
+    import rate_limiter
+    from agents import price_retriever
+
+    def fetch(symbol):
+        with rate_limiter.priority(rate_limiter.BATCH):
+            return symbol, "error" not in price_retriever.get_historical_data(symbol, days=days)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        failed = [s for s, ok in executor.map(fetch, symbols) if not ok]
+    if failed:
+        print(f"[Backtest] No history for {', '.join(failed)}", file=sys.stderr)
+
+
+def print_report(report):
+    print(f"\n{report['windows']} windows from {report['symbols']} symbols "
+          f"(lookback {report['lookback']}, horizon {report['horizon']}, step {report['step']}) "
+          f"in {report['wall_seconds']:.2f}s on {report['workers']} workers"
+          + (f" -> {report['windows_per_second']:,.0f} windows/s" if report.get("windows_per_second") else ""))
+
+    def pct(value):
+        return f"{value * 100:>8.1f}%" if value is not None else f"{'-':>9}"
+
+    print(f"{'method':<16}{'conf':<8}{'windows':>9}{'MAE':>10}{'MAPE':>9}{'dir acc':>9}{'cover':>9}")
+    for method, stats in report["methods"].items():
+        rows = [("all", stats)] + list(stats.get("by_confidence", {}).items())
+        for level, row in rows:
+            if not row.get("windows"):
+                continue
+            print(f"{method if level == 'all' else '':<16}{level:<8}{row['windows']:>9}"
+                  f"{row['mae']:>10.2f}{row['mape_pct']:>8.2f}%{pct(row['directional_accuracy'])}"
+                  f"{pct(row.get('interval_coverage'))}")
+    invalid = report["methods"].get("llm", {}).get("invalid")
+    if invalid:
+        print(f"llm: {invalid} windows without a usable LLM prediction (errors or fallbacks), excluded")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the price predictors.")
+    parser.add_argument("symbols", nargs="*", help="tickers (default: every symbol in the candle store)")
+    parser.add_argument("-w", "--watchlist", help="file with tickers, as for batch_runner")
+    parser.add_argument("--methods", default=",".join(METHODS),
+                        help="comma-separated methods (default: %(default)s)")
+    parser.add_argument("--lookback", type=int, default=90, help="closes given to the model")
+    parser.add_argument("--horizon", type=int, default=7, help="bars ahead to predict")
+    parser.add_argument("--step", type=int, default=5, help="bars between window origins")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument("--fetch", type=int, metavar="DAYS",
+                        help="first fetch DAYS of history per symbol into the candle store")
+    parser.add_argument("--llm-windows", type=int, default=0,
+                        help="also score the LLM predictor on this many sampled windows")
+    parser.add_argument("--mock-llm", action="store_true",
+                        help="answer LLM calls from the local mock provider (no API key needed)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    methods = tuple(m.strip() for m in args.methods.split(",") if m.strip())
+    unknown = set(methods) - set(METHODS)
+    if unknown:
+        parser.error(f"unknown methods: {', '.join(sorted(unknown))}")
+    if args.lookback < MIN_LOOKBACK:
+        parser.error(f"--lookback must be at least {MIN_LOOKBACK}")
+
+    symbols = [s.upper() for s in args.symbols]
+    if args.watchlist:
+        from batch_runner import read_watchlist
+        symbols += read_watchlist(args.watchlist)
+    symbols = list(dict.fromkeys(symbols)) or candle_store.stored_symbols()
+    if not symbols:
+        parser.error("no symbols given and the candle store is empty")
+    if args.fetch:
+        ensure_history(symbols, args.fetch)
+
+    report = run_backtest(symbols, methods, args.lookback, args.horizon, args.step, args.workers)
+
+    if args.llm_windows:
+        if args.horizon != 7:
+            print("[Backtest] The LLM prompt asks for a 7-day forecast; --horizon differs",
+                  file=sys.stderr)
+        server = None
+        if args.mock_llm:
+            from benchmarks.mock_servers import MockProviderServer
+            server = MockProviderServer().start()
+            os.environ.setdefault("GROQ_API_KEY", "mock")
+            import groq_client
+            import llm_cache
+            # keep mock answers out of the real LLM cache
+            llm_cache.ENABLED = False
+            groq_client.GROQ_API_URL = f"{server.base_url}/openai/v1/chat/completions"
+        try:
+            samples = sample_windows(symbols, args.llm_windows, args.lookback, args.horizon,
+                                     args.step)
+            report["methods"]["llm"] = evaluate_llm(samples)
+        finally:
+            if server:
+                server.stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Headless batch runner: analyze a watchlist without the Streamlit UI.
+
+    python batch_runner.py watchlist.txt -o results.jsonl --workers 4 \
+        --rate-limit finnhub=60 --rate-limit groq=30
+
+The watchlist has one or more tickers per line (comma or whitespace
+separated, '#' starts a comment). Each ticker runs the same pipeline as the
+app (fetch, analysts, predictor, advice) and its result is appended to the
+output as one JSON line as soon as it finishes. With --resume, tickers that
+already have a successful record in the output are skipped, so an
+interrupted run can be continued (tickers whose record has an error, or a
+stage that returned an LLM error message, are retried). An existing output
+file is never overwritten without --force.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import pipeline
+import rate_limiter
+from agents import news_analyst, price_retriever
+
+# Stage results copied into each record
+RESULT_FIELDS = ("sentiment", "news_summary", "price_summary", "summary", "prediction", "advice")
+QUOTE_FIELDS = ("current_price", "previous_close", "open_price", "high_price", "low_price")
+# Text a stage returns in place of a result when its LLM call failed (see groq_client)
+_STAGE_ERROR_RE = re.compile(r"^\s*Error\b|\nError: ")
+
+
+def read_watchlist(path):
+    """Tickers in file order, uppercased and de-duplicated"""
+    tickers = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            tickers.extend(t.strip().upper() for t in line.replace(",", " ").split())
+    return list(dict.fromkeys(t for t in tickers if t))
+
+
+def stage_errors(record):
+    """Result fields of a record that hold an error message instead of a result"""
+    return [k for k in RESULT_FIELDS
+            if isinstance(record.get(k), str) and _STAGE_ERROR_RE.search(record[k])]
+
+
+def completed_tickers(path):
+    """Tickers with a successful record (no error, no failed stage) in an existing output file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line from an interrupted write
+            if "error" not in record and not stage_errors(record) and record.get("ticker"):
+                done.add(record["ticker"])
+    return done
+
+
+def analyze(ticker, days=90, prediction_mode=None, fused=False):
+    """Run the full pipeline for one ticker and return its JSON record"""
+    started = time.time()
+    record = {"ticker": ticker}
+    try:
+        # interactive app queries go ahead of batch work at the rate limiter
+        with rate_limiter.priority(rate_limiter.BATCH):
+            data = pipeline.fetch_ticker_data(ticker, days=days)
+            price_data = data["price_data"]
+            if "error" in price_data:
+                record["error"] = price_data["error"]
+            else:
+                record["quote"] = {k: price_data[k] for k in QUOTE_FIELDS}
+                results = {}
+                for event, stage, value in pipeline.run_analysis(
+                    ticker, **data, prediction_mode=prediction_mode, fused=fused
+                ):
+                    if event == "done":
+                        results[stage] = value
+                record.update({k: results.get(k) for k in RESULT_FIELDS})
+                failed = stage_errors(record)
+                if failed:
+                    record["error"] = f"stages failed: {', '.join(failed)}"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["elapsed_seconds"] = round(time.time() - started, 2)
+    record["completed_at"] = datetime.now(timezone.utc).isoformat()
+    return record
+
+
+def run_batch(tickers, output, workers=4, days=90, prediction_mode=None, fused=False):
+    """
+    Analyze tickers on a bounded worker pool, appending each record to the
+    output file as it completes. Returns (succeeded, failed) counts.
+    """
+    succeeded = failed = 0
+    with rate_limiter.priority(rate_limiter.BATCH):
+        # one bulk history download for the watchlist instead of one per ticker;
+        # each analysis then finds its candles fresh in the store
+        price_retriever.get_historical_data_many(tickers, days=days)
+    with open(output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(analyze, ticker, days, prediction_mode, fused): ticker
+            for ticker in tickers
+        }
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                out.write(json.dumps(record, default=str) + "\n")
+                out.flush()
+                if "error" in record:
+                    failed += 1
+                else:
+                    succeeded += 1
+                print(f"[Batch] {succeeded + failed}/{len(tickers)} {record['ticker']} "
+                      f"{'failed: ' + record['error'] if 'error' in record else 'done'} "
+                      f"({record['elapsed_seconds']}s)", file=sys.stderr)
+        except KeyboardInterrupt:
+            print("[Batch] Interrupted; rerun with --resume to continue", file=sys.stderr)
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return succeeded, failed
+
+
+def _rate_limit(value):
+    provider, sep, per_minute = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected PROVIDER=REQUESTS_PER_MINUTE")
+    try:
+        return provider.strip().lower(), float(per_minute)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate {per_minute!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the StockWise pipeline over a watchlist.")
+    parser.add_argument("watchlist", help="file with tickers (comma/whitespace separated)")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl",
+                        help="JSON Lines output file (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="tickers analyzed concurrently (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=90, help="days of price history")
+    parser.add_argument("--prediction-mode", choices=("llm", "drift", "ets", "ar"),
+                        help="prediction engine (default: PREDICTION_MODE env or llm)")
+    parser.add_argument("--fused", action="store_true",
+                        help="single structured LLM call per ticker")
+    parser.add_argument("--news-mode", choices=("llm", "lexicon"),
+                        help="news summary from the LLM or the local sentiment scorer "
+                             "(default: NEWS_ANALYSIS_MODE env or llm)")
+    parser.add_argument("--rate-limit", type=_rate_limit, action="append", default=[],
+                        metavar="PROVIDER=RPM",
+                        help="requests per minute for groq, newsapi, finnhub or yahoo "
+                             "(0 = unlimited)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip tickers already completed in the output file")
+    parser.add_argument("--force", action="store_true",
+                        help="overwrite an existing output file")
+    args = parser.parse_args(argv)
+
+    for provider, per_minute in args.rate_limit:
+        rate_limiter.configure(provider, per_minute)
+    if args.news_mode:
+        news_analyst.NEWS_ANALYSIS_MODE = args.news_mode
+
+    tickers = read_watchlist(args.watchlist)
+    if args.resume:
+        done = completed_tickers(args.output)
+        tickers = [t for t in tickers if t not in done]
+        print(f"[Batch] Resuming: {len(done)} already done, {len(tickers)} to go", file=sys.stderr)
+    elif os.path.exists(args.output) and os.path.getsize(args.output):
+        if not args.force:
+            print(f"[Batch] {args.output} already has results; use --resume to continue "
+                  "or --force to overwrite", file=sys.stderr)
+            return 2
+        open(args.output, "w").close()
+
+    if not tickers:
+        print("[Batch] Nothing to do", file=sys.stderr)
+        return 0
+
+    started = time.time()
+    succeeded, failed = run_batch(tickers, args.output, args.workers, args.days,
+                                  args.prediction_mode, args.fused)
+    print(f"[Batch] {succeeded} succeeded, {failed} failed in {time.time() - started:.1f}s "
+          f"-> {args.output}", file=sys.stderr)
+    return 1 if failed and not succeeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
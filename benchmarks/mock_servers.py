@@ -0,0 +1,239 @@
+"""
+Local stand-ins for the provider APIs used by the pipeline.
+
+One threaded HTTP server answers, by path:
+- POST /openai/v1/chat/completions  Groq chat completions (plain and SSE streaming)
+- GET  /v2/everything               NewsAPI articles
+- GET  /api/v1/quote                Finnhub quote
+- GET  /api/v1/stock/candle         Finnhub daily candles
+
+Each provider has its own latency, jitter and error rate; injected errors
+are 503 responses, which the shared HTTP client retries like real ones.
+Responses are synthetic but deterministic per symbol.
+"""
+import bisect
+import functools
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+DAY = 86400
+ORIGIN = 1_500_000_000 - 1_500_000_000 % DAY
+LOREM = ("Revenue growth remained solid while margins held steady. Analysts point to "
+         "strong demand, a healthy balance sheet and continued investment in new "
+         "products, though valuation and macro risks deserve attention.")
+HEADLINE_WORDS = ("shares", "rally", "slide", "earnings", "beat", "miss", "guidance", "raises",
+                  "cuts", "analysts", "upgrade", "downgrade", "record", "quarter", "outlook",
+                  "deal", "lawsuit", "launch", "demand", "supply", "chips", "cloud", "margin",
+                  "buyback", "dividend", "regulators", "probe", "expands", "layoffs", "forecast")
+NEWS_SOURCES = ("Mock Wire", "Daily Ticker", "Market Watchers", "Finance Today")
+STORY_SECONDS = 600  # a new story every 10 minutes; every 4th is a reprint
+
+
+def _articles(symbol, page_size, since=None):
+    """Newest-first synthetic articles, optionally only those published since `since`"""
+    newest = int(time.time()) // STORY_SECONDS * STORY_SECONDS
+    articles = []
+    for i in range(page_size):
+        ts = newest - i * STORY_SECONDS
+        if since is not None and ts < since:
+            break
+        slot = ts // STORY_SECONDS
+        story = slot - 1 if slot % 4 == 0 else slot  # syndicated copy of the previous story
+        rng = random.Random(f"{symbol}:{story}")
+        title = f"{symbol} {' '.join(rng.sample(HEADLINE_WORDS, 8))}"
+        articles.append({
+            "title": title if story == slot else title + " - report",
+            "source": {"name": NEWS_SOURCES[slot % len(NEWS_SOURCES)]},
+            "url": f"https://news.example/{symbol}/{slot}",
+            "publishedAt": datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+    return articles
+
+
+@dataclass
+class ProviderConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    stream_chunk_ms: float = 0.0  # delay between streamed chunks (groq)
+
+    def delay(self):
+        return max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode("utf-8"))
+
+
+@functools.lru_cache(maxsize=1024)
+def _full_path(symbol, last_day):
+    """Deterministic daily random walk for symbol, from a fixed origin to last_day"""
+    rng = np.random.default_rng(_seed(symbol))
+    t = np.arange(ORIGIN, last_day + 1, DAY)
+    close = rng.uniform(20, 500) * np.cumprod(1 + rng.normal(0.0004, 0.015, len(t)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, len(t))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, len(t))))
+    volume = rng.integers(1_000_000, 50_000_000, len(t))
+    return {"t": t.tolist(), "o": open_.round(4).tolist(), "h": high.round(4).tolist(),
+            "l": low.round(4).tolist(), "c": close.round(4).tolist(), "v": volume.tolist()}
+
+
+def _price_path(symbol, start, end):
+    """Bars of the symbol's walk between two unix timestamps (overlapping requests agree)"""
+    bars = _full_path(symbol, end - end % DAY)
+    lo, hi = bisect.bisect_left(bars["t"], start), bisect.bisect_right(bars["t"], end)
+    return {key: values[lo:hi] for key, values in bars.items()}
+
+
+def _chat_reply(body):
+    """Plausible reply for each agent's prompt"""
+    messages = body.get("messages", [])
+    system = messages[0]["content"] if messages else ""
+    prompt = messages[-1]["content"] if messages else ""
+
+    if "ticker extraction" in system:
+        query = prompt.rsplit("Query:", 1)[-1].split("\n", 1)[0]
+        symbols = re.findall(r"\b[A-Z]{2,5}\b", query) or ["AAPL"]
+        return json.dumps(symbols[:3])
+    if '"news_analysis"' in prompt:
+        return json.dumps({
+            "news_analysis": "Sentiment is mildly positive. " + LOREM,
+            "summary": "## Summary\n" + LOREM,
+            "prediction": {"predicted_price": 123.45, "confidence": "medium",
+                           "reasoning": "Momentum and neutral news."},
+            "advice": "**Hold.** " + LOREM,
+        })
+    if "predicted_price" in prompt:
+        match = re.search(r"Current Price: \$([\d.]+)", prompt)
+        current = float(match.group(1)) if match else 100.0
+        return json.dumps({"predicted_price": round(current * 1.01, 2), "confidence": "medium",
+                           "reasoning": "Stable trend with neutral news flow."})
+    return LOREM + " " + LOREM
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _simulate(self, provider):
+        """Apply the provider's latency; returns False if an error was injected"""
+        config = self.server.providers[provider]
+        self.server.record(provider)
+        time.sleep(config.delay())
+        if random.random() < config.error_rate:
+            self._send_json({"error": "injected failure"}, status=503)
+            return False
+        return True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = re.sub(r"/+", "/", url.path)  # finnhub joins its base URL and paths with '/'
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if path == "/v2/everything":
+            if self._simulate("newsapi"):
+                since = query.get("from")
+                if since:
+                    since = datetime.fromisoformat(since.replace("Z", "+00:00")).timestamp()
+                self._send_json({"status": "ok", "articles": _articles(
+                    query.get("q", ""), int(query.get("pageSize", 5)), since)})
+        elif path == "/api/v1/quote":
+            if self._simulate("finnhub"):
+                now = int(time.time())
+                bars = _price_path(query.get("symbol", "X"), now - 5 * 86400, now)
+                self._send_json({"c": bars["c"][-1], "h": bars["h"][-1], "l": bars["l"][-1],
+                                 "o": bars["o"][-1], "pc": bars["c"][-2], "t": now})
+        elif path == "/api/v1/stock/candle":
+            if self._simulate("finnhub"):
+                bars = _price_path(query.get("symbol", "X"), int(query["from"]), int(query["to"]))
+                self._send_json({"s": "ok" if bars["t"] else "no_data", **bars})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if urlsplit(self.path).path != "/openai/v1/chat/completions":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        if not self._simulate("groq"):
+            return
+
+        reply = _chat_reply(body)
+        usage = {"prompt_tokens": len(json.dumps(body.get("messages"))) // 4,
+                 "completion_tokens": len(reply) // 4}
+        if not body.get("stream"):
+            self._send_json({"choices": [{"message": {"role": "assistant", "content": reply}}],
+                             "usage": usage})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        delay = self.server.providers["groq"].stream_chunk_ms / 1000
+        words = reply.split(" ")
+        for i in range(0, len(words), 4):
+            text = " ".join(words[i:i + 4]) + " "
+            chunk = {"choices": [{"delta": {"content": text}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(delay)
+        final = {"choices": [{"delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.close_connection = True
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """Mock Groq/NewsAPI/Finnhub server on localhost; run with start()/stop()"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, providers=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.providers = {name: ProviderConfig() for name in ("groq", "newsapi", "finnhub")}
+        self.providers.update(providers or {})
+        self.requests = {name: 0 for name in self.providers}
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, provider):
+        with self._counter_lock:
+            self.requests[provider] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
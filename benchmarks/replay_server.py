@@ -0,0 +1,203 @@
+"""
+Local stand-in for Finnhub's trade websocket.
+
+    python -m benchmarks.replay_server --port 8765 --rate 5
+    QUOTE_STREAM_URL=ws://127.0.0.1:8765 streamlit run app.py
+
+Clients send {"type": "subscribe", "symbol": ...} like they would to
+wss://ws.finnhub.io and receive {"type": "trade", "data": [...]} messages
+for their symbols. Trades are synthetic, a random walk from the symbol's
+last close on the mock REST server, or replayed from a recorded feed
+(--file, one raw Finnhub message per line) with its original timing.
+
+Implements just enough of RFC 6455 for that: the opening handshake,
+unfragmented text frames, ping/pong and close.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from benchmarks.mock_servers import _price_path
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+
+
+def _read_exact(rfile, n):
+    data = rfile.read(n)
+    if len(data) < n:
+        raise ConnectionError("client went away")
+    return data
+
+
+def read_frame(rfile):
+    """(opcode, payload) of the next client frame (clients always mask)"""
+    first, second = _read_exact(rfile, 2)
+    opcode, length = first & 0x0F, second & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", _read_exact(rfile, 2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", _read_exact(rfile, 8))[0]
+    mask = _read_exact(rfile, 4) if second & 0x80 else b"\0\0\0\0"
+    payload = _read_exact(rfile, length)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def encode_frame(payload, opcode=OP_TEXT):
+    """One unmasked, final server frame"""
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack(">H", len(payload))
+    else:
+        header += bytes([127]) + struct.pack(">Q", len(payload))
+    return header + payload
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handshake(self):
+        self.rfile.readline()  # GET /?token=... HTTP/1.1
+        headers = {}
+        for line in iter(self.rfile.readline, b"\r\n"):
+            if not line:
+                raise ConnectionError("client went away")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(
+            hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()
+        ).decode()
+        self.wfile.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                          f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+    def send(self, payload, opcode=OP_TEXT):
+        with self.write_lock:
+            self.wfile.write(encode_frame(payload, opcode))
+
+    def handle(self):
+        self.write_lock = threading.Lock()
+        self.symbols = set()
+        self.closed = threading.Event()
+        try:
+            self.handshake()
+        except (ConnectionError, KeyError):
+            return
+        threading.Thread(target=self.server.feed, args=(self,), daemon=True).start()
+        try:
+            while True:
+                opcode, payload = read_frame(self.rfile)
+                if opcode == OP_CLOSE:
+                    self.send(payload[:2], OP_CLOSE)
+                    break
+                if opcode == OP_PING:
+                    self.send(payload, OP_PONG)
+                elif opcode == OP_TEXT:
+                    message = json.loads(payload)
+                    if message.get("type") == "subscribe":
+                        self.symbols.add(message["symbol"])
+                    elif message.get("type") == "unsubscribe":
+                        self.symbols.discard(message["symbol"])
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.closed.set()
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """Trade websocket on localhost; run with start()/stop()"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, rate=5.0, replay_file=None, speed=1.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.rate = rate
+        self.speed = speed
+        self.recorded = None
+        if replay_file:
+            with open(replay_file, encoding="utf-8") as f:
+                self.recorded = [json.loads(line) for line in f if line.strip()]
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def feed(self, client):
+        """Send trades for the client's symbols until it disconnects"""
+        try:
+            if self.recorded:
+                self._replay(client)
+            else:
+                self._synthetic(client)
+        except OSError:
+            pass
+
+    def _synthetic(self, client):
+        prices = {}
+        while not client.closed.wait(1 / self.rate):
+            now = time.time()
+            data = []
+            for symbol in list(client.symbols):
+                if symbol not in prices:
+                    bars = _price_path(symbol, int(now) - 5 * 86400, int(now))
+                    prices[symbol] = bars["c"][-1] if bars["c"] else 100.0
+                prices[symbol] = round(prices[symbol] * (1 + random.gauss(0, 0.0005)), 4)
+                data.append({"s": symbol, "p": prices[symbol], "t": int(now * 1000),
+                             "v": random.randint(1, 500), "c": None})
+            if data:
+                client.send(json.dumps({"type": "trade", "data": data}).encode())
+
+    def _replay(self, client):
+        """Recorded messages in a loop, paced by their trade timestamps and shifted to now"""
+        while not client.closed.is_set():
+            start, first = time.time(), None
+            for message in self.recorded:
+                trades = message.get("data") or []
+                if message.get("type") != "trade" or not trades:
+                    continue
+                first = first or trades[0]["t"]
+                due = start + (trades[0]["t"] - first) / 1000 / self.speed
+                if client.closed.wait(max(due - time.time(), 0)):
+                    return
+                offset = int(time.time() * 1000) - trades[0]["t"]
+                data = [dict(t, t=t["t"] + offset) for t in trades if t["s"] in client.symbols]
+                if data:
+                    client.send(json.dumps({"type": "trade", "data": data}).encode())
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a Finnhub-style trade websocket locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rate", type=float, default=5.0,
+                        help="synthetic trade messages per second (default: %(default)s)")
+    parser.add_argument("--file", help="recorded feed to replay instead (JSON message per line)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier")
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(args.port, args.rate, args.file, args.speed)
+    print(f"[Replay] Serving trades on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+End-to-end pipeline benchmark against local mock providers.
+
+    python -m benchmarks.run_benchmark --queries 20 --concurrency 1,4,8 \
+        --latency groq=300 --latency finnhub=80 --error-rate groq=0.02
+
+For each concurrency level, the queries run through ticker extraction,
+the retrievers, the analysis stages (the real pipeline DAG), the price
+predictor and PDF generation. The report shows per-stage and total
+latency percentiles, throughput (queries/s) and peak traced memory.
+
+The LLM, quote and news caches are disabled and each level starts with
+empty candle and news stores, so every level does the same provider work.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.mock_servers import MockProviderServer, ProviderConfig
+
+DEFAULT_QUERIES = [
+    "How is Apple doing?",
+    "Compare Tesla and Microsoft",
+    "What's going on with NVDA stock?",
+    "Should I buy Amazon?",
+    "Outlook for ZZQX and Google",  # unknown symbol -> LLM extraction
+]
+PERCENTILES = (50, 90, 99)
+
+
+class Recorder:
+    """Thread-safe collection of durations per stage"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def timed(self, stage, func, stream=False):
+        """Wrap func so each call (and a stream's full consumption) is recorded"""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            if not stream:
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+
+            def consume():
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    self.add(stage, time.perf_counter() - start)
+            return consume()
+        return wrapper
+
+    def summary(self):
+        return {
+            stage: {"count": len(values),
+                    **{f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}}
+            for stage, values in self.samples.items()
+        }
+
+
+def setup_environment(base_url, workdir):
+    """
+    Point every provider client at the mock server. Must run before the
+    app modules are imported: they read cache settings at import.
+    """
+    for name in ("GROQ_API_KEY", "NEWS_API_KEY", "FINNHUB_API_KEY"):
+        os.environ[name] = "bench"
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["QUOTE_CACHE_SECONDS"] = "0"
+    os.environ["QUOTE_CLOSED_CACHE_SECONDS"] = "0"
+    os.environ["NEWS_CACHE_SECONDS"] = "0"
+    os.environ["CANDLE_STORE_DIR"] = os.path.join(workdir, "candles")
+    os.environ["NEWS_STORE_DIR"] = os.path.join(workdir, "news")
+    # the yfinance fallback would go to the live internet
+    sys.modules["yfinance"] = None
+
+    import groq_client
+    from agents import news_retriever, price_retriever
+    groq_client.GROQ_API_URL = f"{base_url}/openai/v1/chat/completions"
+    news_retriever.NEWS_API_URL = f"{base_url}/v2/everything"
+    price_retriever.get_finnhub_client().API_URL = f"{base_url}/api/v1"
+
+
+_originals = {}
+
+
+def instrument(recorder):
+    """
+    Record the retrievers through their module attributes (looked up per call
+    by the pipeline) and return timed copies of the analysis stages.
+    """
+    import pipeline
+    from agents import news_retriever, price_retriever
+
+    targets = [("fetch_news", news_retriever, "get_news_for_ticker"),
+               ("fetch_quote", price_retriever, "get_price_data"),
+               ("fetch_history", price_retriever, "get_historical_data")]
+    for stage, module, name in targets:
+        original = _originals.setdefault((module, name), getattr(module, name))
+        setattr(module, name, recorder.timed(stage, original))
+    return [pipeline.Stage(s.name, recorder.timed(s.name, s.func, s.stream), s.inputs, s.stream)
+            for s in pipeline.ANALYSIS_STAGES]
+
+
+def run_query(query, recorder, stages, days):
+    import pipeline
+    import pdf_generator
+    from agents import ticker_extractor
+
+    start = time.perf_counter()
+    tickers = recorder.timed("extract", ticker_extractor.extract_tickers)(query)
+    for ticker, data in pipeline.fetch_all(tickers, days=days):
+        price_data = data["price_data"]
+        if "error" in price_data:
+            continue
+        results = {stage: value for event, stage, value
+                   in pipeline.run_analysis(ticker, **data, stages=stages) if event == "done"}
+        recorder.timed("pdf", pdf_generator.create_stock_report)(
+            ticker=ticker,
+            price_data=price_data,
+            prediction=results["prediction"] or {
+                "predicted_price": price_data["current_price"], "confidence": "low",
+                "reasoning": "Insufficient historical data"},
+            news_analysis=results["news_summary"],
+            price_analysis=results["price_summary"],
+        )
+    recorder.add("total", time.perf_counter() - start)
+
+
+def run_level(queries, concurrency, days, workdir):
+    """Run all queries with `concurrency` in flight; returns the level's report"""
+    import candle_store
+    import news_store
+
+    candle_store.STORE_DIR = tempfile.mkdtemp(prefix=f"candles_c{concurrency}_", dir=workdir)
+    news_store.STORE_DIR = tempfile.mkdtemp(prefix=f"news_c{concurrency}_", dir=workdir)
+    recorder = Recorder()
+    stages = instrument(recorder)
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda q: run_query(q, recorder, stages, days), queries))
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+
+    return {
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "wall_seconds": wall,
+        "throughput_qps": len(queries) / wall,
+        "peak_traced_mb": peak / 2 ** 20,
+        "stages": recorder.summary(),
+    }
+
+
+def print_report(report):
+    print(f"\n== concurrency {report['concurrency']}: {report['queries']} queries in "
+          f"{report['wall_seconds']:.2f}s -> {report['throughput_qps']:.2f} q/s, "
+          f"peak traced memory {report['peak_traced_mb']:.1f} MB")
+    header = f"{'stage':<16}{'count':>7}" + "".join(f"{'p' + str(p) + ' ms':>11}" for p in PERCENTILES)
+    print(header)
+    for stage, stats in sorted(report["stages"].items(), key=lambda kv: kv[0] == "total"):
+        print(f"{stage:<16}{stats['count']:>7}"
+              + "".join(f"{stats[f'p{p}'] * 1000:>11.1f}" for p in PERCENTILES))
+
+
+def _provider_value(value):
+    provider, sep, number = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected PROVIDER=VALUE")
+    return provider.strip().lower(), float(number)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against mock providers.")
+    parser.add_argument("--queries", type=int, default=10, help="queries per concurrency level")
+    parser.add_argument("--concurrency", default="1,4",
+                        help="comma-separated concurrency levels (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=90, help="days of price history")
+    parser.add_argument("--latency", type=_provider_value, action="append", default=[],
+                        metavar="PROVIDER=MS", help="mean response latency per provider")
+    parser.add_argument("--jitter", type=_provider_value, action="append", default=[],
+                        metavar="PROVIDER=MS", help="uniform latency jitter per provider")
+    parser.add_argument("--error-rate", type=_provider_value, action="append", default=[],
+                        metavar="PROVIDER=P", help="fraction of requests answered with 503")
+    parser.add_argument("--stream-chunk-ms", type=float, default=5.0,
+                        help="delay between streamed LLM chunks")
+    parser.add_argument("--warmup", type=int, default=2, help="unrecorded warm-up queries")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    providers = {name: ProviderConfig(stream_chunk_ms=args.stream_chunk_ms if name == "groq" else 0)
+                 for name in ("groq", "newsapi", "finnhub")}
+    for option, field in ((args.latency, "latency_ms"), (args.jitter, "jitter_ms"),
+                          (args.error_rate, "error_rate")):
+        for provider, value in option:
+            if provider not in providers:
+                parser.error(f"unknown provider {provider!r}")
+            setattr(providers[provider], field, value)
+
+    server = MockProviderServer(providers=providers).start()
+    workdir = tempfile.mkdtemp(prefix="stockwise_bench_")
+    setup_environment(server.base_url, workdir)
+
+    queries = [DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)] for i in range(args.queries)]
+    reports = []
+    tracemalloc.start()
+    try:
+        # first-use costs (imports, connections, fonts) stay out of the numbers
+        run_level(DEFAULT_QUERIES[:args.warmup], 1, args.days, workdir)
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            report = run_level(queries, concurrency, args.days, workdir)
+            reports.append(report)
+            print_report(report)
+    finally:
+        tracemalloc.stop()
+        server.stop()
+
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nprovider requests: {server.requests}, max RSS {max_rss_mb:.0f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"levels": reports, "provider_requests": server.requests,
+                       "max_rss_mb": max_rss_mb}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Incremental on-disk store of daily OHLCV candles.
+
+Each symbol is kept as one NumPy structured array (<SYMBOL>.npy, opened
+memory-mapped) plus a small JSON sidecar recording which range has been
+fetched and when. Retrievers only download the missing head/tail of a
+window; any `days` window is then answered by slicing the stored array.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+import store_util
+
+STORE_DIR = os.getenv(
+    "CANDLE_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "stockwise", "candles")
+)
+# How long the stored tail is trusted before the latest bars are re-fetched
+REFRESH_SECONDS = int(os.getenv("CANDLE_REFRESH_SECONDS", str(15 * 60)))
+# A window may start this far before the fetched range without refetching
+# the head (weekends and holidays have no bars to fill it)
+HEAD_SLACK_SECONDS = 5 * 24 * 3600
+DAY_SECONDS = 24 * 3600
+
+CANDLE_DTYPE = np.dtype([
+    ("t", "i8"), ("o", "f8"), ("h", "f8"), ("l", "f8"), ("c", "f8"), ("v", "f8")
+])
+# retriever dict key -> array field
+FIELDS = {
+    "timestamps": "t", "open": "o", "high": "h", "low": "l", "close": "c", "volume": "v"
+}
+
+_locks = store_util.SymbolLocks()
+
+
+def symbol_lock(symbol):
+    """Lock held while a symbol's candles are read, extended and saved"""
+    return _locks.get(symbol)
+
+
+def _paths(symbol, store_dir=None):
+    store_dir = store_dir or STORE_DIR
+    return (store_util.symbol_path(store_dir, symbol, ".npy"),
+            store_util.symbol_path(store_dir, symbol, ".json"))
+
+
+def empty():
+    return np.empty(0, dtype=CANDLE_DTYPE)
+
+
+def load(symbol, store_dir=None):
+    """Stored candles sorted by timestamp (memory-mapped, read-only)"""
+    data_path, _ = _paths(symbol, store_dir)
+    try:
+        return np.load(data_path, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return empty()
+
+
+def stored_symbols(store_dir=None):
+    """Symbols with stored candles (file names as sanitized by _paths)"""
+    try:
+        names = os.listdir(store_dir or STORE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-4] for name in names if name.endswith(".npy"))
+
+
+def load_meta(symbol, store_dir=None):
+    """{'covered_from': ts, 'fetched_at': ts} or {} when nothing is stored"""
+    _, meta_path = _paths(symbol, store_dir)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save(symbol, candles, meta, store_dir=None):
+    """Atomically replace the stored candles and metadata"""
+    data_path, meta_path = _paths(symbol, store_dir)
+    candles = np.ascontiguousarray(candles, dtype=CANDLE_DTYPE)
+    store_util.atomic_write(data_path, lambda f: np.save(f, candles), mode="wb")
+    store_util.atomic_write(meta_path, lambda f: json.dump(meta, f))
+
+
+def from_dict(data):
+    """
+    Build a candle array from the retriever's dict-of-lists format.
+    Timestamps are snapped to UTC midnight so the same session reported by
+    different providers (Finnhub: 00:00 UTC, Yahoo: exchange-local midnight)
+    lands on one bar.
+    """
+    candles = np.empty(len(data.get("timestamps", [])), dtype=CANDLE_DTYPE)
+    for key, field in FIELDS.items():
+        candles[field] = data[key]
+    candles["t"] -= candles["t"] % DAY_SECONDS
+    return candles
+
+
+def to_dict(candles):
+    """Convert a candle array back into the retriever's dict-of-lists format"""
+    return {key: candles[field].tolist() for key, field in FIELDS.items()}
+
+
+def merge(stored, fresh):
+    """Union of two candle arrays; bars in `fresh` win on equal timestamps"""
+    if len(stored) == 0:
+        combined = np.asarray(fresh, dtype=CANDLE_DTYPE)
+    elif len(fresh) == 0:
+        return stored
+    else:
+        combined = np.concatenate([np.asarray(fresh), np.asarray(stored)])
+    # np.unique keeps the first occurrence, which is the fresh bar
+    _, first = np.unique(combined["t"], return_index=True)
+    return combined[first]
+
+
+def window(candles, start_time, end_time=None):
+    """Slice of candles with start_time <= t <= end_time (binary search)"""
+    lo = np.searchsorted(candles["t"], start_time, side="left")
+    hi = len(candles) if end_time is None else np.searchsorted(candles["t"], end_time, side="right")
+    return candles[lo:hi]
+
+
+def missing_ranges(meta, candles, start_time, end_time, now=None, max_age=REFRESH_SECONDS):
+    """
+    The (start, end) ranges that still need downloading for a window:
+    the head before what has ever been fetched, and a tail older than
+    max_age seconds (0 always refreshes it).
+    """
+    now = now or time.time()
+    if not meta or len(candles) == 0:
+        return [(start_time, end_time)]
+
+    ranges = []
+    covered_from = meta.get("covered_from", int(candles["t"][0]))
+    if start_time < covered_from - HEAD_SLACK_SECONDS:
+        ranges.append((start_time, covered_from))
+    if now - meta.get("fetched_at", 0) >= max_age:
+        # Re-fetch from the last stored bar: it may still have been forming
+        ranges.append((int(candles["t"][-1]), end_time))
+    return ranges
@@ -0,0 +1,229 @@
+"""
+Chart data for long price histories.
+
+Plotly sends every point to the browser, so long histories are reduced to
+the chart's pixel budget first: candles are aggregated into OHLC buckets
+(open first, high max, low min, close last, volume summed) and indicator
+lines are downsampled with LTTB. Line traces switch to WebGL (Scattergl)
+above WEBGL_THRESHOLD points.
+"""
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+CHART_WIDTH_PX = int(os.getenv("CHART_WIDTH_PX", "1200"))
+PX_PER_CANDLE = 3  # narrower candles are unreadable
+WEBGL_THRESHOLD = int(os.getenv("CHART_WEBGL_THRESHOLD", "1000"))
+
+UP_COLOR = '#26a69a'
+DOWN_COLOR = '#ef5350'
+OVERLAYS = [
+    ('sma_20', 'SMA 20', dict(color='#ff9800', width=1.5)),
+    ('sma_50', 'SMA 50', dict(color='#3f51b5', width=1.5)),
+    ('bb_upper', 'Bollinger Upper', dict(color='rgba(120,120,120,0.6)', width=1, dash='dot')),
+    ('bb_lower', 'Bollinger Lower', dict(color='rgba(120,120,120,0.6)', width=1, dash='dot')),
+]
+
+
+def to_datetimes(timestamps):
+    """Unix seconds -> datetime64 array (UTC), without a per-element Python loop"""
+    return np.asarray(timestamps, dtype=np.int64).astype("datetime64[s]")
+
+
+def ohlc_buckets(historical_data, max_candles):
+    """
+    Aggregate bars into at most max_candles OHLC buckets.
+    Returns a dict of arrays with the same keys as the candle dict.
+    """
+    timestamps = np.asarray(historical_data['timestamps'], dtype=np.int64)
+    bars = {k: np.asarray(historical_data[k], dtype=float)
+            for k in ('open', 'high', 'low', 'close', 'volume')}
+    n = len(timestamps)
+    if n <= max_candles:
+        return {'timestamps': timestamps, **bars}
+
+    starts = np.arange(max_candles) * n // max_candles
+    ends = np.append(starts[1:], n) - 1
+    return {
+        'timestamps': timestamps[starts],
+        'open': bars['open'][starts],
+        'high': np.fmax.reduceat(bars['high'], starts),
+        'low': np.fmin.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(np.nan_to_num(bars['volume']), starts),
+    }
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points that keep the
+    visual shape of the line (first and last points always kept).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n_out - 2 buckets between the first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # bucket means from prefix sums
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    mean_x = np.append((cx[edges[1:]] - cx[edges[:-1]]) / counts, x[-1])
+    mean_y = np.append((cy[edges[1:]] - cy[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # triangle formed with the last selected point and the next bucket's mean
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a])
+                      - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_line(timestamps, values, max_points):
+    """Drop NaN points (indicator warm-up) and LTTB-downsample the rest"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    timestamps, values = timestamps[valid], values[valid]
+    idx = lttb(timestamps, values, max_points)
+    return timestamps[idx], values[idx]
+
+
+def line_trace(x, y, **kwargs):
+    """Scatter trace, WebGL-backed when it has many points"""
+    trace = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=x, y=y, mode='lines', **kwargs)
+
+
+def with_live_candle(historical_data, candle):
+    """
+    historical_data with the streaming candle (see quote_stream) merged into
+    its last bar, or appended when it starts a newer one. The input is not
+    modified; only the list heads are copied.
+    """
+    timestamps = historical_data['timestamps']
+    if not candle or not timestamps or candle['t'] < timestamps[-1]:
+        return historical_data
+    merged = {key: list(historical_data[key]) for key in
+              ('timestamps', 'open', 'high', 'low', 'close', 'volume')}
+    if candle['t'] == timestamps[-1]:
+        merged['high'][-1] = max(merged['high'][-1], candle['high'])
+        merged['low'][-1] = min(merged['low'][-1], candle['low'])
+        merged['close'][-1] = candle['close']
+        merged['volume'][-1] = max(merged['volume'][-1], candle['volume'])
+    else:
+        merged['timestamps'].append(candle['t'])
+        for key in ('open', 'high', 'low', 'close', 'volume'):
+            merged[key].append(candle[key])
+    return merged
+
+
+def price_chart(ticker, historical_data, indicators=None, width_px=CHART_WIDTH_PX):
+    """
+    Candlestick + volume figure with indicator overlays, reduced to the
+    pixel budget of a width_px wide chart.
+    indicators: {name: array aligned with the bars} (see price_analyst)
+    """
+    candles = ohlc_buckets(historical_data, max(width_px // PX_PER_CANDLE, 1))
+    dates = to_datetimes(candles['timestamps'])
+
+    # Create subplots: Candlestick + Volume
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=(f'{ticker} Price Movement', 'Trading Volume'),
+        row_heights=[0.7, 0.3]
+    )
+
+    fig.add_trace(
+        go.Candlestick(
+            x=dates,
+            open=candles['open'],
+            high=candles['high'],
+            low=candles['low'],
+            close=candles['close'],
+            name='OHLC',
+            increasing_line_color=UP_COLOR,
+            decreasing_line_color=DOWN_COLOR,
+            increasing_fillcolor=UP_COLOR,
+            decreasing_fillcolor=DOWN_COLOR
+        ),
+        row=1, col=1
+    )
+
+    # Overlays are computed on the full history, then downsampled; they may
+    # end one bar early when a live candle has been appended
+    for name, label, style in OVERLAYS:
+        if indicators is None or name not in indicators:
+            continue
+        values = indicators[name]
+        x, y = downsample_line(historical_data['timestamps'][:len(values)], values, width_px)
+        if len(y):
+            fig.add_trace(line_trace(to_datetimes(x), y, name=label, line=style), row=1, col=1)
+
+    # Volume bars colored by the bucket's direction
+    colors = np.where(candles['close'] >= candles['open'], UP_COLOR, DOWN_COLOR)
+    fig.add_trace(
+        go.Bar(
+            x=dates,
+            y=candles['volume'],
+            name='Volume',
+            marker_color=colors,
+            showlegend=False,
+            opacity=0.7
+        ),
+        row=2, col=1
+    )
+
+    fig.update_layout(
+        height=700,
+        xaxis_rangeslider_visible=False,
+        hovermode='x unified',
+        template='plotly_white',
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    fig.update_yaxes(title_text="Price ($)", row=1, col=1)
+    fig.update_yaxes(title_text="Volume", row=2, col=1)
+    fig.update_xaxes(title_text="Date", row=2, col=1)
+    return fig
+
+
+def quote_chart(ticker, price_data):
+    """Line through the quote's previous close, open, high, low and current price"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=["Previous Close", "Open", "High", "Low", "Current"],
+        y=price_data["historical"],
+        mode='lines+markers',
+        line=dict(color='royalblue', width=3),
+        marker=dict(size=10, color='royalblue'),
+        name='Price'
+    ))
+
+    fig.update_layout(
+        title=f"{ticker} Price Overview",
+        xaxis_title="Price Points",
+        yaxis_title="Price ($)",
+        template="plotly_white",
+        height=400
+    )
+    return fig
@@ -0,0 +1,62 @@
+"""
+API keys and other secrets, looked up on first use.
+
+Each name is resolved, in order, from the environment, a .env file
+(python-dotenv; DOTENV_PATH or the nearest .env from the working directory)
+and Streamlit secrets (.streamlit/secrets.toml). Nothing is read at import
+time, so workers, CLIs and tests can import the agents without keys, and
+only the call that needs a missing key fails.
+"""
+import os
+import threading
+
+_lock = threading.Lock()
+_dotenv_loaded = False
+_values = {}
+
+
+class MissingSecret(KeyError):
+    """A required secret is not set in the environment, .env or Streamlit secrets"""
+
+    def __str__(self):
+        return f"{self.args[0]} is not configured (set it in the environment, .env or secrets.toml)"
+
+
+def _load_dotenv():
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import find_dotenv, load_dotenv
+    except ImportError:
+        return
+    # existing environment variables win over the file
+    load_dotenv(os.getenv("DOTENV_PATH") or find_dotenv(usecwd=True))
+
+
+def _streamlit_secret(name):
+    try:
+        import streamlit as st
+        return st.secrets[name]
+    except Exception:
+        # no streamlit, no secrets file, or no such key
+        return None
+
+
+def get_secret(name, default=None, required=True):
+    """
+    The value of secret `name`. Raises MissingSecret when it isn't set
+    anywhere, unless required=False (then `default` is returned).
+    """
+    with _lock:
+        if name in _values:
+            return _values[name]
+        _load_dotenv()
+        value = os.getenv(name) or _streamlit_secret(name)
+        if value:
+            _values[name] = value
+            return value
+    if required:
+        raise MissingSecret(name)
+    return default
@@ -1,44 +1,194 @@
 
 
-# GROQ_API_KEY = ""
-
-
+import hashlib
+import json
 
 import requests
-import streamlit as st
+
+import config
+import http_client
+import llm_cache
+import prompt_budget
+import rate_limiter
+import tracing
 
 
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
 
-try:
-    GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
-    print(f"[DEBUG] API Key loaded: {GROQ_API_KEY[:10]}...")  # First 10 chars only
-except Exception as e:
-    print(f"[ERROR] Failed to load secrets: {e}")
-    GROQ_API_KEY = None
 
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-def chat_with_groq(messages, model="llama-3.3-70b-versatile"):
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
+def _headers():
+    """Request headers; raises config.MissingSecret without GROQ_API_KEY"""
+    return {
+        "Authorization": f"Bearer {config.get_secret('GROQ_API_KEY')}",
         "Content-Type": "application/json"
     }
+
+
+def _apply_budget(messages, agent, max_tokens):
+    """Trim the prompt to the agent's input budget; returns (messages, max_tokens, input_tokens)"""
+    budget = prompt_budget.budget_for(agent)
+    messages = prompt_budget.fit_messages(messages, budget["input"])
+    return messages, max_tokens or budget["output"], prompt_budget.count_message_tokens(messages)
+
+
+def _log_usage(agent, model, input_tokens, usage=None, output_text=""):
+    """Token counts per call: the API's usage report when present, else our own count"""
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens", input_tokens)
+    completion_tokens = usage.get("completion_tokens", prompt_budget.count_tokens(output_text))
+    print(f"[Groq Usage] agent={agent or '-'} model={model} "
+          f"input_tokens={prompt_tokens} output_tokens={completion_tokens}")
+    tracing.annotate(input_tokens=prompt_tokens, output_tokens=completion_tokens)
+
+
+def _cached_reply(model, messages, temperature):
+    """
+    Look the request up in the LLM cache; returns (cache_key, cached reply or None).
+    cache_key is None when the cache is disabled.
+    """
+    if not llm_cache.ENABLED:
+        return None, None
+    cache_key = llm_cache.make_key(model, messages, temperature)
+    if llm_cache.bypassed():
+        tracing.annotate(cache="bypass")
+        return cache_key, None
+    cached = llm_cache.get_cache().get(cache_key)
+    tracing.annotate(cache="miss" if cached is None else "hit")
+    return cache_key, cached
+
+
+@tracing.traced("llm", provider="groq")
+def chat_with_groq(messages, model="llama-3.3-70b-versatile", temperature=0.4, agent=None,
+                   max_tokens=None, response_format=None):
+    """
+    Send a chat completion request, serving repeats from the LLM cache.
+    `agent` names the caller and selects the cache freshness window and the
+    token budget (prompt trimmed to fit, output capped unless max_tokens given).
+    `response_format` is passed through, e.g. {"type": "json_object"}.
+    """
+    messages, max_tokens, input_tokens = _apply_budget(messages, agent, max_tokens)
+    tracing.annotate(agent=agent or "-", model=model)
+
+    cache_key, cached = _cached_reply(model, messages, temperature)
+    if cached is not None:
+        return cached
+
     data = {
         "model": model,
         "messages": messages,
-        "temperature": 0.4
+        "temperature": temperature,
+        "max_tokens": max_tokens
     }
+    if response_format:
+        data["response_format"] = response_format
     
-    response = requests.post(GROQ_API_URL, headers=headers, json=data)
-    
+    # Identical requests already in flight (e.g. two sessions asking about
+    # the same ticker) share a single API call
+    flight_key = ("groq", hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest())
+    return rate_limiter.single_flight(flight_key, _complete, data, agent, input_tokens, cache_key)
+
+
+def _complete(data, agent, input_tokens, cache_key=None):
+    """POST one chat completion; returns its content, or an "Error: ..." string"""
+    model = data["model"]
+    try:
+        response = http_client.get_session().post(GROQ_API_URL, headers=_headers(), json=data)
+    except config.MissingSecret as e:
+        print("[Groq API Error]", e)
+        tracing.annotate(status="error", error=type(e).__name__)
+        return f"Error: {e}."
+    except requests.exceptions.RequestException as e:
+        print("[Groq API Request Failed]", e)
+        tracing.annotate(status="error", error=type(e).__name__)
+        return "Error: Groq API request failed."
+
+    tracing.annotate(bytes=len(response.content), status_code=response.status_code)
     try:
         res_json = response.json()
         if "choices" in res_json:
-            return res_json["choices"][0]["message"]["content"]
+            content = res_json["choices"][0]["message"]["content"]
+            _log_usage(agent, model, input_tokens, res_json.get("usage"), content)
+            if cache_key:
+                llm_cache.get_cache().set(cache_key, content, llm_cache.ttl_for(agent))
+            return content
         else:
             print("[Groq API Error] No 'choices' in response:", res_json)
             return "Error: Groq API did not return expected response."
     except Exception as e:
         print("[Groq API Exception]", e)
         return "Error: Failed to parse Groq response."
+
+
+@tracing.traced("llm", provider="groq", stream=True)
+def chat_with_groq_stream(messages, model="llama-3.3-70b-versatile", temperature=0.4, agent=None,
+                          max_tokens=None):
+    """
+    Streaming variant of chat_with_groq: yields content deltas as the API
+    sends them (server-sent events). Cache hits are yielded in one piece,
+    and the full text is cached once the stream completes.
+    """
+    messages, max_tokens, input_tokens = _apply_budget(messages, agent, max_tokens)
+    tracing.annotate(agent=agent or "-", model=model)
+
+    cache_key, cached = _cached_reply(model, messages, temperature)
+    if cached is not None:
+        yield cached
+        return
+
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+
+    try:
+        response = http_client.get_session().post(
+            GROQ_API_URL, headers=_headers(), json=data, stream=True
+        )
+    except config.MissingSecret as e:
+        print("[Groq API Error]", e)
+        tracing.annotate(status="error", error=type(e).__name__)
+        yield f"Error: {e}."
+        return
+    except requests.exceptions.RequestException as e:
+        print("[Groq API Request Failed]", e)
+        tracing.annotate(status="error", error=type(e).__name__)
+        yield "Error: Groq API request failed."
+        return
+
+    if not response.ok:
+        print("[Groq API Error] Stream request failed:", response.status_code, response.text[:500])
+        yield "Error: Groq API did not return expected response."
+        return
+
+    parts = []
+    usage = None
+    received = 0
+    try:
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                received += len(line or "") + 1
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                chunk = json.loads(payload)
+                # Groq reports token usage on the final chunk
+                usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    parts.append(delta)
+                    yield delta
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print("[Groq API Stream Exception]", e)
+        yield "\n\nError: Groq stream was interrupted."
+        return
+
+    tracing.annotate(bytes=received)
+    _log_usage(agent, model, input_tokens, usage, "".join(parts))
+    if cache_key and parts:
+        llm_cache.get_cache().set(cache_key, "".join(parts), llm_cache.ttl_for(agent))
@@ -0,0 +1,136 @@
+"""
+Shared HTTP transport for every provider call (Groq, NewsAPI, Finnhub).
+
+One pooled keep-alive session is reused across calls so each request doesn't
+pay a fresh TCP+TLS handshake. Every request gets a default timeout, and
+429/5xx responses and connection failures are retried with jittered
+exponential backoff that honours the server's Retry-After header. Every
+attempt, retries included, is paced by the per-provider rate limits in
+rate_limiter, and no retry is started past HTTP_RETRY_DEADLINE. Read
+timeouts are not retried (a slow LLM completion would just time out again),
+nor is a connection lost after the request was sent.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError, MaxRetryError
+from urllib3.util.retry import Retry
+
+import rate_limiter
+
+# Tunables (override through environment variables)
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "4"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+# No retry is started (backoff included) later than this after the first attempt
+RETRY_DEADLINE = float(os.getenv("HTTP_RETRY_DEADLINE", "60"))
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "8"))  # number of hosts kept pooled
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # open connections per host
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout when the caller gives none,
+    and retries here rather than inside urllib3 so that every attempt waits
+    for the provider's rate limit
+    """
+
+    def __init__(self, timeout=None, retry=None, **kwargs):
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.retry = retry or build_retry()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        retry = self.retry
+        deadline = time.monotonic() + RETRY_DEADLINE
+        while True:
+            rate_limiter.acquire_for_url(request.url)
+            try:
+                response = super().send(request, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # classify by urllib3's error: a failed connect (nothing sent) is
+                # retried for any method, a connection lost mid-request is a read error
+                reason = e.args[0] if e.args else e
+                if isinstance(reason, MaxRetryError):
+                    reason = reason.reason
+                try:
+                    retry = retry.increment(request.method, request.url, error=reason)
+                except HTTPError:
+                    raise e
+                delay = retry.get_backoff_time()
+                if time.monotonic() + delay > deadline:
+                    raise
+                time.sleep(delay)
+                continue
+
+            if not retry.is_retry(request.method, response.status_code,
+                                  "Retry-After" in response.headers):
+                return response
+            try:
+                retry = retry.increment(request.method, request.url, response=response.raw)
+            except MaxRetryError:
+                return response
+            delay = retry.get_retry_after(response.raw) or retry.get_backoff_time()
+            if time.monotonic() + delay > deadline:
+                return response
+            response.close()
+            time.sleep(delay)
+
+
+def build_retry():
+    """
+    Retry policy: exponential backoff with jitter, Retry-After respected.
+    POST is included because the Groq chat endpoint is safe to repeat.
+    """
+    return Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        backoff_max=BACKOFF_MAX,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def configure_session(session):
+    """
+    Mount the pooled, retrying adapters on an existing session.
+    Used for our own session and for third-party clients that own one (finnhub).
+    """
+    # urllib3 itself makes a single attempt; TimeoutHTTPAdapter.send retries
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = configure_session(requests.Session())
+    return _session
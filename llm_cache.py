@@ -0,0 +1,202 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed on a hash of (model, messages, temperature) and kept in two
+tiers: an in-process LRU for the hot set and a SQLite file shared by every
+process on the machine. Each agent gets its own freshness window.
+Inside `with llm_cache.bypass():` cached responses are ignored (fresh ones
+are still stored), e.g. when the user asks to refresh an analysis.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "stockwise", "llm_cache.sqlite3")
+)
+MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+DISK_SIZE = int(os.getenv("LLM_CACHE_DISK_SIZE", "20000"))
+EVICT_EVERY = 100  # writes between disk eviction passes
+
+# Seconds a response stays fresh, per calling agent
+CACHE_TTLS = {
+    "ticker_extractor": 3 * 24 * 3600,  # company -> symbol mapping barely changes
+    "news_analyst": 10 * 60,
+    "financial_reporter": 10 * 60,
+    "price_predictor": 10 * 60,
+    "final_answer": 10 * 60,
+    "fused_analyst": 10 * 60,
+}
+DEFAULT_TTL = 5 * 60
+
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+def ttl_for(agent):
+    """Freshness window in seconds for responses requested by an agent"""
+    return CACHE_TTLS.get(agent, DEFAULT_TTL)
+
+
+def make_key(model, messages, temperature):
+    """Stable hash of everything that determines the completion"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier (memory LRU + SQLite) TTL cache with hit/miss counters"""
+
+    def __init__(self, path=CACHE_PATH, memory_size=MEMORY_SIZE, disk_size=DISK_SIZE):
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._db = self._open_db(path) if path else None
+
+    @staticmethod
+    def _open_db(path):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            print(f"[LLM Cache] Disk tier disabled ({path}): {e}")
+            return None
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached response or None when missing/expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                        (key, now)
+                    ).fetchone()
+                    if row:
+                        self._db.execute(
+                            "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                        )
+                        self._db.commit()
+                        self._remember(key, row[0], row[1])
+                        self._counters["disk_hits"] += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    print(f"[LLM Cache] Read failed: {e}")
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, value, ttl):
+        """Store a response in both tiers for ttl seconds"""
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self._counters["writes"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+                if self._counters["writes"] % EVICT_EVERY == 0:
+                    self._evict(now)
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"[LLM Cache] Write failed: {e}")
+
+    def _evict(self, now):
+        """Drop expired rows, then least recently used rows beyond disk_size"""
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_size,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache instance, created on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+
+def cache_stats():
+    return get_cache().stats()
+
+
+@contextmanager
+def bypass(active=True):
+    """Skip cached responses for the LLM calls in the block (when active)"""
+    token = _bypass.set(active)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def bypassed():
+    return _bypass.get()
@@ -0,0 +1,18 @@
+"""
+Regular US equity session (9:30-16:00 New York time on weekdays).
+Exchange holidays and early closes are not modeled.
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+
+def market_open(now=None):
+    """True during the regular US equity session"""
+    now = (now or datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
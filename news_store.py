@@ -0,0 +1,146 @@
+"""
+Incremental on-disk store of news articles per ticker.
+
+Each symbol is kept as one JSON file holding its most recent distinct
+stories, the URLs already seen and the newest `publishedAt`, so the
+retriever only asks NewsAPI for articles published since the last fetch.
+
+Syndicated copies of the same wire story (same headline with small edits,
+republished by other outlets) are collapsed with MinHash over character
+shingles of the normalized headline: a new article whose estimated Jaccard
+similarity to a stored story reaches DUPLICATE_THRESHOLD only increments
+that story's reprint count. Stores are bounded (MAX_ARTICLES), so each new
+signature is compared against all stored ones in one vectorized step.
+"""
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+import store_util
+
+STORE_DIR = os.getenv(
+    "NEWS_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "stockwise", "news")
+)
+# Distinct stories kept per symbol
+MAX_ARTICLES = int(os.getenv("NEWS_STORE_MAX_ARTICLES", "200"))
+# Estimated Jaccard similarity at which two headlines are the same story
+DUPLICATE_THRESHOLD = float(os.getenv("NEWS_DUPLICATE_THRESHOLD", "0.6"))
+
+SHINGLE_SIZE = 5
+NUM_HASHES = 64
+_PRIME = 4294967311  # smallest prime above 2**32
+_rng = np.random.default_rng(20240501)
+# a, b < 2**31 keep a * crc32 + b below 2**64
+_A = _rng.integers(1, 2 ** 31, NUM_HASHES, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 31, NUM_HASHES, dtype=np.uint64)
+
+_locks = store_util.SymbolLocks()
+
+
+def symbol_lock(symbol):
+    """Lock held while a symbol's stored news is fetched, merged and saved"""
+    return _locks.get(symbol)
+
+
+def _path(symbol, store_dir=None):
+    return store_util.symbol_path(store_dir or STORE_DIR, symbol, ".json")
+
+
+def load(symbol, store_dir=None):
+    """The stored state for symbol, or {} when nothing is stored"""
+    try:
+        with open(_path(symbol, store_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save(symbol, state, store_dir=None):
+    """Atomically replace the stored state"""
+    store_util.atomic_write(_path(symbol, store_dir), lambda f: json.dump(state, f))
+
+
+def normalize_title(title, source=None):
+    """Lowercased headline without punctuation or a trailing ' - Source' suffix"""
+    if source and title.endswith(f" - {source}"):
+        title = title[:-len(source) - 3]
+    return " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+
+
+def signature(title, source=None):
+    """MinHash signature (NUM_HASHES uint64 values) of the headline's character shingles"""
+    text = normalize_title(title, source)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def similarity(signatures, sig):
+    """Estimated Jaccard similarity of sig to each row of signatures"""
+    return (signatures == sig).mean(axis=1)
+
+
+def merge(state, articles):
+    """
+    Add NewsAPI articles to state in place: unseen URLs only, near-duplicates
+    folded into the stored story. Returns the number of new distinct stories.
+    """
+    stored = state.setdefault("articles", [])
+    seen_urls = list(state.get("seen_urls", []))
+    seen = set(seen_urls)
+    signatures = [signature(a["title"], a["source"]) for a in stored]
+
+    added = 0
+    fresh = [a for a in articles
+             if a.get("title") and a["title"] != "[Removed]"
+             and (a.get("url") or a["title"]) not in seen]
+    for article in sorted(fresh, key=lambda a: a.get("publishedAt") or ""):
+        url = article.get("url") or article["title"]
+        if url in seen:
+            continue  # the same URL twice in one response
+        seen.add(url)
+        seen_urls.append(url)
+        source = (article.get("source") or {}).get("name") or "Unknown"
+        sig = signature(article["title"], source)
+        if signatures:
+            scores = similarity(np.stack(signatures), sig)
+            best = int(scores.argmax())
+            if scores[best] >= DUPLICATE_THRESHOLD:
+                stored[best]["reprints"] = stored[best].get("reprints", 0) + 1
+                continue
+        stored.append({
+            "title": article["title"],
+            "source": source,
+            "url": url,
+            "published_at": article.get("publishedAt") or "",
+        })
+        signatures.append(sig)
+        added += 1
+
+    stored.sort(key=lambda a: a["published_at"], reverse=True)
+    del stored[MAX_ARTICLES:]
+    published = [a["publishedAt"] for a in fresh if a.get("publishedAt")]
+    if published:
+        state["latest"] = max(published + [state.get("latest", "")])
+    # remembered URLs cover reprints as well, so bound them more loosely
+    state["seen_urls"] = seen_urls[-MAX_ARTICLES * 4:]
+    return added
+
+
+def headlines(state, limit):
+    """The newest `limit` distinct stories as 'Title - Source' lines"""
+    lines = []
+    for article in state.get("articles", [])[:limit]:
+        line = f"{article['title']} - {article['source']}"
+        if article.get("reprints"):
+            line += f" (+{article['reprints']} similar)"
+        lines.append(line)
+    return lines
@@ -1,19 +1,54 @@
-from fpdf import FPDF
 from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import multiprocessing
+import os
 import re
+import threading
 
-class StockReportPDF(FPDF):
-    def header(self):
-        """Automatic header for all pages"""
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, 'StockWise AI - Stock Analysis Report', 0, 0, 'R')
-        self.ln(15)
-    
-    def footer(self):
-        """Automatic footer for all pages"""
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+import tracing
+
+# Rendering runs in worker processes (fpdf layout is CPU-bound and holds the GIL)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+# Finished reports kept in memory, keyed by a hash of their inputs
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "64"))
+
+_pool = None
+_cache = OrderedDict()  # key -> pdf bytes
+_pending = {}  # key -> Future still rendering
+_lock = threading.RLock()
+
+_report_class = None
+
+
+def new_report_pdf():
+    """
+    A new report document. fpdf takes ~0.4s to import, so it is loaded
+    (and the report class defined) on first use, in the rendering process.
+    """
+    global _report_class
+    if _report_class is None:
+        from fpdf import FPDF
+
+        class StockReportPDF(FPDF):
+            def header(self):
+                """Automatic header for all pages"""
+                self.set_font('Arial', 'I', 8)
+                self.cell(0, 10, 'StockWise AI - Stock Analysis Report', 0, 0, 'R')
+                self.ln(15)
+
+            def footer(self):
+                """Automatic footer for all pages"""
+                self.set_y(-15)
+                self.set_font('Arial', 'I', 8)
+                self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+        _report_class = StockReportPDF
+    return _report_class()
 
 
 def sanitize_text(text):
@@ -36,173 +71,180 @@ def sanitize_text(text):
     return sanitized.strip()
 
 
-def create_stock_report(ticker, price_data, prediction, news_analysis, price_analysis):
+def _write_report(pdf, ticker, price_data, prediction, news_analysis, price_analysis):
     """
-    Create a professional PDF stock analysis report
+    Add one ticker's report pages to pdf
     """
-    try:
-        pdf = StockReportPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        
-        # Sanitize all text inputs
-        ticker = sanitize_text(ticker)
-        news_analysis = sanitize_text(news_analysis)
-        price_analysis = sanitize_text(price_analysis)
-        prediction_reasoning = sanitize_text(prediction.get('reasoning', ''))
-        
-        # Title
-        pdf.set_font('Arial', 'B', 24)
-        pdf.cell(0, 15, f'{ticker} Stock Analysis Report', ln=True, align='C')
-        
-        # Date
-        pdf.set_font('Arial', 'I', 10)
-        pdf.cell(0, 8, f'Generated: {datetime.now().strftime("%B %d, %Y at %I:%M %p")}', 
-                 ln=True, align='C')
-        pdf.ln(10)
-        
-        # Executive Summary Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'EXECUTIVE SUMMARY', ln=True)
-        pdf.set_draw_color(0, 0, 0)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
-        # Current Price Metrics Table
-        pdf.set_font('Arial', 'B', 11)
-        pdf.cell(0, 8, 'Current Price Information:', ln=True)
-        pdf.ln(2)
-        
-        pdf.set_font('Arial', '', 10)
-        
-        # Create price metrics table
-        col_width = 90
-        row_height = 7
-        
-        metrics = [
-            ('Current Price:', f"${price_data['current_price']:.2f}"),
-            ('Previous Close:', f"${price_data['previous_close']:.2f}"),
-            ('Day High:', f"${price_data['high_price']:.2f}"),
-            ('Day Low:', f"${price_data['low_price']:.2f}"),
-            ('Opening Price:', f"${price_data['open_price']:.2f}"),
-        ]
-        
-        for label, value in metrics:
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(col_width, row_height, label, border=1)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(col_width, row_height, value, border=1, ln=True)
-        
-        pdf.ln(8)
-        
-        # Price Prediction Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, '7-DAY PRICE PREDICTION', ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
-        current_price = price_data['current_price']
-        predicted_price = prediction['predicted_price']
-        price_change = predicted_price - current_price
-        pct_change = (price_change / current_price) * 100
-        
-        prediction_metrics = [
-            ('Predicted Price (7 days):', f"${predicted_price:.2f}"),
-            ('Current Price:', f"${current_price:.2f}"),
-            ('Expected Change:', f"${price_change:+.2f} ({pct_change:+.2f}%)"),
-            ('Confidence Level:', sanitize_text(prediction['confidence'].upper())),
-        ]
-        
-        pdf.set_font('Arial', '', 10)
-        for label, value in prediction_metrics:
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(col_width, row_height, label, border=1)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(col_width, row_height, str(value), border=1, ln=True)
-        
-        pdf.ln(5)
-        
-        # Prediction Reasoning
+    pdf.add_page()
+    
+    # Sanitize all text inputs
+    ticker = sanitize_text(ticker)
+    news_analysis = sanitize_text(news_analysis)
+    price_analysis = sanitize_text(price_analysis)
+    prediction_reasoning = sanitize_text(prediction.get('reasoning', ''))
+    
+    # Title
+    pdf.set_font('Arial', 'B', 24)
+    pdf.cell(0, 15, f'{ticker} Stock Analysis Report', ln=True, align='C')
+    
+    # Date
+    pdf.set_font('Arial', 'I', 10)
+    pdf.cell(0, 8, f'Generated: {datetime.now().strftime("%B %d, %Y at %I:%M %p")}', 
+             ln=True, align='C')
+    pdf.ln(10)
+    
+    # Executive Summary Section
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'EXECUTIVE SUMMARY', ln=True)
+    pdf.set_draw_color(0, 0, 0)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    
+    # Current Price Metrics Table
+    pdf.set_font('Arial', 'B', 11)
+    pdf.cell(0, 8, 'Current Price Information:', ln=True)
+    pdf.ln(2)
+    
+    pdf.set_font('Arial', '', 10)
+    
+    # Create price metrics table
+    col_width = 90
+    row_height = 7
+    
+    metrics = [
+        ('Current Price:', f"${price_data['current_price']:.2f}"),
+        ('Previous Close:', f"${price_data['previous_close']:.2f}"),
+        ('Day High:', f"${price_data['high_price']:.2f}"),
+        ('Day Low:', f"${price_data['low_price']:.2f}"),
+        ('Opening Price:', f"${price_data['open_price']:.2f}"),
+    ]
+    
+    for label, value in metrics:
         pdf.set_font('Arial', 'B', 10)
-        pdf.cell(0, 7, 'Prediction Analysis:', ln=True)
-        pdf.set_font('Arial', '', 10)
-        
-        # Truncate and sanitize reasoning
-        reasoning_text = prediction_reasoning[:400] if len(prediction_reasoning) > 400 else prediction_reasoning
-        if reasoning_text:
-            pdf.multi_cell(0, 5, reasoning_text)
-        else:
-            pdf.multi_cell(0, 5, 'Analysis based on historical trends and current market conditions.')
-        pdf.ln(5)
-        
-        # News & Sentiment Analysis
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'NEWS & SENTIMENT ANALYSIS', ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
+        pdf.cell(col_width, row_height, label, border=1)
         pdf.set_font('Arial', '', 10)
-        # Truncate if too long
-        news_text = news_analysis[:800] if len(news_analysis) > 800 else news_analysis
-        if news_text:
-            pdf.multi_cell(0, 5, news_text)
-        else:
-            pdf.multi_cell(0, 5, 'Market sentiment analysis based on recent news and reports.')
-        pdf.ln(5)
-        
-        # Price Trend Analysis
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, 'TECHNICAL PRICE ANALYSIS', ln=True)
-        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-        pdf.ln(5)
-        
-        pdf.set_font('Arial', '', 10)
-        price_text = price_analysis[:600] if len(price_analysis) > 600 else price_analysis
-        if price_text:
-            pdf.multi_cell(0, 5, price_text)
-        else:
-            pdf.multi_cell(0, 5, 'Technical analysis based on historical price movements and trading patterns.')
-        pdf.ln(8)
-        
-        # Investment Recommendation Box
-        pdf.set_fill_color(240, 240, 240)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 10, 'INVESTMENT SUMMARY', ln=True, fill=True, align='C')
-        pdf.ln(3)
-        
-        pdf.set_font('Arial', '', 10)
-        
-        # Determine recommendation based on prediction
-        if pct_change > 5:
-            recommendation = "POSITIVE OUTLOOK - Consider buying for potential gains"
-        elif pct_change < -5:
-            recommendation = "CAUTIOUS OUTLOOK - Monitor closely before investing"
-        else:
-            recommendation = "NEUTRAL OUTLOOK - Hold current positions"
-        
-        pdf.multi_cell(0, 5, recommendation, align='C')
-        pdf.ln(10)
-        
-        # Disclaimer
-        pdf.set_fill_color(255, 240, 240)
+        pdf.cell(col_width, row_height, value, border=1, ln=True)
+    
+    pdf.ln(8)
+    
+    # Price Prediction Section
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, '7-DAY PRICE PREDICTION', ln=True)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    
+    current_price = price_data['current_price']
+    predicted_price = prediction['predicted_price']
+    price_change = predicted_price - current_price
+    pct_change = (price_change / current_price) * 100
+    
+    prediction_metrics = [
+        ('Predicted Price (7 days):', f"${predicted_price:.2f}"),
+        ('Current Price:', f"${current_price:.2f}"),
+        ('Expected Change:', f"${price_change:+.2f} ({pct_change:+.2f}%)"),
+        ('Confidence Level:', sanitize_text(prediction['confidence'].upper())),
+    ]
+    
+    pdf.set_font('Arial', '', 10)
+    for label, value in prediction_metrics:
         pdf.set_font('Arial', 'B', 10)
-        pdf.cell(0, 8, 'IMPORTANT DISCLAIMER', ln=True, fill=True, align='C')
-        pdf.ln(2)
-        
-        pdf.set_font('Arial', '', 8)
-        disclaimer = """This report is for informational purposes only and should not be considered financial advice. 
+        pdf.cell(col_width, row_height, label, border=1)
+        pdf.set_font('Arial', '', 10)
+        pdf.cell(col_width, row_height, str(value), border=1, ln=True)
+    
+    pdf.ln(5)
+    
+    # Prediction Reasoning
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(0, 7, 'Prediction Analysis:', ln=True)
+    pdf.set_font('Arial', '', 10)
+    
+    # Truncate and sanitize reasoning
+    reasoning_text = prediction_reasoning[:400] if len(prediction_reasoning) > 400 else prediction_reasoning
+    if reasoning_text:
+        pdf.multi_cell(0, 5, reasoning_text)
+    else:
+        pdf.multi_cell(0, 5, 'Analysis based on historical trends and current market conditions.')
+    pdf.ln(5)
+    
+    # News & Sentiment Analysis
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'NEWS & SENTIMENT ANALYSIS', ln=True)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    
+    pdf.set_font('Arial', '', 10)
+    # Truncate if too long
+    news_text = news_analysis[:800] if len(news_analysis) > 800 else news_analysis
+    if news_text:
+        pdf.multi_cell(0, 5, news_text)
+    else:
+        pdf.multi_cell(0, 5, 'Market sentiment analysis based on recent news and reports.')
+    pdf.ln(5)
+    
+    # Price Trend Analysis
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'TECHNICAL PRICE ANALYSIS', ln=True)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+    
+    pdf.set_font('Arial', '', 10)
+    price_text = price_analysis[:600] if len(price_analysis) > 600 else price_analysis
+    if price_text:
+        pdf.multi_cell(0, 5, price_text)
+    else:
+        pdf.multi_cell(0, 5, 'Technical analysis based on historical price movements and trading patterns.')
+    pdf.ln(8)
+    
+    # Investment Recommendation Box
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, 'INVESTMENT SUMMARY', ln=True, fill=True, align='C')
+    pdf.ln(3)
+    
+    pdf.set_font('Arial', '', 10)
+    
+    # Determine recommendation based on prediction
+    if pct_change > 5:
+        recommendation = "POSITIVE OUTLOOK - Consider buying for potential gains"
+    elif pct_change < -5:
+        recommendation = "CAUTIOUS OUTLOOK - Monitor closely before investing"
+    else:
+        recommendation = "NEUTRAL OUTLOOK - Hold current positions"
+    
+    pdf.multi_cell(0, 5, recommendation, align='C')
+    pdf.ln(10)
+    
+    # Disclaimer
+    pdf.set_fill_color(255, 240, 240)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(0, 8, 'IMPORTANT DISCLAIMER', ln=True, fill=True, align='C')
+    pdf.ln(2)
+    
+    pdf.set_font('Arial', '', 8)
+    disclaimer = """This report is for informational purposes only and should not be considered financial advice. 
 The predictions and analysis contained herein are based on historical data, current market sentiment, 
 and algorithmic analysis. Past performance does not guarantee future results. Stock prices are subject 
 to market volatility and unforeseen events. Always conduct your own research and consult with a licensed 
 financial advisor before making investment decisions. StockWise AI and its creators are not responsible 
 for any financial losses incurred based on this report."""
-        
-        pdf.multi_cell(0, 4, disclaimer)
-        pdf.ln(5)
-        
-        # Footer info
-        pdf.set_font('Arial', 'I', 8)
-        pdf.cell(0, 5, 'Powered by StockWise AI - Intelligent Stock Analysis Platform', align='C')
+    
+    pdf.multi_cell(0, 4, disclaimer)
+    pdf.ln(5)
+    
+    # Footer info
+    pdf.set_font('Arial', 'I', 8)
+    pdf.cell(0, 5, 'Powered by StockWise AI - Intelligent Stock Analysis Platform', align='C')
+
+
+def create_stock_report(ticker, price_data, prediction, news_analysis, price_analysis):
+    """
+    Create a professional PDF stock analysis report
+    """
+    try:
+        pdf = new_report_pdf()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        _write_report(pdf, ticker, price_data, prediction, news_analysis, price_analysis)
         
         # Return PDF as bytes (correct fpdf2 syntax)
         return bytes(pdf.output())
@@ -210,6 +252,7 @@ for any financial losses incurred based on this report."""
     except Exception as e:
         print(f"[PDF Generation Error] {e}")
         # Create a simple fallback PDF
+        from fpdf import FPDF
         error_pdf = FPDF()
         error_pdf.add_page()
         error_pdf.set_font('Arial', 'B', 16)
@@ -218,3 +261,164 @@ for any financial losses incurred based on this report."""
         error_pdf.set_font('Arial', '', 10)
         error_pdf.multi_cell(0, 5, 'Unable to generate the full report due to formatting issues. Please try again or contact support.')
         return bytes(error_pdf.output())
+
+
+def report_key(*parts):
+    """
+    Content hash of report inputs. The date is included because the
+    report prints when it was generated.
+    """
+    payload = json.dumps([datetime.now().strftime("%Y-%m-%d"), parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: the app process runs many threads
+            _pool = ProcessPoolExecutor(
+                max_workers=max(PDF_WORKERS, 1),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _cached(key):
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+
+def _store(key, future):
+    with _lock:
+        _pending.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        _cache[key] = future.result()
+        while len(_cache) > PDF_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _end_span(span, future):
+    if future.cancelled() or future.exception() is not None:
+        span.set(status="error")
+    else:
+        span.set(bytes=len(future.result()))
+    span.end()
+
+
+def _submit(key, func, *args):
+    """Future for func(*args): served from the cache, an in-flight render, or a new one"""
+    global _pool
+    # the span lasts until the bytes are ready
+    span = tracing.start_span("pdf", renderer=func.__name__)
+    with _lock:
+        cached = _cached(key)
+        if cached is not None:
+            span.set(cache="hit")
+            future = Future()
+            future.set_result(cached)
+            _end_span(span, future)
+            return future
+        future = _pending.get(key)
+        span.set(cache="miss" if future is None else "shared")
+        if future is None:
+            try:
+                future = _get_pool().submit(func, *args)
+            except BrokenProcessPool:
+                # a worker died (e.g. killed for memory); start a fresh pool
+                _pool = None
+                future = _get_pool().submit(func, *args)
+            _pending[key] = future
+            future.add_done_callback(lambda f: _store(key, f))
+        future.add_done_callback(lambda f: _end_span(span, f))
+        return future
+
+
+def submit_report(ticker, price_data, prediction, news_analysis, price_analysis):
+    """
+    Start rendering a report in the worker pool and return a Future of its
+    bytes. Identical inputs share one render and are cached afterwards.
+    """
+    args = (ticker, price_data, prediction, news_analysis, price_analysis)
+    return _submit(report_key("report", *args), create_stock_report, *args)
+
+
+def generate_reports(reports):
+    """
+    Render many single-ticker reports in parallel.
+    reports: list of dicts of create_stock_report arguments -> list of pdf bytes
+    """
+    futures = [submit_report(**report) for report in reports]
+    return [future.result() for future in futures]
+
+
+def _write_cover(pdf, reports):
+    """Portfolio cover page: one summary row per ticker"""
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 24)
+    pdf.cell(0, 15, 'Portfolio Analysis Report', ln=True, align='C')
+    pdf.set_font('Arial', 'I', 10)
+    pdf.cell(0, 8, f'Generated: {datetime.now().strftime("%B %d, %Y at %I:%M %p")}',
+             ln=True, align='C')
+    pdf.ln(10)
+    
+    columns = [('Ticker', 30), ('Current Price', 45), ('Predicted (7d)', 45),
+               ('Change', 35), ('Confidence', 35)]
+    pdf.set_font('Arial', 'B', 10)
+    for label, width in columns:
+        pdf.cell(width, 7, label, border=1, align='C')
+    pdf.ln()
+    
+    pdf.set_font('Arial', '', 10)
+    for report in reports:
+        current_price = report['price_data']['current_price']
+        predicted_price = report['prediction']['predicted_price']
+        pct_change = (predicted_price - current_price) / current_price * 100
+        row = [sanitize_text(report['ticker']), f"${current_price:.2f}", f"${predicted_price:.2f}",
+               f"{pct_change:+.2f}%", sanitize_text(report['prediction']['confidence'].upper())]
+        for (_, width), value in zip(columns, row):
+            pdf.cell(width, 7, value, border=1, align='C')
+        pdf.ln()
+
+
+def _render_portfolio(reports):
+    """Portfolio report as a single document, rendered sequentially"""
+    pdf = new_report_pdf()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    _write_cover(pdf, reports)
+    for report in reports:
+        _write_report(pdf, **report)
+    return bytes(pdf.output())
+
+
+def create_portfolio_report(reports):
+    """
+    Multi-ticker report: a summary cover page followed by each ticker's report.
+    reports: list of dicts of create_stock_report arguments.
+    
+    The ticker sections are rendered in parallel in the worker pool and
+    merged with pypdf. Without pypdf the whole document is rendered in one
+    worker instead.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        return _submit(report_key("portfolio", reports), _render_portfolio, reports).result()
+    
+    sections = [submit_report(**report) for report in reports]
+    
+    cover = new_report_pdf()
+    cover.set_auto_page_break(auto=True, margin=15)
+    _write_cover(cover, reports)
+    
+    writer = PdfWriter()
+    writer.append(io.BytesIO(bytes(cover.output())))
+    for section in sections:
+        writer.append(io.BytesIO(section.result()))
+    merged = io.BytesIO()
+    writer.write(merged)
+    return merged.getvalue()
@@ -0,0 +1,231 @@
+"""
+Concurrent execution of the per-ticker pipeline.
+
+News, quote and history are independent network calls, so they are fetched
+for every ticker at once on a bounded thread pool instead of one after another.
+The agent stages then run as a dependency graph: each stage declares the
+context keys it needs and starts as soon as they are available.
+"""
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tracing
+
+from agents import (
+    news_retriever, price_retriever, news_analyst, price_analyst,
+    financial_reporter, final_answer, price_predictor, fused_analyst, forecasting, sentiment
+)
+
+# Global cap on in-flight provider calls for one query
+MAX_CONCURRENCY = int(os.getenv("PIPELINE_MAX_CONCURRENCY", "8"))
+
+
+def _fetchers(ticker, days, refresh=False):
+    """The independent data sources needed to analyze one ticker"""
+    if refresh:
+        return {
+            "news": (news_retriever.get_news_for_ticker, (ticker, 0)),
+            "price_data": (price_retriever.get_price_data, (ticker, 0)),
+            "historical_data": (price_retriever.get_historical_data, (ticker, days, 0)),
+        }
+    return {
+        "news": (news_retriever.get_news_for_ticker, (ticker,)),
+        "price_data": (price_retriever.get_price_data, (ticker,)),
+        "historical_data": (price_retriever.get_historical_data, (ticker, days)),
+    }
+
+
+def fetch_all(tickers, days=90, max_workers=MAX_CONCURRENCY, refresh=False):
+    """
+    Fetch news, quote and history for every ticker concurrently.
+    Yields (ticker, data) as soon as all sources for that ticker are in,
+    where data has the keys news, price_data and historical_data.
+    refresh=True bypasses the retrievers' caches (max_age=0).
+    """
+    results = {ticker: {} for ticker in tickers}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for ticker in tickers:
+            sources = _fetchers(ticker, days, refresh)
+            for key, (func, args) in sources.items():
+                futures[executor.submit(tracing.wrap(func), *args)] = (ticker, key, len(sources))
+
+        for future in as_completed(futures):
+            ticker, key, expected = futures[future]
+            results[ticker][key] = future.result()
+            if len(results[ticker]) == expected:
+                yield ticker, results.pop(ticker)
+
+
+def fetch_ticker_data(ticker, days=90):
+    """Fetch news, quote and history for a single ticker concurrently"""
+    for _, data in fetch_all([ticker], days=days):
+        return data
+
+
+class Stage:
+    """
+    One pipeline step: func(*context[inputs]) is stored as context[name].
+    A streaming stage's func returns an iterator of text deltas; the deltas
+    are forwarded as they arrive and the joined text becomes its result.
+    """
+
+    def __init__(self, name, func, inputs, stream=False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.stream = stream
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={self.inputs})"
+
+
+def _execute(stage, args, events):
+    """Worker body: run a stage and report deltas/completion on the event queue"""
+    try:
+        with tracing.span(stage.name, stage=True):
+            result = stage.func(*args)
+            if stage.stream:
+                parts = []
+                for delta in result:
+                    parts.append(delta)
+                    events.put(("delta", stage, delta))
+                result = "".join(parts)
+        events.put(("done", stage, result))
+    except Exception as e:
+        events.put(("error", stage, e))
+
+
+def run_stages(stages, context, max_workers=MAX_CONCURRENCY):
+    """
+    Run stages as soon as their inputs are in context, independent ones in parallel.
+    Yields (event, stage_name, value) tuples:
+      ("delta", name, text)  - a chunk of a streaming stage's output
+      ("done", name, result) - a stage finished; context is updated in place
+    A stage's exception is re-raised once the stages already running finish;
+    stages that depend on it are not started.
+    """
+    pending = list(stages)
+    events = queue.Queue()
+    running = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            ready = [s for s in pending if all(key in context for key in s.inputs)]
+            for stage in ready:
+                pending.remove(stage)
+                args = [context[key] for key in stage.inputs]
+                executor.submit(tracing.wrap(_execute), stage, args, events)
+                running += 1
+
+            if not running:
+                raise ValueError(f"Stages have unsatisfiable inputs: {pending}")
+
+            event, stage, value = events.get()
+            if event == "error":
+                print(f"[Pipeline] Stage {stage.name} failed: {value}")
+                raise value
+            if event == "delta":
+                yield "delta", stage.name, value
+                continue
+
+            running -= 1
+            context[stage.name] = value
+            yield "done", stage.name, value
+
+
+def has_history(historical_data):
+    """True when historical candles were retrieved successfully"""
+    return "error" not in historical_data and bool(historical_data.get('close'))
+
+
+def _analyze_prices(price_data, historical_data):
+    if has_history(historical_data):
+        return price_analyst.analyze_price_data(historical_data)
+    return price_analyst.analyze_price_data(price_data["historical"])
+
+
+def _predict(historical_data, news_sentiment, ticker, prediction_mode):
+    if not has_history(historical_data):
+        return None
+    return price_predictor.predict_future_price(
+        historical_data, news_sentiment, ticker, mode=prediction_mode
+    )
+
+
+# news_summary -> summary -> advice is the critical path (3 LLM round trips);
+# price analysis, the local sentiment score and the prediction (which takes
+# the score, not the LLM news summary) run alongside it. The report and the
+# advice stream their text so the UI can render it as it is generated.
+ANALYSIS_STAGES = [
+    Stage("sentiment", sentiment.analyze, ["news"]),
+    Stage("news_summary", news_analyst.analyze_news, ["news"]),
+    Stage("price_summary", _analyze_prices, ["price_data", "historical_data"]),
+    Stage("summary", financial_reporter.generate_report_stream, ["news_summary", "price_summary"],
+          stream=True),
+    Stage("prediction", _predict, ["historical_data", "sentiment", "ticker", "prediction_mode"]),
+    Stage("advice", final_answer.generate_advice_stream, ["summary"], stream=True),
+]
+
+
+# Fused mode: one structured LLM call replaces the four separate ones
+FUSED_STAGES = [
+    Stage("sentiment", sentiment.analyze, ["news"]),
+    Stage("price_summary", _analyze_prices, ["price_data", "historical_data"]),
+    Stage("fused", fused_analyst.analyze_ticker,
+          ["ticker", "news", "price_summary", "historical_data"]),
+]
+
+
+def _run_fused(context):
+    """
+    Run the fused stages and publish their parts under the regular stage names.
+    Returns False (leaving price_summary and sentiment in context) if the response was invalid.
+    """
+    for event in run_stages(FUSED_STAGES, context, max_workers=len(FUSED_STAGES)):
+        if event[1] != "fused":
+            yield event
+
+    result = context.pop("fused")
+    if not result:
+        print(f"[Pipeline] Fused analysis failed for {context['ticker']}, using separate calls")
+        return False
+
+    historical_data = context["historical_data"]
+    prediction = result["prediction"] if has_history(historical_data) else None
+    if prediction and context["prediction_mode"] in forecasting.METHODS:
+        prediction = _predict(historical_data, context["sentiment"], context["ticker"],
+                              context["prediction_mode"])
+
+    for name, value in (("news_summary", result["news_analysis"]),
+                        ("summary", result["summary"]),
+                        ("prediction", prediction),
+                        ("advice", result["advice"])):
+        context[name] = value
+        yield "done", name, value
+    return True
+
+
+def run_analysis(ticker, news, price_data, historical_data, prediction_mode=None,
+                 fused=False, stages=ANALYSIS_STAGES):
+    """
+    Run the agent stages for one ticker.
+    Yields run_stages events: text deltas from streaming stages and
+    ("done", stage_name, result) as each stage completes.
+    With fused=True a single structured call is tried first, falling back to
+    the separate stages if its response doesn't validate.
+    """
+    context = {
+        "ticker": ticker,
+        "news": news,
+        "price_data": price_data,
+        "historical_data": historical_data,
+        "prediction_mode": prediction_mode,
+    }
+    if fused and (yield from _run_fused(context)):
+        return
+
+    remaining = [s for s in stages if s.name not in context]
+    yield from run_stages(remaining, context, max_workers=len(remaining))
@@ -0,0 +1,233 @@
+"""
+Background prefetching that keeps a watchlist warm.
+
+A scheduler thread refreshes quotes, candle tails and news for the
+watchlist symbols, writing into the retrievers' caches (quote cache, news store
+and candle store), so interactive queries start from warm data. With
+PREFETCH_ANALYZE_NEWS=1 the news analysis is precomputed as well; it lands
+in the LLM cache under the same prompt the app will send.
+
+Each kind of data is refreshed shortly before the max age its retriever
+accepts runs out (WARM_FRACTION of it), so a query always finds it fresh:
+quotes every QUOTE_CACHE_SECONDS during the session and every
+QUOTE_CLOSED_CACHE_SECONDS outside it, candle tails every
+CANDLE_REFRESH_SECONDS and news every NEWS_CACHE_SECONDS. That is the cost
+of keeping a symbol warm; with the defaults, about two Finnhub requests a
+minute per symbol while the market is open. record_query() keeps a decayed
+query count per symbol: popular symbols are refreshed more often (up to
+MAX_SPEEDUP times, never less often than the max age allows), and queried
+symbols outside the watchlist are prefetched while they stay popular.
+
+All prefetch calls run at BACKGROUND priority at the rate limiter, and news
+refreshes pause while less than PREFETCH_QUOTA_RESERVE of the daily NewsAPI
+quota is left.
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import rate_limiter
+import tracing
+
+ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+WATCHLIST = [t.strip().upper() for t in os.getenv("PREFETCH_WATCHLIST", "").split(",") if t.strip()]
+WATCHLIST_FILE = os.getenv("PREFETCH_WATCHLIST_FILE")  # same format as batch_runner watchlists
+WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+HISTORY_DAYS = int(os.getenv("PREFETCH_HISTORY_DAYS", "90"))
+ANALYZE_NEWS = os.getenv("PREFETCH_ANALYZE_NEWS", "0") == "1"
+QUOTA_RESERVE = float(os.getenv("PREFETCH_QUOTA_RESERVE", "0.5"))
+
+PROVIDERS = {"quote": "finnhub", "history": "finnhub", "news": "newsapi"}
+# Refresh after this fraction of the retriever's max age, leaving time for the fetch
+WARM_FRACTION = 0.9
+MIN_INTERVAL = 10  # seconds; for retrievers configured without caching
+
+# Query popularity: exponentially decayed count with this half-life
+POPULARITY_HALF_LIFE = 3600.0
+MIN_DYNAMIC_SCORE = 0.5  # queried symbols below this drop out of the schedule
+# Each POPULARITY_SCALE of decayed query count adds one refresh per max age
+POPULARITY_SCALE = float(os.getenv("PREFETCH_POPULARITY_SCALE", "5"))
+MAX_SPEEDUP = 4  # bounds the extra requests a hot symbol costs
+
+
+class Popularity:
+    """Exponentially decayed query counts per symbol"""
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE):
+        self.decay = math.log(2) / half_life
+        self._scores = {}  # ticker -> (score, updated)
+        self._lock = threading.Lock()
+
+    def record(self, ticker, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._scores[ticker] = (self._score(ticker, now) + 1, now)
+
+    def _score(self, ticker, now):
+        score, updated = self._scores.get(ticker, (0.0, now))
+        return score * math.exp(-self.decay * (now - updated))
+
+    def score(self, ticker, now=None):
+        with self._lock:
+            return self._score(ticker, now or time.time())
+
+
+popularity = Popularity()
+
+
+def record_query(ticker):
+    """Count an interactive query for ticker (adapts its refresh interval)"""
+    popularity.record(ticker)
+    scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.track(ticker)
+
+
+def reader_max_age(kind, is_open=None):
+    """Seconds the retriever serving `kind` to queries reuses stored data"""
+    import candle_store
+    from agents import news_retriever, price_retriever
+
+    if kind == "quote":
+        return price_retriever.quote_max_age(is_open)
+    if kind == "history":
+        return candle_store.REFRESH_SECONDS
+    return news_retriever.NEWS_MAX_AGE
+
+
+def interval_for(kind, ticker=None, is_open=None, now=None):
+    """
+    Refresh interval for a symbol's data: just under what its retriever
+    accepts, divided by how popular the symbol is (at most MAX_SPEEDUP)
+    """
+    cap = reader_max_age(kind, is_open) * WARM_FRACTION
+    score = popularity.score(ticker, now) if ticker else 0.0
+    return max(cap / min(1 + score / POPULARITY_SCALE, MAX_SPEEDUP), MIN_INTERVAL)
+
+
+def _refresh(kind, ticker):
+    from agents import news_analyst, news_retriever, price_retriever
+
+    if kind == "quote":
+        price_retriever.get_price_data(ticker, max_age=0)
+    elif kind == "history":
+        price_retriever.get_historical_data(ticker, days=HISTORY_DAYS, max_age=0)
+    elif kind == "news":
+        news = news_retriever.get_news_for_ticker(ticker, max_age=0)
+        if ANALYZE_NEWS:
+            news_analyst.analyze_news(news)
+
+
+class PrefetchScheduler:
+    """Refreshes (kind, ticker) jobs from a due-time heap on a small worker pool"""
+
+    def __init__(self, watchlist=WATCHLIST, workers=WORKERS):
+        self.watchlist = set(watchlist)
+        self._heap = []  # (due, kind, ticker)
+        self._scheduled = set()
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._thread = None
+
+    def track(self, ticker):
+        """Schedule all kinds for ticker now, unless already scheduled"""
+        now = time.time()
+        with self._lock:
+            for kind in PROVIDERS:
+                if (kind, ticker) not in self._scheduled:
+                    self._scheduled.add((kind, ticker))
+                    heapq.heappush(self._heap, (now, kind, ticker))
+        self._wakeup.set()
+
+    def _wanted(self, ticker):
+        return ticker in self.watchlist or popularity.score(ticker) >= MIN_DYNAMIC_SCORE
+
+    def _run_job(self, kind, ticker):
+        try:
+            provider = PROVIDERS[kind]
+            if rate_limiter.daily_headroom(provider) < QUOTA_RESERVE:
+                print(f"[Prefetch] Skipping {kind} for {ticker}: {provider} daily quota reserved")
+                return
+            with rate_limiter.priority(rate_limiter.BACKGROUND), \
+                    tracing.span("prefetch", kind=kind, ticker=ticker):
+                _refresh(kind, ticker)
+        except Exception as e:
+            print(f"[Prefetch] {kind} refresh failed for {ticker}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard((kind, ticker))
+                if self._wanted(ticker):
+                    due = time.time() + interval_for(kind, ticker)
+                    heapq.heappush(self._heap, (due, kind, ticker))
+                else:
+                    self._scheduled.discard((kind, ticker))
+            self._wakeup.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.time()
+            due = []
+            with self._lock:
+                while self._heap and self._heap[0][0] <= now:
+                    _, kind, ticker = heapq.heappop(self._heap)
+                    if (kind, ticker) in self._running:
+                        continue
+                    self._running.add((kind, ticker))
+                    due.append((kind, ticker))
+                next_due = self._heap[0][0] if self._heap else now + 60
+            for kind, ticker in due:
+                self._executor.submit(self._run_job, kind, ticker)
+            self._wakeup.wait(max(next_due - time.time(), 0.05))
+            self._wakeup.clear()
+
+    def start(self):
+        for ticker in self.watchlist:
+            self.track(ticker)
+        self._thread = threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+        print(f"[Prefetch] Keeping {len(self.watchlist)} watchlist symbols warm")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def configured_watchlist():
+    """PREFETCH_WATCHLIST plus the symbols in PREFETCH_WATCHLIST_FILE"""
+    tickers = list(WATCHLIST)
+    if WATCHLIST_FILE:
+        from batch_runner import read_watchlist
+        try:
+            tickers += read_watchlist(WATCHLIST_FILE)
+        except OSError as e:
+            print(f"[Prefetch] Could not read watchlist {WATCHLIST_FILE}: {e}")
+    return list(dict.fromkeys(tickers))
+
+
+def start(watchlist=None):
+    """Start the process-wide scheduler once (no-op unless PREFETCH_ENABLED=1 or a watchlist is given)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None and (ENABLED or watchlist):
+            _scheduler = PrefetchScheduler(watchlist or configured_watchlist()).start()
+    return _scheduler
+
+
+def stop():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.stop()
+            _scheduler = None
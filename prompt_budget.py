@@ -0,0 +1,109 @@
+"""
+Token budgets for LLM prompts.
+
+Each agent gets an input budget (prompt tokens) and an output cap
+(max_tokens). Prompts are measured with tiktoken and the longest
+non-system messages are trimmed until they fit, the last user message
+(the actual question) only once the rest is used up. cl100k_base is only
+an approximation of the Llama tokenizer, so budgets leave some headroom.
+"""
+import os
+import threading
+
+ENCODING_NAME = "cl100k_base"
+TRUNCATION_MARKER = " ...[truncated]"
+MESSAGE_OVERHEAD = 4  # role/separator tokens per chat message
+
+# Per-agent budgets: prompt tokens in, completion tokens out
+AGENT_BUDGETS = {
+    "ticker_extractor": {"input": 600, "output": 64},
+    "news_analyst": {"input": 1500, "output": 600},
+    "financial_reporter": {"input": 2000, "output": 800},
+    "price_predictor": {"input": 1000, "output": 200},
+    "final_answer": {"input": 1200, "output": 600},
+    "fused_analyst": {"input": 2500, "output": 1600},
+}
+DEFAULT_BUDGET = {
+    "input": int(os.getenv("LLM_DEFAULT_INPUT_TOKENS", "3000")),
+    "output": int(os.getenv("LLM_DEFAULT_OUTPUT_TOKENS", "1024")),
+}
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """
+    tiktoken encoding, or None when tiktoken (or its BPE file) is unavailable.
+    The first call may download the BPE file; concurrent callers wait for it.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+                except Exception as e:
+                    print(f"[Prompt Budget] tiktoken unavailable, estimating tokens: {e}")
+                    _encoding_failed = True
+    return _encoding
+
+
+def budget_for(agent):
+    return AGENT_BUDGETS.get(agent, DEFAULT_BUDGET)
+
+
+def count_tokens(text):
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // 4)  # about four characters per token, rounded up
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages):
+    return sum(count_tokens(m.get("content") or "") + MESSAGE_OVERHEAD for m in messages)
+
+
+def truncate_text(text, max_tokens):
+    """Keep the beginning of text within max_tokens (marker included)"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER)
+    if keep <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:keep * 4] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+
+
+def fit_messages(messages, max_tokens):
+    """
+    Trim the longest non-system messages until the prompt fits max_tokens,
+    keeping the last user message intact unless nothing else is left to trim.
+    Returns a new list; the original messages are left untouched.
+    """
+    fitted = [dict(m) for m in messages]
+    sizes = [count_tokens(m.get("content") or "") for m in fitted]
+    overflow = sum(sizes) + MESSAGE_OVERHEAD * len(fitted) - max_tokens
+    last_user = max((i for i, m in enumerate(fitted) if m["role"] == "user"), default=None)
+
+    while overflow > 0:
+        candidates = [i for i, m in enumerate(fitted)
+                      if m["role"] != "system" and i != last_user and sizes[i] > 0]
+        if not candidates and last_user is not None and sizes[last_user] > 0:
+            candidates = [last_user]
+        if not candidates:
+            break
+        i = max(candidates, key=lambda idx: sizes[idx])
+        keep = max(sizes[i] - overflow, 0)
+        fitted[i]["content"] = truncate_text(fitted[i]["content"], keep)
+        new_size = count_tokens(fitted[i]["content"])
+        if new_size >= sizes[i]:
+            fitted[i]["content"] = ""
+            new_size = 0
+        overflow -= sizes[i] - new_size
+        sizes[i] = new_size
+    return fitted
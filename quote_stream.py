@@ -0,0 +1,294 @@
+"""
+Live trade stream for the tickers on screen.
+
+A background thread holds one websocket to Finnhub's trade feed
+(QUOTE_STREAM_URL; `python -m benchmarks.replay_server` stands in locally)
+and subscribes to the symbols being viewed. Each trade is appended to the
+symbol's tick ring buffer and folded into the current candle, so the UI can
+poll snapshot() and update its metrics and last candlestick without
+re-running the pipeline.
+
+The current candle is seeded from the REST quote (open/high/low of the
+session so far), since the stream only sees trades made after subscribing.
+
+Subscriptions are held per owner (a UI session) on a lease: subscribe()
+renews it, unsubscribe() releases it, and a symbol is dropped from the
+socket once no owner holds it, so symbols nobody is viewing anymore don't
+accumulate towards the feed's per-connection cap (MAX_SYMBOLS).
+Needs websocket-client; without it available() is False.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import config
+
+STREAM_URL = os.getenv("QUOTE_STREAM_URL", "wss://ws.finnhub.io")
+# Trades kept per symbol
+RING_SIZE = int(os.getenv("QUOTE_STREAM_RING_SIZE", "4096"))
+# Candle length; daily to match the history chart
+CANDLE_SECONDS = 86400
+# How often the UI polls for updates
+REFRESH_SECONDS = float(os.getenv("QUOTE_STREAM_REFRESH_SECONDS", "2"))
+# An owner's subscription lapses unless renewed within this long
+LEASE_SECONDS = float(os.getenv("QUOTE_STREAM_LEASE_SECONDS", "60"))
+# Symbols per connection (Finnhub's free tier allows about 50)
+MAX_SYMBOLS = int(os.getenv("QUOTE_STREAM_MAX_SYMBOLS", "50"))
+PING_SECONDS = 20
+RECONNECT_MAX_SECONDS = 30
+
+TICK_DTYPE = np.dtype([("t", "f8"), ("p", "f8"), ("v", "f8")])
+
+
+def available():
+    """True when websocket-client is installed"""
+    try:
+        import websocket  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class TickRing:
+    """Fixed-size ring buffer of the latest trades for one symbol"""
+
+    def __init__(self, size=RING_SIZE):
+        self.ticks = np.zeros(size, dtype=TICK_DTYPE)
+        self.count = 0
+
+    def append(self, t, p, v):
+        self.ticks[self.count % len(self.ticks)] = (t, p, v)
+        self.count += 1
+
+    def latest(self, n=None):
+        """The last n trades (all kept ones by default), oldest first"""
+        size = len(self.ticks)
+        n = min(n or size, self.count, size)
+        end = self.count % size
+        if n <= end:
+            return self.ticks[end - n:end].copy()
+        return np.concatenate([self.ticks[size - (n - end):], self.ticks[:end]])
+
+
+class _Symbol:
+    def __init__(self):
+        self.ring = TickRing()
+        self.candle = None  # {"t", "open", "high", "low", "close", "volume"}
+        self.updated = None
+        self.owners = {}  # owner -> lease expiry
+
+    def seed(self, price_data, now):
+        """Start today's candle from the REST quote"""
+        self.candle = {
+            "t": int(now - now % CANDLE_SECONDS),
+            "open": price_data["open_price"],
+            "high": price_data["high_price"],
+            "low": price_data["low_price"],
+            "close": price_data["current_price"],
+            "volume": 0.0,
+        }
+
+    def trade(self, t, p, v):
+        self.ring.append(t, p, v)
+        bucket = int(t - t % CANDLE_SECONDS)
+        candle = self.candle
+        if candle is None or bucket > candle["t"]:
+            self.candle = {"t": bucket, "open": p, "high": p, "low": p, "close": p, "volume": v}
+        elif bucket == candle["t"]:
+            candle["high"] = max(candle["high"], p)
+            candle["low"] = min(candle["low"], p)
+            candle["close"] = p
+            candle["volume"] += v
+        self.updated = t
+
+
+class QuoteStream:
+    """One websocket connection shared by every subscribed symbol"""
+
+    def __init__(self, url=STREAM_URL, token=None):
+        self.url = url
+        self.token = token
+        self.connected = False
+        self._symbols = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._app = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="quote-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._app is not None:
+            self._app.close()
+
+    def _run(self):
+        import websocket
+
+        backoff = 1
+        url = f"{self.url}?token={self.token}" if self.token else self.url
+        while not self._stop.is_set():
+            started = time.time()
+            self._app = websocket.WebSocketApp(
+                url, on_open=self._on_open, on_message=self._on_message,
+                on_error=self._on_error, on_close=self._on_close,
+            )
+            self._app.run_forever(ping_interval=PING_SECONDS, ping_timeout=10)
+            self.connected = False
+            if self._stop.is_set():
+                break
+            # a connection that stayed up a while starts the backoff over
+            if time.time() - started > RECONNECT_MAX_SECONDS:
+                backoff = 1
+            else:
+                backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+            print(f"[Quote Stream] Disconnected, reconnecting in {backoff}s")
+            self._stop.wait(backoff)
+
+    def _send(self, message):
+        try:
+            self._app.send(json.dumps(message))
+        except Exception as e:
+            print(f"[Quote Stream] Send failed: {e}")
+
+    def _on_open(self, app):
+        self.connected = True
+        with self._lock:
+            symbols = list(self._symbols)
+        print(f"[Quote Stream] Connected, subscribing to {len(symbols)} symbols")
+        for symbol in symbols:
+            self._send({"type": "subscribe", "symbol": symbol})
+
+    def _on_message(self, app, message):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        if payload.get("type") == "trade":
+            with self._lock:
+                for trade in payload.get("data") or []:
+                    state = self._symbols.get(trade.get("s"))
+                    if state is not None:
+                        state.trade(trade["t"] / 1000, float(trade["p"]), float(trade.get("v") or 0))
+        elif payload.get("type") == "error":
+            print(f"[Quote Stream] Error from feed: {payload.get('msg')}")
+
+    def _on_error(self, app, error):
+        print(f"[Quote Stream] {type(error).__name__}: {error}")
+
+    def _on_close(self, app, status, message):
+        self.connected = False
+
+    def subscribe(self, symbol, price_data=None, owner=None):
+        """
+        Stream trades for symbol on behalf of owner, renewing the owner's
+        lease for LEASE_SECONDS; price_data (a REST quote) seeds today's
+        candle. Returns False when MAX_SYMBOLS symbols are already streamed.
+        """
+        now = time.time()
+        self.expire(now)
+        with self._lock:
+            state = self._symbols.get(symbol)
+            new = state is None
+            if new:
+                if len(self._symbols) >= MAX_SYMBOLS:
+                    print(f"[Quote Stream] Not streaming {symbol}: {MAX_SYMBOLS} symbols already subscribed")
+                    return False
+                state = self._symbols[symbol] = _Symbol()
+            state.owners[owner] = now + LEASE_SECONDS
+            if price_data and "error" not in price_data and state.candle is None:
+                state.seed(price_data, now)
+        if new and self.connected:
+            self._send({"type": "subscribe", "symbol": symbol})
+        return True
+
+    def unsubscribe(self, symbol, owner=None):
+        """Release owner's subscription; the symbol is dropped once no owner holds it"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                return
+            state.owners.pop(owner, None)
+            if state.owners:
+                return
+            del self._symbols[symbol]
+        if self.connected:
+            self._send({"type": "unsubscribe", "symbol": symbol})
+
+    def expire(self, now=None):
+        """Drop lapsed leases and unsubscribe symbols no owner holds anymore"""
+        now = now or time.time()
+        dropped = []
+        with self._lock:
+            for symbol, state in list(self._symbols.items()):
+                for owner in [o for o, until in state.owners.items() if until < now]:
+                    del state.owners[owner]
+                if not state.owners:
+                    del self._symbols[symbol]
+                    dropped.append(symbol)
+        if self.connected:
+            for symbol in dropped:
+                self._send({"type": "unsubscribe", "symbol": symbol})
+
+    def symbols(self):
+        """Currently subscribed symbols"""
+        with self._lock:
+            return list(self._symbols)
+
+    def snapshot(self, symbol):
+        """
+        {"price", "updated", "candle", "ticks", "connected"} for a subscribed
+        symbol (price/updated are None before its first trade), else None
+        """
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                return None
+            return {
+                "price": state.candle["close"] if state.updated else None,
+                "updated": state.updated,
+                "candle": dict(state.candle) if state.candle else None,
+                "ticks": state.ring.count,
+                "connected": self.connected,
+            }
+
+    def recent_trades(self, symbol, n=None):
+        """The symbol's latest trades as a TICK_DTYPE array, oldest first"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            return state.ring.latest(n) if state else np.zeros(0, dtype=TICK_DTYPE)
+
+
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def current_stream():
+    """The process-wide stream if one has been started, else None"""
+    return _stream
+
+
+def get_stream():
+    """
+    The process-wide stream, connected on first use. Returns None when
+    websocket-client is missing or FINNHUB_API_KEY isn't configured.
+    """
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            if not available():
+                print("[Quote Stream] websocket-client not installed. Run: pip install websocket-client")
+                return None
+            try:
+                token = config.get_secret("FINNHUB_API_KEY")
+            except config.MissingSecret as e:
+                print(f"[Quote Stream] {e}")
+                return None
+            _stream = QuoteStream(STREAM_URL, token).start()
+        return _stream
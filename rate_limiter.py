@@ -0,0 +1,275 @@
+"""
+Process-wide provider rate limits and request coalescing.
+
+Each provider gets a token bucket refilled at its requests-per-minute
+limit (burst of one minute's worth), plus an optional daily quota. The
+shared HTTP adapter takes a token for the request's host before sending,
+so every provider call is paced (including finnhub's own session) and all
+sessions and workers in the process share the quota. yfinance has its own
+HTTP stack, so the price retriever takes its Yahoo tokens with acquire().
+
+Waiters are served by priority: interactive queries go ahead of batch jobs
+and background prefetching. Set the priority for a block of work with
+`with rate_limiter.priority(rate_limiter.BATCH): ...`.
+
+Identical concurrent calls (same endpoint and ticker) can share one
+in-flight request through single_flight()/coalesced().
+
+Limits come from RATE_LIMIT_<PROVIDER> (per minute) and
+RATE_LIMIT_<PROVIDER>_DAILY env vars (0 = unlimited) and can be changed
+at runtime with configure().
+"""
+import contextvars
+import functools
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+
+import tracing
+
+# Host -> provider name
+PROVIDER_HOSTS = {
+    "api.groq.com": "groq",
+    "newsapi.org": "newsapi",
+    "finnhub.io": "finnhub",
+    "finance.yahoo.com": "yahoo",
+}
+# Free-tier defaults
+DEFAULT_LIMITS = {"groq": 30, "newsapi": 0, "finnhub": 60, "yahoo": 60}  # per minute
+DEFAULT_DAILY_LIMITS = {"groq": 0, "newsapi": 100, "finnhub": 0, "yahoo": 0}
+# Longest a caller waits for a token before the request fails
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "60"))
+
+# Priorities (lower is served first)
+INTERACTIVE = 0
+BATCH = 10
+BACKGROUND = 20
+
+_priority = contextvars.ContextVar("rate_limit_priority", default=INTERACTIVE)
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """A token would not be available within MAX_WAIT (e.g. a daily quota is used up)"""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket holding `limit` tokens refilled over `period`
+    seconds. Blocked callers are served in priority order, FIFO within a
+    priority.
+    """
+
+    def __init__(self, limit, period=60.0, burst=None):
+        self.rate = limit / period
+        self.capacity = float(burst or limit)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self):
+        """Tokens currently in the bucket"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return self.tokens
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return max((1 - self.tokens) / self.rate, 0.0)
+
+    def acquire(self, priority=INTERACTIVE, max_wait=None):
+        """
+        Block until a token is taken; returns the seconds spent waiting.
+        Raises RateLimitExceeded when the token, counting the waiters queued
+        ahead, is further away than max_wait, or once max_wait has passed.
+        """
+        start = time.monotonic()
+        deadline = None if max_wait is None else start + max_wait
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    # the waiters ahead in the queue take the next tokens first
+                    ahead = sum(1 for waiter in self._waiters if waiter < ticket)
+                    if not ahead and self.tokens >= 1:
+                        self.tokens -= 1
+                        return now - start
+                    wait = (ahead + 1 - self.tokens) / self.rate
+                    if deadline is not None and now + max(wait, 0) > deadline:
+                        raise RateLimitExceeded(f"rate limit: next slot in {wait:.0f}s")
+                    # only the head of the queue sleeps on the refill; others wait
+                    # their turn, but no longer than their deadline
+                    timeout = wait if not ahead else None
+                    if deadline is not None:
+                        timeout = deadline - now if timeout is None else min(timeout, deadline - now)
+                    self._cond.wait(timeout)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+class ProviderLimit:
+    """
+    Per-minute bucket plus an optional daily quota for one provider.
+    The daily quota refills continuously rather than at a fixed reset time.
+    """
+
+    def __init__(self, per_minute=0, per_day=0):
+        self.minute = TokenBucket(per_minute, 60.0) if per_minute else None
+        self.daily = TokenBucket(per_day, 86400.0) if per_day else None
+
+    def acquire(self, priority=INTERACTIVE, max_wait=MAX_WAIT):
+        # fail on an exhausted daily quota before taking a per-minute token
+        if self.daily and self.daily.wait_time() > max_wait:
+            raise RateLimitExceeded("daily request quota exhausted")
+        waited = self.minute.acquire(priority, max_wait) if self.minute else 0.0
+        if self.daily:
+            waited += self.daily.acquire(priority, max_wait)
+        return waited
+
+
+_limits = {}
+_lock = threading.Lock()
+
+
+def _env_limit(provider, suffix, defaults):
+    env = os.getenv(f"RATE_LIMIT_{provider.upper()}{suffix}")
+    return float(env) if env is not None else defaults.get(provider, 0)
+
+
+def configure(provider, per_minute=None, per_day=None):
+    """Set a provider's limits (None keeps the env/default value, 0 removes the limit)"""
+    if per_minute is None:
+        per_minute = _env_limit(provider, "", DEFAULT_LIMITS)
+    if per_day is None:
+        per_day = _env_limit(provider, "_DAILY", DEFAULT_DAILY_LIMITS)
+    with _lock:
+        _limits[provider] = ProviderLimit(per_minute, per_day)
+
+
+def get_limit(provider):
+    with _lock:
+        if provider not in _limits:
+            _limits[provider] = ProviderLimit(
+                _env_limit(provider, "", DEFAULT_LIMITS),
+                _env_limit(provider, "_DAILY", DEFAULT_DAILY_LIMITS),
+            )
+        return _limits[provider]
+
+
+def daily_headroom(provider):
+    """Fraction of the provider's daily quota still available (1.0 without a quota)"""
+    daily = get_limit(provider).daily
+    if daily is None:
+        return 1.0
+    return daily.available() / daily.capacity
+
+
+def provider_for_url(url):
+    host = urlsplit(url).hostname or ""
+    for suffix, provider in PROVIDER_HOSTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return provider
+    return None
+
+
+@contextmanager
+def priority(level):
+    """Run the enclosed provider calls at the given priority"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def acquire(provider):
+    """Wait for the provider's rate limit at the current priority"""
+    waited = get_limit(provider).acquire(_priority.get())
+    if waited > 1:
+        print(f"[Rate Limit] {provider}: waited {waited:.1f}s")
+        tracing.annotate(rate_limit_wait_ms=round(waited * 1000))
+    return waited
+
+
+def acquire_for_url(url):
+    provider = provider_for_url(url)
+    return acquire(provider) if provider else 0.0
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share the first caller's result"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            tracing.annotate(coalesced=True)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_flights = SingleFlight()
+
+
+def single_flight(key, func, *args, **kwargs):
+    """func(*args, **kwargs), shared with any identical call (same key) in flight"""
+    return _flights.do(key, func, *args, **kwargs)
+
+
+def coalesced(key_func):
+    """
+    Decorator: concurrent calls whose key_func(*args, **kwargs) match share
+    one execution. Callers get the same result object and must not mutate it.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return single_flight(key_func(*args, **kwargs), func, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,53 @@
+"""
+Process-wide memo of finished per-query results.
+
+Streamlit reruns app.py top to bottom on every widget interaction. Keeping
+the extracted tickers and each ticker's fetched data + analyses here (module
+state survives reruns, and is shared by all sessions of the server) lets a
+rerun re-render instantly instead of repeating the whole pipeline.
+"""
+import os
+import threading
+import time
+
+DEFAULT_MAX_AGE = int(os.getenv("RESULT_CACHE_SECONDS", str(10 * 60)))
+MAX_ENTRIES = 256
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a user query"""
+    return " ".join(query.lower().split())
+
+
+class ResultMemo:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, max_age=DEFAULT_MAX_AGE):
+        """Value stored under key if it is younger than max_age seconds"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.time() - entry[0] <= max_age:
+            return entry[1]
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            if len(self._entries) > self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+
+    def invalidate(self, match=None):
+        """Drop every entry, or those whose key tuple contains `match`"""
+        with self._lock:
+            if match is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if match in k]:
+                    del self._entries[key]
+
+
+memo = ResultMemo()
@@ -0,0 +1,40 @@
+"""
+File helpers shared by the per-symbol on-disk stores (candle_store, news_store).
+"""
+import os
+import re
+import threading
+
+
+class SymbolLocks:
+    """One lock per symbol, so concurrent updates of a store in this process don't interleave"""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, symbol):
+        with self._guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+
+def symbol_path(store_dir, symbol, suffix):
+    """store_dir/<SYMBOL><suffix>, with characters unsafe in file names replaced"""
+    return os.path.join(store_dir, re.sub(r"[^A-Za-z0-9._-]", "_", symbol.upper()) + suffix)
+
+
+def atomic_write(path, write, mode="w"):
+    """
+    Replace path with what write(f) writes, through a temp file in the same
+    directory, so readers never see a partial file
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
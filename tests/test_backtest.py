@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import backtest
+import candle_store
+
+
+def test_walk_forward_windows_and_targets():
+    close = np.arange(100.0)
+    inputs, targets = backtest.walk_forward(close, lookback=30, horizon=7, step=5)
+    # origins at 0, 5, ..., 60: the last target (index 96) must exist
+    assert inputs.shape == (13, 30)
+    assert inputs[:, 0].tolist() == list(range(0, 65, 5))
+    assert (targets - inputs[:, -1]).tolist() == [7.0] * 13
+    assert targets[-1] == 96
+
+
+def test_walk_forward_has_no_look_ahead():
+    close = np.random.default_rng(0).normal(100, 5, 250)
+    lookback, horizon = 40, 7
+    inputs, targets = backtest.walk_forward(close, lookback, horizon, step=3)
+    for row, (x, y) in enumerate(zip(inputs, targets)):
+        origin = row * 3
+        np.testing.assert_array_equal(x, close[origin:origin + lookback])
+        # the target is `horizon` bars after the last input, never inside the window
+        assert y == close[origin + lookback - 1 + horizon]
+
+
+def test_walk_forward_with_too_little_history():
+    inputs, targets = backtest.walk_forward(np.arange(36.0), lookback=30, horizon=7, step=1)
+    assert inputs.shape == (0, 30) and len(targets) == 0
+    inputs, targets = backtest.walk_forward(np.arange(37.0), lookback=30, horizon=7, step=1)
+    assert len(inputs) == len(targets) == 1
+
+
+def test_baseline_predictions():
+    inputs = 100 * 1.01 ** np.arange(60.0)[None, :]
+    naive, lower, upper = backtest.predict_windows(inputs, 7, "naive")
+    assert naive[0] == inputs[0, -1] and lower[0] <= naive[0] <= upper[0]
+    momentum, _, _ = backtest.predict_windows(inputs, 7, "momentum")
+    assert momentum[0] == pytest.approx(inputs[0, -1] * 1.01 ** 7)
+    with pytest.raises(ValueError):
+        backtest.predict_windows(inputs, 7, "oracle")
+
+
+def test_score_metrics():
+    last = np.array([100.0, 100.0, 100.0, 100.0])
+    actual = np.array([110.0, 90.0, 100.0, 120.0])
+    predicted = np.array([105.0, 95.0, 101.0, 90.0])
+    lower, upper = predicted - 10, predicted + 10
+    confidence = np.array(["high", "high", "low", "low"])
+    stats = backtest.score(last, actual, predicted, lower, upper, confidence)
+    assert stats["windows"] == 4
+    assert stats["mae"] == pytest.approx((5 + 5 + 1 + 30) / 4)
+    assert stats["mape_pct"] == pytest.approx((5 / 110 + 5 / 90 + 1 / 100 + 30 / 120) / 4 * 100)
+    # window 3 (price unchanged) is excluded; 2 of the other 3 calls are right
+    assert stats["directional_accuracy"] == pytest.approx(2 / 3)
+    assert stats["interval_coverage"] == pytest.approx(3 / 4)
+    assert stats["by_confidence"]["high"]["mae"] == pytest.approx(5)
+    assert stats["by_confidence"]["low"]["directional_accuracy"] == 0.0
+    assert "medium" not in stats["by_confidence"]
+
+
+def test_score_without_windows_or_calls():
+    assert backtest.score(np.empty(0), np.empty(0), np.empty(0)) == {"windows": 0}
+    flat = np.full(3, 50.0)
+    assert backtest.score(flat, flat + 1, flat)["directional_accuracy"] is None
+
+
+def test_run_backtest_on_a_synthetic_store(tmp_path):
+    days = np.arange(300)
+    candles = np.zeros(len(days), dtype=candle_store.CANDLE_DTYPE)
+    candles["t"] = days * candle_store.DAY_SECONDS
+    candles["c"] = 50 * 1.002 ** days
+    candle_store.save("GROW", candles, {}, store_dir=str(tmp_path))
+    candle_store.save("TINY", candles[:20], {}, store_dir=str(tmp_path))
+
+    report = backtest.run_backtest(["GROW", "TINY"], methods=("naive", "momentum", "drift"),
+                                   lookback=90, horizon=7, step=10, workers=1,
+                                   store_dir=str(tmp_path))
+    assert report["windows"] == len(range(0, 300 - 90 - 7 + 1, 10))
+    methods = report["methods"]
+    # on a constant growth rate, momentum and drift are exact and naive lags by 7 bars
+    assert methods["momentum"]["mae"] == pytest.approx(0, abs=1e-9)
+    assert methods["drift"]["mae"] == pytest.approx(0, abs=1e-9)
+    assert methods["naive"]["mape_pct"] == pytest.approx((1 - 1.002 ** -7) * 100, rel=1e-6)
+    assert methods["momentum"]["directional_accuracy"] == 1.0
+
+
+def test_llm_fallbacks_are_invalid(monkeypatch):
+    from agents import price_predictor
+
+    def predict(historical_data, news_sentiment, ticker, mode=None):
+        last = historical_data["close"][-1]
+        if ticker == "FAIL":
+            return {"predicted_price": last, "confidence": "low", "method": "last_close"}
+        return {"predicted_price": last + 1, "confidence": "High"}
+
+    monkeypatch.setattr(price_predictor, "predict_future_price", predict)
+    samples = [("AAPL", np.array([10.0, 11.0]), 12.0), ("FAIL", np.array([10.0, 9.0]), 8.0),
+               ("MSFT", np.array([20.0, 20.0]), 19.0)]
+    stats = backtest.evaluate_llm(samples, workers=2)
+    assert stats["invalid"] == 1 and stats["windows"] == 2
+    assert stats["mae"] == pytest.approx((0 + 2) / 2)
+    assert stats["directional_accuracy"] == pytest.approx(0.5)
+    assert list(stats["by_confidence"]) == ["high"]
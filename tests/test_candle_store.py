@@ -0,0 +1,88 @@
+import numpy as np
+
+import candle_store
+
+DAY = candle_store.DAY_SECONDS
+
+
+def bars(days, close=None):
+    """Candle array with one bar per given day number"""
+    candles = np.zeros(len(days), dtype=candle_store.CANDLE_DTYPE)
+    candles["t"] = np.asarray(days) * DAY
+    candles["c"] = close if close is not None else np.asarray(days, dtype=float)
+    return candles
+
+
+def test_merge_is_sorted_and_fresh_bars_win():
+    stored = bars([1, 2, 3], close=[10.0, 20.0, 30.0])
+    fresh = bars([3, 4], close=[31.0, 40.0])
+    merged = candle_store.merge(stored, fresh)
+    assert (merged["t"] // DAY).tolist() == [1, 2, 3, 4]
+    assert merged["c"].tolist() == [10.0, 20.0, 31.0, 40.0]
+
+
+def test_merge_with_empty_side():
+    stored = bars([1, 2])
+    assert candle_store.merge(candle_store.empty(), stored)["t"].tolist() == stored["t"].tolist()
+    assert candle_store.merge(stored, candle_store.empty()) is stored
+
+
+def test_from_dict_snaps_timestamps_to_utc_midnight():
+    data = {"timestamps": [5 * DAY + 4 * 3600], "open": [1], "high": [2], "low": [0.5],
+            "close": [1.5], "volume": [100]}
+    candles = candle_store.from_dict(data)
+    assert candles["t"].tolist() == [5 * DAY]
+    assert candle_store.to_dict(candles)["close"] == [1.5]
+
+
+def test_window_slices_by_time():
+    candles = bars(range(10))
+    assert (candle_store.window(candles, 3 * DAY, 5 * DAY)["t"] // DAY).tolist() == [3, 4, 5]
+    assert (candle_store.window(candles, 8 * DAY)["t"] // DAY).tolist() == [8, 9]
+
+
+def test_missing_ranges_without_data_fetches_whole_window():
+    assert candle_store.missing_ranges({}, candle_store.empty(), 0, 100 * DAY) == [(0, 100 * DAY)]
+
+
+def test_missing_ranges_fresh_store_needs_nothing():
+    candles = bars(range(10, 20))
+    meta = {"covered_from": 10 * DAY, "fetched_at": 1000}
+    assert candle_store.missing_ranges(meta, candles, 10 * DAY, 20 * DAY, now=1000 + 60) == []
+
+
+def test_missing_ranges_refetches_stale_tail_from_last_bar():
+    candles = bars(range(10, 20))
+    meta = {"covered_from": 10 * DAY, "fetched_at": 0}
+    ranges = candle_store.missing_ranges(meta, candles, 10 * DAY, 21 * DAY,
+                                         now=candle_store.REFRESH_SECONDS + 1)
+    assert ranges == [(19 * DAY, 21 * DAY)]
+
+
+def test_missing_ranges_max_age_zero_forces_tail():
+    candles = bars(range(10, 20))
+    meta = {"covered_from": 10 * DAY, "fetched_at": 1000}
+    assert candle_store.missing_ranges(meta, candles, 10 * DAY, 20 * DAY, now=1000,
+                                       max_age=0) == [(19 * DAY, 20 * DAY)]
+
+
+def test_missing_ranges_head_only_beyond_slack():
+    candles = bars(range(10, 20))
+    meta = {"covered_from": 10 * DAY, "fetched_at": 1000}
+    within = 10 * DAY - candle_store.HEAD_SLACK_SECONDS
+    assert candle_store.missing_ranges(meta, candles, within, 20 * DAY, now=1000) == []
+    assert candle_store.missing_ranges(meta, candles, 0, 20 * DAY, now=1000) == [(0, 10 * DAY)]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    candles = bars([1, 2, 3])
+    candle_store.save("brk.b", candles, {"covered_from": DAY, "fetched_at": 5}, str(tmp_path))
+    assert candle_store.load("BRK.B", str(tmp_path))["t"].tolist() == candles["t"].tolist()
+    assert candle_store.load_meta("BRK.B", str(tmp_path)) == {"covered_from": DAY, "fetched_at": 5}
+    assert candle_store.stored_symbols(str(tmp_path)) == ["BRK.B"]
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_load_missing_symbol_is_empty(tmp_path):
+    assert len(candle_store.load("NOPE", str(tmp_path))) == 0
+    assert candle_store.load_meta("NOPE", str(tmp_path)) == {}
@@ -0,0 +1,93 @@
+import numpy as np
+
+import charting
+
+DAY = 24 * 3600
+
+
+def bars(n):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return {
+        "timestamps": (np.arange(n) * DAY).tolist(),
+        "open": (close - 0.5).tolist(),
+        "high": (close + 1 + rng.random(n)).tolist(),
+        "low": (close - 1 - rng.random(n)).tolist(),
+        "close": close.tolist(),
+        "volume": rng.integers(100, 1000, n).astype(float).tolist(),
+    }
+
+
+def test_ohlc_buckets_aggregate_each_bucket():
+    data = bars(10)
+    out = charting.ohlc_buckets(data, 3)
+    # buckets start at 0, 3 and 6
+    for i, (lo, hi) in enumerate([(0, 3), (3, 6), (6, 10)]):
+        assert out["timestamps"][i] == data["timestamps"][lo]
+        assert out["open"][i] == data["open"][lo]
+        assert out["high"][i] == max(data["high"][lo:hi])
+        assert out["low"][i] == min(data["low"][lo:hi])
+        assert out["close"][i] == data["close"][hi - 1]
+        assert out["volume"][i] == sum(data["volume"][lo:hi])
+
+
+def test_ohlc_buckets_skip_gaps_and_keep_short_series():
+    data = bars(6)
+    data["high"][1] = float("nan")
+    data["volume"][4] = float("nan")
+    out = charting.ohlc_buckets(data, 2)
+    assert out["high"][0] == max(data["high"][0], data["high"][2])
+    assert out["volume"][1] == data["volume"][3] + data["volume"][5]
+
+    unchanged = charting.ohlc_buckets(data, 6)
+    np.testing.assert_array_equal(unchanged["close"], data["close"])
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 10.0  # a spike LTTB must not drop
+    idx = charting.lttb(x, y, 100)
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+    assert 437 in idx
+
+
+def test_lttb_returns_everything_when_not_reducing():
+    np.testing.assert_array_equal(charting.lttb(range(5), range(5), 10), np.arange(5))
+    np.testing.assert_array_equal(charting.lttb(range(5), range(5), 2), np.arange(5))
+
+
+def test_downsample_line_drops_warm_up_nans():
+    values = np.r_[[np.nan] * 19, np.arange(81.0)]
+    timestamps, out = charting.downsample_line(np.arange(100) * DAY, values, 1000)
+    assert len(out) == 81
+    assert timestamps[0] == 19 * DAY and not np.isnan(out).any()
+
+
+def test_with_live_candle_merges_into_the_last_bar():
+    data = bars(3)
+    last = data["timestamps"][-1]
+    candle = {"t": last, "open": 1.0, "high": data["high"][-1] + 5, "low": data["low"][-1],
+              "close": 123.0, "volume": 1.0}
+    merged = charting.with_live_candle(data, candle)
+    assert len(merged["close"]) == 3
+    assert merged["close"][-1] == 123.0
+    assert merged["high"][-1] == candle["high"]
+    assert merged["open"][-1] == data["open"][-1]
+    assert merged["volume"][-1] == data["volume"][-1]
+    assert data["close"][-1] != 123.0  # input not modified
+
+
+def test_with_live_candle_appends_a_new_bar_and_ignores_stale_ones():
+    data = bars(3)
+    candle = {"t": data["timestamps"][-1] + DAY, "open": 1.0, "high": 2.0, "low": 0.5,
+              "close": 1.5, "volume": 10.0}
+    appended = charting.with_live_candle(data, candle)
+    assert appended["timestamps"][-1] == candle["t"] and appended["close"][-1] == 1.5
+    assert len(data["timestamps"]) == 3
+
+    stale = dict(candle, t=data["timestamps"][0] - DAY)
+    assert charting.with_live_candle(data, stale) is data
+    assert charting.with_live_candle(data, None) is data
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from agents import forecasting
+
+
+def test_drift_extrapolates_mean_log_return():
+    close = 100 * 1.01 ** np.arange(80)
+    result = forecasting.forecast(close, horizon=5, method="drift")
+    assert result["predicted"][0] == pytest.approx(close[-1] * 1.01 ** 5)
+    # constant returns: no volatility, so a zero-width interval
+    assert result["volatility"][0] == pytest.approx(0.0, abs=1e-12)
+    assert result["lower"][0] == pytest.approx(result["upper"][0])
+
+
+def test_flat_series_forecasts_last_close():
+    close = np.full(60, 50.0)
+    for method in forecasting.METHODS:
+        assert forecasting.forecast(close, 7, method)["predicted"][0] == pytest.approx(50.0)
+
+
+def test_ets_follows_a_linear_trend():
+    close = 100 + 2.0 * np.arange(200)
+    assert forecasting.forecast(close, 3, "ets")["predicted"][0] == pytest.approx(close[-1] + 6, rel=1e-3)
+
+
+def test_ar_mean_reverts_after_a_jump():
+    rng = np.random.default_rng(1)
+    # strongly negatively autocorrelated returns: a big up day predicts a down move
+    returns = np.empty(120)
+    returns[0] = 0.01
+    for i in range(1, len(returns)):
+        returns[i] = -0.8 * returns[i - 1] + rng.normal(0, 0.001)
+    close = 100 * np.exp(np.cumsum(returns))
+    last_return = np.log(close[-1] / close[-2])
+    predicted = forecasting.forecast(close, 1, "ar")["predicted"][0]
+    assert np.sign(predicted - close[-1]) == -np.sign(last_return)
+
+
+def test_interval_contains_prediction_and_widens_with_horizon():
+    rng = np.random.default_rng(2)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 100)))
+    short = forecasting.forecast(close, 1, "drift")
+    long = forecasting.forecast(close, 20, "drift")
+    assert short["lower"][0] < short["predicted"][0] < short["upper"][0]
+    assert long["upper"][0] / long["lower"][0] > short["upper"][0] / short["lower"][0]
+
+
+def test_batch_matches_single_symbol_forecasts():
+    rng = np.random.default_rng(3)
+    long = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))
+    short = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 70)))
+    histories = {"A": long.tolist(), "B": short.tolist()}
+    for method in forecasting.METHODS:
+        batch = forecasting.predict_many(histories, 7, method)
+        for ticker, close in histories.items():
+            single = forecasting.predict(close, 7, method)
+            assert batch[ticker]["predicted_price"] == pytest.approx(single["predicted_price"])
+
+
+def test_confidence_levels_match_scalar_rule():
+    predicted = np.array([100.0, 100.0, 100.0])
+    lower = np.array([97.0, 92.0, 80.0])
+    upper = np.array([103.0, 108.0, 120.0])
+    levels = forecasting.confidence_levels(predicted, lower, upper).tolist()
+    assert levels == ["high", "medium", "low"]
+    assert levels == [forecasting._confidence(*args) for args in zip(predicted, lower, upper)]
+
+
+def test_prediction_has_llm_predictor_shape():
+    prediction = forecasting.predict(np.linspace(100, 110, 60), 7, "drift")
+    assert {"predicted_price", "confidence", "reasoning", "method"} <= set(prediction)
+    assert prediction["lower"] <= prediction["predicted_price"] <= prediction["upper"]
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        forecasting.forecast([1.0, 2.0, 3.0], 7, "prophet")
@@ -0,0 +1,63 @@
+import copy
+
+import pytest
+
+from agents import fused_analyst
+
+VALID = {
+    "news_analysis": "Mostly positive coverage.",
+    "summary": "Steady uptrend.",
+    "prediction": {"predicted_price": 101, "confidence": " High ", "reasoning": "Momentum."},
+    "advice": "Hold.",
+}
+
+
+def response(**overrides):
+    result = copy.deepcopy(VALID)
+    for field, value in overrides.items():
+        target = result["prediction"] if field in VALID["prediction"] else result
+        if value is None:
+            del target[field]
+        else:
+            target[field] = value
+    return result
+
+
+def test_valid_response_is_normalized():
+    result = fused_analyst.validate(response())
+    assert result["prediction"]["confidence"] == "high"
+    assert isinstance(result["prediction"]["predicted_price"], float)
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"advice": None}, "missing field 'advice'"),
+    ({"reasoning": None}, "missing field 'prediction.reasoning'"),
+    ({"summary": 3}, "field 'summary' has type int"),
+    ({"predicted_price": "101"}, "field 'prediction.predicted_price' has type str"),
+    ({"predicted_price": True}, "field 'prediction.predicted_price' has type bool"),
+    ({"news_analysis": "  "}, "field 'news_analysis' is empty"),
+    ({"prediction": "up"}, "prediction. is not an object"),
+    ({"confidence": "certain"}, "confidence 'certain' is not one of"),
+])
+def test_invalid_response_names_the_field(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        fused_analyst.validate(response(**overrides))
+
+
+def test_non_object_response_is_rejected():
+    with pytest.raises(ValueError, match="response is not an object"):
+        fused_analyst.validate(["not", "a", "dict"])
+
+
+def test_analyze_ticker_extracts_and_validates(monkeypatch):
+    reply = 'Sure:\n{"news_analysis": "ok", "summary": "ok", "advice": "ok", ' \
+            '"prediction": {"predicted_price": 10, "confidence": "low", "reasoning": "ok"}}'
+    monkeypatch.setattr(fused_analyst, "chat_with_groq", lambda *args, **kwargs: reply)
+    result = fused_analyst.analyze_ticker("AAPL", [], "", {"close": [10.0] * 30})
+    assert result["prediction"] == {"predicted_price": 10.0, "confidence": "low", "reasoning": "ok"}
+
+
+@pytest.mark.parametrize("reply", ["Error: rate limited", '{"summary": "only"}', "{not json}"])
+def test_analyze_ticker_returns_none_on_unusable_reply(monkeypatch, reply):
+    monkeypatch.setattr(fused_analyst, "chat_with_groq", lambda *args, **kwargs: reply)
+    assert fused_analyst.analyze_ticker("AAPL", [], "", {}) is None
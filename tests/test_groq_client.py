@@ -0,0 +1,48 @@
+import pytest
+
+import groq_client
+import http_client
+import llm_cache
+
+MESSAGES = [{"role": "user", "content": "How is AAPL doing?"}]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = llm_cache.LLMCache(path=None)
+    monkeypatch.setattr(llm_cache, "ENABLED", True)
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def get_session():
+        raise AssertionError("cache hit went to the network")
+    monkeypatch.setattr(http_client, "get_session", get_session)
+
+
+def cache_key(model="llama-3.3-70b-versatile", temperature=0.4):
+    messages, _, _ = groq_client._apply_budget(MESSAGES, None, None)
+    return llm_cache.make_key(model, messages, temperature)
+
+
+def test_both_chat_functions_serve_the_same_cache_entry(cache, offline):
+    cache.set(cache_key(), "Cached answer", 60)
+    assert groq_client.chat_with_groq(MESSAGES) == "Cached answer"
+    assert list(groq_client.chat_with_groq_stream(MESSAGES)) == ["Cached answer"]
+    assert cache.stats()["hits"] == 2
+
+
+def test_cached_reply_miss_and_bypass(cache):
+    key = cache_key()
+    assert groq_client._cached_reply("llama-3.3-70b-versatile", MESSAGES, 0.4) == (key, None)
+    cache.set(key, "Cached answer", 60)
+    with llm_cache.bypass():
+        assert groq_client._cached_reply("llama-3.3-70b-versatile", MESSAGES, 0.4) == (key, None)
+    assert groq_client._cached_reply("llama-3.3-70b-versatile", MESSAGES, 0.4) == (key, "Cached answer")
+
+
+def test_cached_reply_when_disabled(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "ENABLED", False)
+    assert groq_client._cached_reply("llama-3.3-70b-versatile", MESSAGES, 0.4) == (None, None)
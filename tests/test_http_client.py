@@ -0,0 +1,148 @@
+import io
+import types
+
+import pytest
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+import http_client
+
+URL = "https://api.groq.com/openai/v1/chat/completions"
+
+
+class Clock:
+    """Fake monotonic clock that sleep() advances"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def response(status, headers=None):
+    raw = urllib3.HTTPResponse(body=io.BytesIO(b""), headers=headers or {}, status=status,
+                               preload_content=False)
+    resp = requests.Response()
+    resp.status_code, resp.raw, resp.url = status, raw, URL
+    resp.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    return resp
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Scripted results for the adapter's single urllib3 attempt"""
+    script, sent, tokens = [], [], []
+
+    def send(adapter, request, **kwargs):
+        sent.append(request.method)
+        result = script.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    clock = Clock()
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    monkeypatch.setattr(http_client, "time",
+                        types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    monkeypatch.setattr(http_client.rate_limiter, "acquire_for_url", tokens.append)
+    session = http_client.configure_session(requests.Session())
+    return types.SimpleNamespace(script=script, sent=sent, tokens=tokens, clock=clock,
+                                 session=session)
+
+
+def test_retry_after_is_honoured(transport):
+    transport.script += [response(429, {"Retry-After": "7"}), response(200)]
+    assert transport.session.post(URL, json={}).status_code == 200
+    assert transport.clock.sleeps == [7]
+    assert transport.sent == ["POST", "POST"]
+
+
+def test_backoff_without_retry_after_grows(transport, monkeypatch):
+    monkeypatch.setattr(http_client, "MAX_RETRIES", 3)
+    adapter = http_client.TimeoutHTTPAdapter(retry=http_client.build_retry())
+    adapter.retry = adapter.retry.new(backoff_jitter=0)
+    transport.session.mount("https://", adapter)
+    transport.script += [response(503), response(503), response(503), response(200)]
+    assert transport.session.get(URL).status_code == 200
+    assert transport.clock.sleeps == [0, 1.0, 2.0]
+
+
+def test_gives_up_when_the_next_retry_would_pass_the_deadline(transport, monkeypatch):
+    monkeypatch.setattr(http_client, "RETRY_DEADLINE", 10)
+    transport.script += [response(503, {"Retry-After": "4"}) for _ in range(5)]
+    resp = transport.session.get(URL)
+    # attempts at t=0, 4 and 8; a retry at t=12 would be past the deadline
+    assert resp.status_code == 503
+    assert transport.sent == ["GET"] * 3
+    assert transport.clock.now == 8
+
+
+def test_retries_stop_after_max_retries(transport):
+    transport.script += [response(500) for _ in range(http_client.MAX_RETRIES + 1)]
+    transport.script.append(response(200))
+    assert transport.session.get(URL).status_code == 500
+    assert len(transport.sent) == http_client.MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("method", ["POST", "GET"])
+def test_read_timeouts_are_not_retried(transport, method):
+    transport.script += [requests.exceptions.ReadTimeout("slow completion"), response(200)]
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        transport.session.request(method, URL)
+    assert transport.sent == [method]
+
+
+def test_connection_errors_are_retried(transport):
+    transport.script += [requests.exceptions.ConnectionError("refused"), response(200)]
+    assert transport.session.get(URL).status_code == 200
+    assert len(transport.sent) == 2
+
+
+def test_non_idempotent_error_statuses_are_not_retried(transport):
+    transport.script += [response(503), response(200)]
+    assert transport.session.patch(URL).status_code == 503
+    assert transport.sent == ["PATCH"]
+
+
+def test_every_attempt_takes_a_rate_limit_token(transport):
+    transport.script += [response(429, {"Retry-After": "0"}), requests.exceptions.ConnectionError("reset"),
+                         response(503, {"Retry-After": "0"}), response(200)]
+    assert transport.session.post(URL).status_code == 200
+    assert transport.tokens == [URL] * 4
+
+
+def test_default_timeout_is_applied(transport, monkeypatch):
+    seen = []
+    monkeypatch.setattr(HTTPAdapter, "send",
+                        lambda adapter, request, **kwargs: seen.append(kwargs["timeout"]) or response(200))
+    transport.session.get(URL)
+    transport.session.get(URL, timeout=3)
+    assert seen == [(http_client.CONNECT_TIMEOUT, http_client.READ_TIMEOUT), 3]
+
+
+def refused():
+    reason = urllib3.exceptions.NewConnectionError(None, "connection refused")
+    return requests.exceptions.ConnectionError(urllib3.exceptions.MaxRetryError(None, URL, reason))
+
+
+@pytest.mark.parametrize("method", ["PATCH", "POST", "GET"])
+def test_failed_connects_are_retried_for_any_method(transport, method):
+    transport.script += [refused(), response(200)]
+    assert transport.session.request(method, URL).status_code == 200
+    assert transport.sent == [method, method]
+
+
+@pytest.mark.parametrize("method", ["PATCH", "GET"])
+def test_connection_lost_mid_request_is_not_retried(transport, method):
+    lost = urllib3.exceptions.ProtocolError("Connection aborted.", ConnectionResetError())
+    transport.script += [requests.exceptions.ConnectionError(lost), response(200)]
+    with pytest.raises(requests.exceptions.ConnectionError):
+        transport.session.request(method, URL)
+    assert transport.sent == [method]
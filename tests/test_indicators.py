@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from agents import indicators, price_analyst
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))
+
+
+def naive_ema(values, span):
+    alpha = 2.0 / (span + 1)
+    out = [values[0]]
+    for v in values[1:]:
+        out.append(alpha * v + (1 - alpha) * out[-1])
+    return np.array(out)
+
+
+def test_sma_and_bollinger_match_direct_windows(close):
+    sma = indicators.sma(close, 20)[0]
+    middle, upper, lower = (band[0] for band in indicators.bollinger(close, 20, 2.0))
+    assert np.isnan(sma[:19]).all()
+    for i in range(19, len(close)):
+        window = close[i - 19:i + 1]
+        assert sma[i] == pytest.approx(window.mean())
+        assert upper[i] == pytest.approx(window.mean() + 2 * window.std())
+        assert lower[i] == pytest.approx(window.mean() - 2 * window.std())
+    np.testing.assert_allclose(middle, sma, equal_nan=True)
+
+
+def test_ema_matches_recursive_definition(close):
+    np.testing.assert_allclose(indicators.ema(close, 12)[0], naive_ema(close, 12))
+
+
+def test_rsi_bounds_and_extremes(close):
+    values = indicators.rsi(close, 14)[0]
+    assert np.isnan(values[:14]).all()
+    assert ((values[14:] >= 0) & (values[14:] <= 100)).all()
+    assert indicators.rsi(np.arange(1.0, 40.0), 14)[0, -1] == 100.0
+    assert indicators.rsi(np.arange(40.0, 1.0, -1), 14)[0, -1] == pytest.approx(0.0)
+
+
+def test_macd_histogram_is_line_minus_signal(close):
+    line, signal, hist = indicators.macd(close)
+    np.testing.assert_allclose(line[0], naive_ema(close, 12) - naive_ema(close, 26))
+    np.testing.assert_allclose(hist, line - signal)
+
+
+def test_drawdown_from_running_peak():
+    dd = indicators.drawdown([100.0, 120.0, 90.0, 130.0])[0]
+    np.testing.assert_allclose(dd, [0.0, 0.0, -0.25, 0.0])
+
+
+def test_batch_rows_match_single_symbol_runs(close):
+    short = close[-60:]
+    batch = indicators.compute_indicators(indicators.to_matrix([close, short]))
+    single = indicators.compute_indicators(short)
+    for name in ("sma_20", "ema_12", "rsi_14", "bb_upper", "volatility_20"):
+        # the NaN-padded row starts when its data does
+        np.testing.assert_allclose(batch[name][1, -60:], single[name][0], equal_nan=True)
+
+
+def test_gap_invalidates_rolling_window(close):
+    gapped = close.copy()
+    gapped[50] = np.nan
+    sma = indicators.sma(gapped, 20)[0]
+    assert np.isnan(sma[50:70]).all()
+    assert not np.isnan(sma[70])
+
+
+def test_price_indicators_are_aligned_with_bars(close):
+    data = {"close": close.tolist(), "high": (close * 1.01).tolist(), "low": (close * 0.99).tolist()}
+    result = price_analyst.compute_price_indicators(data)
+    assert all(len(values) == len(close) for values in result.values() if np.ndim(values))
+    assert "atr_14" in result
+    assert "Error" not in price_analyst.analyze_price_data(data)
@@ -0,0 +1,115 @@
+import threading
+import types
+
+import pytest
+
+import llm_cache
+
+
+class Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def key(n):
+    return llm_cache.make_key("model", [{"role": "user", "content": str(n)}], 0.0)
+
+
+def test_key_depends_on_every_input():
+    messages = [{"role": "user", "content": "AAPL?"}]
+    base = llm_cache.make_key("m", messages, 0.2)
+    assert base == llm_cache.make_key("m", [dict(messages[0])], 0.2)
+    assert len({base, llm_cache.make_key("n", messages, 0.2),
+                llm_cache.make_key("m", messages, 0.3),
+                llm_cache.make_key("m", [{"role": "user", "content": "MSFT?"}], 0.2)}) == 4
+
+
+@pytest.mark.parametrize("agent", ["ticker_extractor", "news_analyst", "unknown_agent"])
+def test_entries_expire_after_their_agents_ttl(clock, agent):
+    cache = llm_cache.LLMCache(path=None)
+    ttl = llm_cache.ttl_for(agent)
+    cache.set(key(1), "reply", ttl)
+    clock.now += ttl - 1
+    assert cache.get(key(1)) == "reply"
+    clock.now += 2
+    assert cache.get(key(1)) is None
+
+
+def test_agent_ttls():
+    assert llm_cache.ttl_for("ticker_extractor") > llm_cache.ttl_for("news_analyst")
+    assert llm_cache.ttl_for("unknown_agent") == llm_cache.DEFAULT_TTL
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = llm_cache.LLMCache(path=None, memory_size=2)
+    cache.set(key(1), "one", 60)
+    cache.set(key(2), "two", 60)
+    assert cache.get(key(1)) == "one"  # key 2 is now the oldest
+    cache.set(key(3), "three", 60)
+    assert cache.get(key(2)) is None
+    assert cache.get(key(1)) == "one" and cache.get(key(3)) == "three"
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_a_new_instance(clock, tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    llm_cache.LLMCache(path=path).set(key(1), "persisted", 60)
+
+    fresh = llm_cache.LLMCache(path=path)
+    assert fresh.get(key(1)) == "persisted"
+    assert fresh.get(key(1)) == "persisted"  # now served from memory
+    stats = fresh.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+    clock.now += 61
+    assert llm_cache.LLMCache(path=path).get(key(1)) is None
+
+
+def test_disk_eviction_keeps_recently_used_rows(clock, tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "EVICT_EVERY", 4)
+    cache = llm_cache.LLMCache(path=str(tmp_path / "llm.sqlite3"), memory_size=1, disk_size=2)
+    for n in range(3):
+        cache.set(key(n), str(n), 60)
+        clock.now += 1
+    cache.get(key(0))  # touch the oldest row on disk
+    clock.now += 1
+    cache.set(key(3), "3", 60)  # fourth write runs the eviction pass
+    reopened = llm_cache.LLMCache(path=str(tmp_path / "llm.sqlite3"))
+    assert [reopened.get(key(n)) for n in range(4)] == ["0", None, None, "3"]
+
+
+def test_hit_and_miss_counters(clock):
+    cache = llm_cache.LLMCache(path=None)
+    assert cache.get(key(1)) is None
+    cache.set(key(1), "reply", 60)
+    cache.get(key(1))
+    cache.get(key(1))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (2, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_bypass_is_scoped_to_the_block_and_context():
+    assert not llm_cache.bypassed()
+    seen = []
+    with llm_cache.bypass():
+        assert llm_cache.bypassed()
+        with llm_cache.bypass(False):
+            assert not llm_cache.bypassed()
+        assert llm_cache.bypassed()
+        # a plain thread starts from the default context
+        thread = threading.Thread(target=lambda: seen.append(llm_cache.bypassed()))
+        thread.start()
+        thread.join()
+    assert not llm_cache.bypassed()
+    assert seen == [False]
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import news_store
+
+
+def article(title, source="Reuters", url=None, published="2024-05-01T12:00:00Z"):
+    return {"title": title, "source": {"name": source}, "url": url or "https://x/" + title.replace(" ", "-"),
+            "publishedAt": published}
+
+
+def test_normalize_title_strips_source_and_punctuation():
+    assert news_store.normalize_title("Apple's Q2 Beats! - Reuters", "Reuters") == "apple s q2 beats"
+    assert news_store.normalize_title("Apple - Reuters", "Bloomberg") == "apple reuters"
+
+
+def test_similarity_separates_reprints_from_other_stories():
+    sig = news_store.signature("Apple beats quarterly revenue estimates on iPhone sales")
+    reprint = news_store.signature("Apple beats quarterly revenue estimates on strong iPhone sales - CNBC", "CNBC")
+    other = news_store.signature("Tesla recalls 2 million vehicles over autopilot")
+    assert sig.shape == (news_store.NUM_HASHES,)
+    scores = news_store.similarity(np.stack([reprint, other]), sig)
+    assert scores[0] >= news_store.DUPLICATE_THRESHOLD > scores[1]
+
+
+def test_merge_skips_seen_urls_and_removed_articles():
+    state = {}
+    first = article("Apple unveils new iPad lineup", url="https://a/1")
+    assert news_store.merge(state, [first, article("[Removed]", url="https://a/2")]) == 1
+    assert news_store.merge(state, [first]) == 0
+    assert [a["title"] for a in state["articles"]] == ["Apple unveils new iPad lineup"]
+    assert state["seen_urls"] == ["https://a/1"]
+
+
+def test_merge_collapses_near_duplicate_headlines():
+    state = {}
+    added = news_store.merge(state, [
+        article("Apple beats quarterly revenue estimates on iPhone sales", url="https://a/1",
+                published="2024-05-01T10:00:00Z"),
+        article("Apple beats quarterly revenue estimates on strong iPhone sales", "CNBC",
+                url="https://b/1", published="2024-05-01T11:00:00Z"),
+        article("Tesla recalls 2 million vehicles over autopilot", url="https://a/2",
+                published="2024-05-01T12:00:00Z"),
+    ])
+    assert added == 2
+    # newest first; the reprint is counted on the original story
+    assert news_store.headlines(state, 5) == [
+        "Tesla recalls 2 million vehicles over autopilot - Reuters",
+        "Apple beats quarterly revenue estimates on iPhone sales - Reuters (+1 similar)",
+    ]
+    assert state["latest"] == "2024-05-01T12:00:00Z"
+    assert len(state["seen_urls"]) == 3
+
+
+def test_merge_keeps_the_newest_stories(monkeypatch):
+    monkeypatch.setattr(news_store, "MAX_ARTICLES", 2)
+    state = {}
+    news_store.merge(state, [
+        article(title, url=f"https://a/{i}", published=f"2024-05-0{i + 1}T00:00:00Z")
+        for i, title in enumerate(["Fed holds rates steady", "Oil prices jump on supply cuts",
+                                   "Nvidia shares hit a record high"])
+    ])
+    assert [a["title"] for a in state["articles"]] == [
+        "Nvidia shares hit a record high", "Oil prices jump on supply cuts"]
+    assert news_store.headlines(state, 1) == ["Nvidia shares hit a record high - Reuters"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    state = {}
+    news_store.merge(state, [article("Apple unveils new iPad lineup")])
+    news_store.save("BRK/B", state, store_dir=tmp_path)
+    assert news_store.load("BRK/B", store_dir=tmp_path) == state
+    assert news_store.load("MSFT", store_dir=tmp_path) == {}
+
+
+@pytest.mark.parametrize("contents", ["", "{truncated"])
+def test_load_ignores_unreadable_files(tmp_path, contents):
+    with open(news_store._path("AAPL", tmp_path), "w") as f:
+        f.write(contents)
+    assert news_store.load("AAPL", store_dir=tmp_path) == {}
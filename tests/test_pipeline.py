@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+import pipeline
+from pipeline import Stage
+
+
+def run(stages, context=None, **kwargs):
+    context = {"x": 1} if context is None else context
+    return list(pipeline.run_stages(stages, context, **kwargs)), context
+
+
+def test_stages_run_after_their_inputs():
+    stages = [
+        Stage("c", lambda a, b: a + b, ["a", "b"]),
+        Stage("b", lambda a: a * 10, ["a"]),
+        Stage("a", lambda x: x + 1, ["x"]),
+    ]
+    events, context = run(stages)
+    assert events == [("done", "a", 2), ("done", "b", 20), ("done", "c", 22)]
+    assert context == {"x": 1, "a": 2, "b": 20, "c": 22}
+
+
+def test_independent_stages_run_in_parallel():
+    # each stage waits for the other; run one after another they would time out
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [Stage(name, lambda x: barrier.wait() is not None, ["x"]) for name in ("left", "right")]
+    started = time.monotonic()
+    events, _ = run(stages, max_workers=2)
+    assert sorted(name for _, name, _ in events) == ["left", "right"]
+    assert time.monotonic() - started < 5
+
+
+def test_streaming_stage_forwards_deltas_and_joins_them():
+    stages = [Stage("text", lambda x: iter(["he", "llo"]), ["x"], stream=True),
+              Stage("shout", str.upper, ["text"])]
+    events, context = run(stages)
+    assert events == [("delta", "text", "he"), ("delta", "text", "llo"),
+                      ("done", "text", "hello"), ("done", "shout", "HELLO")]
+
+
+def test_unsatisfiable_inputs_are_reported():
+    stages = [Stage("a", lambda x: x, ["x"]), Stage("b", lambda y: y, ["missing"])]
+    generator = pipeline.run_stages(stages, {"x": 1})
+    assert next(generator) == ("done", "a", 1)
+    with pytest.raises(ValueError, match="unsatisfiable"):
+        next(generator)
+
+
+def test_stage_error_propagates_and_stops_dependents():
+    ran = []
+
+    def fail(x):
+        raise RuntimeError("LLM unavailable")
+
+    stages = [
+        Stage("bad", fail, ["x"]),
+        Stage("after_bad", lambda bad: ran.append("after_bad"), ["bad"]),
+        Stage("slow", lambda x: time.sleep(0.1) or ran.append("slow"), ["x"]),
+    ]
+    with pytest.raises(RuntimeError, match="LLM unavailable"):
+        run(stages, max_workers=3)
+    # the independent stage already running is allowed to finish
+    assert ran == ["slow"]
+
+
+def test_run_analysis_replaces_stages_and_seeds_the_context():
+    stages = [Stage("summary", lambda news, price_data: f"{news[0]} @ {price_data['c']}",
+                    ["news", "price_data"])]
+    events = list(pipeline.run_analysis("AAPL", ["headline"], {"c": 1.0}, {}, stages=stages))
+    assert events == [("done", "summary", "headline @ 1.0")]
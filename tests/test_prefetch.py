@@ -0,0 +1,62 @@
+import pytest
+
+import prefetch
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def popularity(monkeypatch):
+    tracker = prefetch.Popularity()
+    monkeypatch.setattr(prefetch, "popularity", tracker)
+    monkeypatch.setattr(prefetch, "reader_max_age", lambda kind, is_open=None: 1000)
+    return tracker
+
+
+def queried(tracker, ticker, count, now=NOW):
+    for _ in range(count):
+        tracker.record(ticker, now)
+
+
+def test_unqueried_symbols_refresh_just_under_the_max_age(popularity):
+    assert prefetch.interval_for("quote", "AAPL", now=NOW) == pytest.approx(900)
+    assert prefetch.interval_for("quote", now=NOW) == pytest.approx(900)
+
+
+def test_popular_symbols_refresh_more_often(popularity):
+    queried(popularity, "AAPL", 5)
+    queried(popularity, "MSFT", 10)
+    queried(popularity, "NVDA", 1000)
+    assert prefetch.interval_for("quote", "AAPL", now=NOW) == pytest.approx(450)
+    assert prefetch.interval_for("quote", "MSFT", now=NOW) == pytest.approx(300)
+    # bounded by MAX_SPEEDUP
+    assert prefetch.interval_for("quote", "NVDA", now=NOW) == pytest.approx(900 / prefetch.MAX_SPEEDUP)
+
+
+def test_interval_relaxes_as_popularity_decays(popularity):
+    queried(popularity, "AAPL", 10)
+    later = NOW + 10 * prefetch.POPULARITY_HALF_LIFE
+    intervals = [prefetch.interval_for("quote", "AAPL", now=t) for t in (NOW, NOW + 3600, later)]
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == pytest.approx(900, rel=0.01)
+
+
+def test_interval_floor(popularity, monkeypatch):
+    monkeypatch.setattr(prefetch, "reader_max_age", lambda kind, is_open=None: 0)
+    assert prefetch.interval_for("quote", "AAPL", now=NOW) == prefetch.MIN_INTERVAL
+
+
+def test_jobs_are_rescheduled_by_popularity(popularity, monkeypatch):
+    monkeypatch.setattr(prefetch, "_refresh", lambda kind, ticker: None)
+    queried(popularity, "TSLA", 10, now=prefetch.time.time())
+    scheduler = prefetch.PrefetchScheduler(watchlist=["AAPL"], workers=1)
+    try:
+        now = prefetch.time.time()
+        for ticker in ("AAPL", "TSLA", "AMD"):
+            scheduler._run_job("quote", ticker)
+        due = {ticker: at - now for at, _, ticker in scheduler._heap}
+        assert due["AAPL"] == pytest.approx(900, abs=5)
+        assert due["TSLA"] == pytest.approx(300, abs=5)
+        assert "AMD" not in due  # neither watched nor popular
+    finally:
+        scheduler.stop()
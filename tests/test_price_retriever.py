@@ -0,0 +1,163 @@
+import sys
+import time
+import types
+
+import pytest
+
+import candle_store
+from agents import price_retriever
+
+DAY = candle_store.DAY_SECONDS
+
+
+def candles(start, end):
+    """Candle dict with one bar per day between two unix timestamps"""
+    days = list(range(start - start % DAY, end + 1, DAY))
+    return {"timestamps": days, "open": [1.0] * len(days), "high": [2.0] * len(days),
+            "low": [0.5] * len(days), "close": [float(t // DAY) for t in days],
+            "volume": [100.0] * len(days)}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def stored_days(start, end, fetched_at):
+    """Store bars for [start, end] as if last fetched at fetched_at"""
+    data = candles(start, end)
+    candle_store.save("AAPL", candle_store.from_dict(data),
+                      {"covered_from": start, "fetched_at": fetched_at})
+
+
+def test_failed_tail_refresh_is_not_stamped_fresh(store, monkeypatch):
+    now = int(time.time())
+    stale = now - 2 * candle_store.REFRESH_SECONDS
+    stored_days(now - 30 * DAY, now - 2 * DAY, stale)
+    fetched = []
+
+    def fetch(ticker, start, end):
+        fetched.append((start, end))
+        if end >= now:
+            return {"error": "tail unavailable", "timestamps": []}
+        return candles(start, end)
+
+    monkeypatch.setattr(price_retriever, "_fetch_candles", fetch)
+    data = price_retriever.get_historical_data("AAPL", days=90)
+    assert len(fetched) == 2  # head backfill and stale tail
+    meta = candle_store.load_meta("AAPL")
+    assert meta["covered_from"] <= now - 90 * DAY
+    assert meta["fetched_at"] == stale
+    assert data["timestamps"][0] <= now - 88 * DAY
+
+    # the tail is still due on the next call
+    monkeypatch.setattr(price_retriever, "_fetch_candles",
+                        lambda ticker, start, end: fetched.append((start, end)) or candles(start, end))
+    price_retriever.get_historical_data("AAPL", days=90)
+    assert fetched[-1][1] >= now
+    assert candle_store.load_meta("AAPL")["fetched_at"] >= now
+
+
+def test_fresh_store_is_served_without_fetching(store, monkeypatch):
+    now = int(time.time())
+    stored_days(now - 100 * DAY, now, now)
+    monkeypatch.setattr(price_retriever, "_fetch_candles",
+                        lambda *args: pytest.fail("unexpected download"))
+    data = price_retriever.get_historical_data("AAPL", days=30)
+    assert 29 <= len(data["timestamps"]) <= 31
+
+
+def market(tickers, start, end):
+    """Deterministic bars per ticker, as served by either provider path"""
+    data = {}
+    for n, ticker in enumerate(tickers):
+        bars = candles(start, end)
+        bars["close"] = [c + n for c in bars["close"]]
+        data[ticker] = bars
+    return data
+
+
+def sliced(bars, start, end):
+    keep = [i for i, t in enumerate(bars["timestamps"]) if start - start % DAY <= t <= end]
+    return {key: [values[i] for i in keep] for key, values in bars.items()}
+
+
+def test_batch_history_matches_single_history(tmp_path, monkeypatch):
+    now = int(time.time())
+    tickers = ["AAPL", "MSFT", "NVDA", "AMD", "TSLA"]
+    bars = market(tickers, now - 200 * DAY, now)
+    monkeypatch.setattr(price_retriever, "_fetch_candles",
+                        lambda ticker, start, end: sliced(bars[ticker], start, end))
+    downloads = []
+
+    def download_many(chunk, start, end):
+        downloads.append(list(chunk))
+        # TSLA is missing from the bulk response and falls back to a single fetch
+        return {t: sliced(bars[t], start, end) for t in chunk if t != "TSLA"}
+
+    monkeypatch.setattr(price_retriever, "_download_many", download_many)
+
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path / "batch"))
+    # one symbol already stored with a stale tail
+    candle_store.save("MSFT", candle_store.from_dict(sliced(bars["MSFT"], now - 120 * DAY, now - 3 * DAY)),
+                      {"covered_from": now - 120 * DAY, "fetched_at": 0})
+    batch = price_retriever.get_historical_data_many(tickers + ["AAPL"], days=90)
+    assert list(batch) == tickers
+    assert downloads == [["AAPL", "NVDA", "AMD", "TSLA"], ["MSFT"]]
+    assert candle_store.load_meta("MSFT")["fetched_at"] >= now
+
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path / "single"))
+    for ticker in tickers:
+        assert batch[ticker] == price_retriever.get_historical_data(ticker, days=90)
+
+    # a second batch call is served from the store
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path / "batch"))
+    assert price_retriever.get_historical_data_many(tickers, days=90) == batch
+    assert len(downloads) == 2
+
+
+def test_bulk_download_takes_a_rate_limit_token_per_request(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    now = int(time.time())
+    tickers = ["AAPL", "MSFT", "NVDA", "AMD", "TSLA"]
+    bars = market(tickers, now - 10 * DAY, now)
+
+    def download(chunk, **kwargs):
+        frames = {t: pd.DataFrame({"Open": bars[t]["open"], "High": bars[t]["high"],
+                                   "Low": bars[t]["low"], "Close": bars[t]["close"],
+                                   "Volume": bars[t]["volume"]},
+                                  index=pd.to_datetime(bars[t]["timestamps"], unit="s", utc=True))
+                  for t in chunk if t != "AMD"}
+        return pd.concat(frames, axis=1)
+
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(download=download))
+    acquired = []
+    monkeypatch.setattr(price_retriever.rate_limiter, "acquire", acquired.append)
+    monkeypatch.setattr(price_retriever, "BATCH_SIZE", 2)
+    result = price_retriever._download_many(tickers, now - 10 * DAY, now)
+    assert acquired == ["yahoo"] * 3
+    assert sorted(result) == ["AAPL", "MSFT", "NVDA", "TSLA"]
+    assert result["NVDA"]["close"] == bars["NVDA"]["close"]
+
+
+def test_batch_quotes_match_single_quotes(monkeypatch):
+    requested = []
+
+    class Client:
+        def quote(self, ticker):
+            requested.append(ticker)
+            base = 100.0 + len(ticker)
+            return {"c": base, "h": base + 1, "l": base - 1, "o": base - 0.5, "pc": base - 0.25}
+
+    monkeypatch.setattr(price_retriever, "get_finnhub_client", lambda: Client())
+    tickers = ["AAPL", "MSFT", "GOOGL", "BRK.B"]
+    batch = price_retriever.get_price_data_many(tickers + ["MSFT"], max_age=0)
+    assert list(batch) == tickers
+    assert sorted(requested) == sorted(tickers)
+    for ticker in tickers:
+        assert batch[ticker] == price_retriever.get_price_data(ticker, max_age=0)
+    # cached quotes cost no request
+    requested.clear()
+    assert price_retriever.get_price_data_many(tickers, max_age=60) == batch
+    assert requested == []
@@ -0,0 +1,101 @@
+import sys
+
+import pytest
+
+import prompt_budget
+
+
+@pytest.fixture(params=["tiktoken", "estimate"])
+def counting(request, monkeypatch):
+    """Run each test with tiktoken (when its BPE file loads) and with the fallback estimate"""
+    if request.param == "estimate":
+        monkeypatch.setattr(prompt_budget, "_encoding", None)
+        monkeypatch.setattr(prompt_budget, "_encoding_failed", True)
+    elif prompt_budget._get_encoding() is None:
+        pytest.skip("tiktoken encoding unavailable")
+    return request.param
+
+
+def words(n, word="market"):
+    return " ".join([word] * n)
+
+
+def test_history_is_trimmed_before_the_question(counting):
+    messages = [
+        {"role": "system", "content": "You are a financial analyst."},
+        {"role": "user", "content": words(150, "earlier")},
+        {"role": "assistant", "content": words(150, "reply")},
+        # the longest message, but it is the question being asked
+        {"role": "user", "content": "Should I buy AAPL? " + words(250, "news")},
+    ]
+    fitted = prompt_budget.fit_messages(messages, 400)
+    assert prompt_budget.count_message_tokens(fitted) <= 400
+    assert fitted[0] == messages[0]
+    assert fitted[-1] == messages[-1]
+    assert len(fitted[1]["content"]) + len(fitted[2]["content"]) < len(messages[1]["content"])
+    assert messages[1]["content"] == words(150, "earlier")  # input untouched
+
+
+def test_single_question_is_trimmed_when_nothing_else_is(counting):
+    messages = [{"role": "system", "content": "Be brief."},
+                {"role": "user", "content": words(1000)}]
+    fitted = prompt_budget.fit_messages(messages, 300)
+    assert prompt_budget.count_message_tokens(fitted) <= 300
+    assert fitted[0] == messages[0]
+    assert fitted[1]["content"].startswith("market market")
+    assert fitted[1]["content"].endswith(prompt_budget.TRUNCATION_MARKER)
+
+
+@pytest.mark.parametrize("budget", [60, 150, 500])
+def test_prompt_is_trimmed_to_the_budget(counting, budget):
+    messages = [{"role": "system", "content": "System prompt."},
+                {"role": "user", "content": words(300, "news")},
+                {"role": "assistant", "content": words(200, "analysis")},
+                {"role": "user", "content": words(100, "question")}]
+    fitted = prompt_budget.fit_messages(messages, budget)
+    assert prompt_budget.count_message_tokens(fitted) <= budget
+    assert [m["role"] for m in fitted] == [m["role"] for m in messages]
+
+
+def test_prompt_within_budget_is_unchanged(counting):
+    messages = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "AAPL?"}]
+    fitted = prompt_budget.fit_messages(messages, 100)
+    assert fitted == messages and fitted is not messages
+
+
+def test_system_message_is_never_trimmed(counting):
+    messages = [{"role": "system", "content": words(200, "rules")},
+                {"role": "user", "content": words(50)}]
+    fitted = prompt_budget.fit_messages(messages, 100)
+    assert fitted[0] == messages[0]
+    assert fitted[1]["content"] == ""
+
+
+def test_truncate_text_keeps_the_beginning(counting):
+    text = words(500, "alpha")
+    truncated = prompt_budget.truncate_text(text, 50)
+    assert prompt_budget.count_tokens(truncated) <= 50
+    assert truncated.startswith("alpha alpha") and truncated.endswith(prompt_budget.TRUNCATION_MARKER)
+    assert prompt_budget.truncate_text("short", 50) == "short"
+    assert prompt_budget.truncate_text(text, 1) == ""
+
+
+def test_estimate_is_used_when_tiktoken_is_missing(monkeypatch, capsys):
+    monkeypatch.setattr(prompt_budget, "_encoding", None)
+    monkeypatch.setattr(prompt_budget, "_encoding_failed", False)
+    monkeypatch.setitem(sys.modules, "tiktoken", None)  # import raises ImportError
+
+    assert prompt_budget._get_encoding() is None
+    assert "tiktoken unavailable" in capsys.readouterr().out
+    assert prompt_budget._encoding_failed
+    assert prompt_budget.count_tokens("x" * 40) == 10
+    assert prompt_budget.count_tokens("x" * 41) == 11
+    assert prompt_budget.count_tokens("") == 0
+    # the failure is remembered: no second attempt or message
+    assert prompt_budget._get_encoding() is None
+    assert capsys.readouterr().out == ""
+
+
+def test_agent_budgets():
+    assert prompt_budget.budget_for("news_analyst") == prompt_budget.AGENT_BUDGETS["news_analyst"]
+    assert prompt_budget.budget_for("unknown") == prompt_budget.DEFAULT_BUDGET
@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+import pytest
+
+import quote_stream
+from quote_stream import QuoteStream, TickRing
+
+pytest.importorskip("websocket")
+from benchmarks.replay_server import ReplayServer  # noqa: E402
+
+SEED = {"open_price": 100.0, "high_price": 101.0, "low_price": 99.0, "current_price": 100.5}
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def server():
+    server = ReplayServer(rate=50).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def stream(server):
+    stream = QuoteStream(server.url).start()
+    yield stream
+    stream.stop()
+
+
+def test_ring_keeps_latest_trades_in_order():
+    ring = TickRing(size=4)
+    for i in range(6):
+        ring.append(i, 100 + i, 1)
+    assert ring.count == 6
+    assert ring.latest()["p"].tolist() == [102, 103, 104, 105]
+    assert ring.latest(2)["t"].tolist() == [4, 5]
+
+
+def test_replayed_trades_update_snapshot_candle(stream):
+    assert stream.subscribe("AAPL", SEED, owner="a")
+    assert wait_for(lambda: (stream.snapshot("AAPL") or {}).get("ticks", 0) >= 5)
+
+    snapshot = stream.snapshot("AAPL")
+    trades = stream.recent_trades("AAPL")
+    candle = snapshot["candle"]
+    assert snapshot["connected"]
+    assert snapshot["ticks"] == len(trades)
+    assert snapshot["price"] == candle["close"] == trades["p"][-1]
+    assert candle["t"] == int(time.time()) // quote_stream.CANDLE_SECONDS * quote_stream.CANDLE_SECONDS
+    # seeded from the REST quote, then widened by the streamed trades
+    assert candle["open"] == SEED["open_price"]
+    assert candle["high"] == max(SEED["high_price"], trades["p"].max())
+    assert candle["low"] == min(SEED["low_price"], trades["p"].min())
+    assert np.isclose(candle["volume"], trades["v"].sum())
+
+
+def test_symbol_is_dropped_when_its_last_owner_releases_it(stream):
+    stream.subscribe("AAPL", owner="a")
+    stream.subscribe("AAPL", owner="b")
+    stream.unsubscribe("AAPL", owner="a")
+    assert stream.symbols() == ["AAPL"]
+    stream.unsubscribe("AAPL", owner="b")
+    assert stream.symbols() == []
+    assert stream.snapshot("AAPL") is None
+
+
+def test_unrenewed_leases_lapse(stream, monkeypatch):
+    monkeypatch.setattr(quote_stream, "LEASE_SECONDS", 0.1)
+    stream.subscribe("AAPL", owner="a")
+    time.sleep(0.2)
+    stream.subscribe("MSFT", owner="a")
+    assert stream.symbols() == ["MSFT"]
+
+
+def test_subscriptions_are_capped(stream, monkeypatch):
+    monkeypatch.setattr(quote_stream, "MAX_SYMBOLS", 2)
+    assert stream.subscribe("AAPL")
+    assert stream.subscribe("MSFT")
+    assert not stream.subscribe("TSLA")
+    assert stream.subscribe("AAPL")  # renewing an existing symbol is fine
@@ -0,0 +1,177 @@
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+
+
+def drained(limit, period):
+    bucket = rate_limiter.TokenBucket(limit, period, burst=1)
+    bucket.acquire()
+    return bucket
+
+
+def test_bucket_allows_a_burst_up_to_capacity():
+    bucket = rate_limiter.TokenBucket(5, 60.0)
+    for _ in range(5):
+        assert bucket.acquire(max_wait=0) == pytest.approx(0, abs=0.01)
+    assert bucket.wait_time() == pytest.approx(12, rel=0.01)
+
+
+def test_bucket_refuses_a_token_beyond_max_wait():
+    bucket = drained(1, 60.0)
+    with pytest.raises(rate_limiter.RateLimitExceeded):
+        bucket.acquire(max_wait=1)
+    assert bucket._waiters == []
+
+
+def test_bucket_waits_for_the_refill():
+    bucket = drained(20, 1.0)
+    assert bucket.acquire(max_wait=1) == pytest.approx(0.05, abs=0.04)
+
+
+def test_waiters_are_served_by_priority():
+    bucket = drained(4, 1.0)
+    order = []
+
+    def take(name, priority):
+        bucket.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=("background", rate_limiter.BACKGROUND))]
+    threads[0].start()
+    time.sleep(0.05)  # background is queued first...
+    for name, priority in (("batch", rate_limiter.BATCH), ("interactive", rate_limiter.INTERACTIVE)):
+        threads.append(threading.Thread(target=take, args=(name, priority)))
+        threads[-1].start()
+    for thread in threads:
+        thread.join(timeout=5)
+    # ...but goes last
+    assert order == ["interactive", "batch", "background"]
+
+
+def test_daily_quota_fails_fast_when_exhausted():
+    limit = rate_limiter.ProviderLimit(per_minute=0, per_day=1)
+    limit.acquire(max_wait=1)
+    with pytest.raises(rate_limiter.RateLimitExceeded, match="daily"):
+        limit.acquire(max_wait=1)
+
+
+def test_priority_context_reaches_the_provider_limit(monkeypatch):
+    seen = []
+
+    class Recorder:
+        def acquire(self, priority):
+            seen.append(priority)
+            return 0.0
+
+    monkeypatch.setitem(rate_limiter._limits, "groq", Recorder())
+    with rate_limiter.priority(rate_limiter.BATCH):
+        rate_limiter.acquire_for_url("https://api.groq.com/openai/v1/chat/completions")
+    rate_limiter.acquire_for_url("https://api.groq.com/openai/v1/chat/completions")
+    assert seen == [rate_limiter.BATCH, rate_limiter.INTERACTIVE]
+
+
+@pytest.mark.parametrize("url, provider", [
+    ("https://api.groq.com/openai/v1", "groq"),
+    ("https://newsapi.org/v2/everything?q=AAPL", "newsapi"),
+    ("https://ws.finnhub.io/?token=x", "finnhub"),
+    ("https://notfinnhub.io/api", None),
+    ("https://query1.finance.yahoo.com/v8", "yahoo"),
+    ("https://example.com/finnhub.io", None),
+])
+def test_provider_for_url(url, provider):
+    assert rate_limiter.provider_for_url(url) == provider
+
+
+def test_single_flight_shares_one_call():
+    flight = rate_limiter.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"price": 1.0}
+
+    def call():
+        results.append(flight.do("quote:AAPL", fetch))
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(calls) == 1
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    # the key is released once the call finishes
+    assert flight.do("quote:AAPL", lambda: "again") == "again"
+
+
+def test_single_flight_propagates_errors_to_followers():
+    flight = rate_limiter.SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ConnectionError("provider down")
+
+    def call():
+        try:
+            flight.do("news:AAPL", fail)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(errors) == 3 and all(e is errors[0] for e in errors)
+
+
+def test_queued_waiter_counts_the_queue_against_max_wait():
+    bucket = drained(5, 1.0)  # a token every 0.2s
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    # the next free token is 0.15s away, but three waiters are ahead of this one
+    started = time.monotonic()
+    with pytest.raises(rate_limiter.RateLimitExceeded):
+        bucket.acquire(rate_limiter.BACKGROUND, max_wait=0.3)
+    assert time.monotonic() - started < 0.1
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_queued_waiter_gives_up_at_its_deadline():
+    bucket = drained(5, 1.0)
+    late = []
+
+    def background():
+        try:
+            bucket.acquire(rate_limiter.BACKGROUND, max_wait=0.5)
+        except rate_limiter.RateLimitExceeded:
+            late.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    thread = threading.Thread(target=background)
+    thread.start()
+    # interactive callers keep jumping the queue ahead of the background waiter
+    for _ in range(4):
+        bucket.acquire(rate_limiter.INTERACTIVE)
+    thread.join(timeout=5)
+    assert len(late) == 1 and late[0] <= 0.55
@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+import pytest
+
+from agents import sentiment
+
+
+@pytest.fixture
+def lexicon(tmp_path, monkeypatch):
+    path = tmp_path / "lexicon.csv"
+    path.write_text("term,weight\nbeats,1.0\nmisses,-1.0\nrecord high,1.5\ndowngrade,-1.2\n"
+                    "Profit Warning,-2.0\n", encoding="utf-8")
+    monkeypatch.setattr(sentiment, "_weights", sentiment.load_weights(str(path), None))
+
+
+def squash(total):
+    return math.tanh(total / sentiment.SCALE)
+
+
+def test_headlines_score_their_terms(lexicon):
+    scores = sentiment.score_headlines([
+        "Apple beats estimates",
+        "Nvidia hits record high as chip demand beats forecasts",
+        "Boeing issues profit warning after downgrade",
+        "Fed meeting on Wednesday",
+    ])
+    assert scores.tolist() == pytest.approx([squash(1.0), squash(2.5), squash(-3.2), 0.0])
+
+
+def test_negators_flip_the_following_words(lexicon):
+    scores = sentiment.score_headlines(["Tesla misses", "Tesla not misses", "no clear sign Tesla beats"])
+    assert scores[0] == pytest.approx(squash(-1.0))
+    assert scores[1] == pytest.approx(squash(1.0))
+    assert scores[2] == pytest.approx(squash(1.0))  # beats is outside the negation window
+
+
+def test_batch_scores_match_single_scores(lexicon):
+    titles = ["Apple beats estimates", "", "Boeing downgrade", "Apple beats and misses"]
+    batch = sentiment.score_headlines(titles)
+    assert batch.tolist() == pytest.approx([sentiment.score_headlines([t])[0] for t in titles])
+
+
+def test_parse_headline_splits_source_and_reprints():
+    assert sentiment.parse_headline("Apple beats - Reuters (+3 similar)") == ("Apple beats", 3)
+    assert sentiment.parse_headline("AT&T - Verizon merger talk - CNBC") == ("AT&T - Verizon merger talk", 0)
+    assert sentiment.parse_headline("No source") == ("No source", 0)
+
+
+def test_aggregate_is_weighted_by_reprints(lexicon):
+    result = sentiment.analyze([
+        "Apple beats estimates - Reuters (+2 similar)",
+        "Apple misses on services - CNBC",
+        "Apple event on Monday - Bloomberg",
+    ])
+    beats, misses = squash(1.0), squash(-1.0)
+    assert result["score"] == pytest.approx((3 * beats + misses) / 5, abs=1e-3)
+    assert result["label"] == "positive"  # unweighted, the mean would be neutral
+    assert (result["count"], result["positive"], result["negative"]) == (3, 1, 1)
+    assert [a["headline"] for a in result["articles"]] == [
+        "Apple beats estimates", "Apple misses on services", "Apple event on Monday"]
+
+
+@pytest.mark.parametrize("news, label", [
+    (["Apple beats - Reuters", "Apple hits record high - CNBC"], "positive"),
+    (["Boeing downgrade - Reuters", "Boeing misses - CNBC"], "negative"),
+    (["Apple beats - Reuters", "Apple misses - CNBC"], "neutral"),
+])
+def test_labels(lexicon, news, label):
+    assert sentiment.analyze(news)["label"] == label
+
+
+@pytest.mark.parametrize("news", [[], None])
+def test_empty_input_is_neutral(lexicon, news):
+    result = sentiment.analyze(news)
+    assert result == {"score": 0.0, "label": "neutral", "count": 0, "positive": 0,
+                      "negative": 0, "articles": []}
+    assert sentiment.score_headlines([]).shape == (0,)
+    assert "0 headlines" in sentiment.describe(result)
+    assert sentiment.summarize(news).startswith("**News sentiment:** neutral")
+
+
+def test_summary_lists_the_strongest_headlines(lexicon):
+    summary = sentiment.summarize(["Apple beats - Reuters", "Boeing downgrade - CNBC",
+                                   "Fed meeting - AP"], top=1)
+    assert "Most positive headlines:\n- Apple beats" in summary
+    assert "Most negative headlines:\n- Boeing downgrade" in summary
+    assert "Fed meeting" not in summary
+
+
+def test_trained_weights_must_match_the_hash_size(tmp_path):
+    path = tmp_path / "model.npy"
+    np.save(path, np.zeros(10))
+    with pytest.raises(ValueError):
+        sentiment.load_weights(model_path=str(path))
+
+
+def test_bundled_lexicon_scores_plain_headlines():
+    scores = sentiment.score_headlines(["Shares surge after strong earnings beat",
+                                        "Stock plunges after profit warning"])
+    assert scores[0] > sentiment.NEUTRAL_BAND and scores[1] < -sentiment.NEUTRAL_BAND
@@ -0,0 +1,87 @@
+import pytest
+
+from agents import symbol_index, ticker_extractor
+
+ROWS = [
+    {"symbol": "AAPL", "name": "Apple Inc.", "aliases": "apple|iphone maker"},
+    {"symbol": "MSFT", "name": "Microsoft Corporation", "aliases": "microsoft"},
+    {"symbol": "TGT", "name": "Target Corporation", "aliases": "Target|target corp"},
+    {"symbol": "NOW", "name": "ServiceNow Inc.", "aliases": "servicenow"},
+    {"symbol": "T", "name": "AT&T Inc.", "aliases": "at&t"},
+    {"symbol": "NVDA", "name": "NVIDIA Corporation", "aliases": "nvidia"},
+]
+
+
+@pytest.fixture
+def index():
+    return symbol_index.SymbolIndex(ROWS, symbol_index.load_not_names())
+
+
+@pytest.mark.parametrize("query, tickers", [
+    ("Is NOW a good time to buy?", []),
+    ("Is NOW stock cheap?", ["NOW"]),
+    ("Thoughts on shares of NOW", ["NOW"]),
+    ("Buy $NOW?", ["NOW"]),
+    ("What about ServiceNow", ["NOW"]),
+])
+def test_common_word_symbols_need_context(index, query, tickers):
+    assert index.match(query)[0] == tickers
+
+
+@pytest.mark.parametrize("query, tickers", [
+    ("Should I shop at Target for the holidays?", ["TGT"]),
+    ("What is the target price for Apple?", ["AAPL"]),
+    ("Target beat estimates", []),  # sentence-initial: could be the plain word
+    ("Is target corp a buy", ["TGT"]),  # lowercase alias written lowercase
+])
+def test_capitalized_alias_only_matches_capitalized(index, query, tickers):
+    assert index.match(query)[0] == tickers
+
+
+@pytest.mark.parametrize("query", [
+    "Should I buy Apple before Christmas?",
+    "Is Apple a buy after Tim Cook comments?",
+    "How will China tariffs affect Nvidia?",
+    "Did Apple's iPhone sales slow in Europe on Black Friday?",
+])
+def test_known_proper_nouns_are_not_unresolved(index, query):
+    tickers, unresolved = index.match(query)
+    assert tickers and unresolved == []
+
+
+def test_unknown_names_and_symbols_are_unresolved(index):
+    assert index.match("Compare Apple with Rivian and LCID")[1] == ["LCID", "Rivian"]
+    # an uppercase spelling of a known name is not left over
+    assert index.match("Is NVIDIA or APPLE cheaper?") == (["NVDA", "AAPL"], [])
+
+
+def test_tickers_are_in_query_order(index):
+    assert index.match("Compare MSFT with Apple, AT&T and NVDA")[0] == ["MSFT", "AAPL", "T", "NVDA"]
+    assert index.match("Apple's margins vs $MSFT and apple again")[0] == ["AAPL", "MSFT"]
+
+
+def test_bundled_index_loads():
+    index = symbol_index.get_index()
+    assert index.lookup_symbol("aapl") == "Apple Inc."
+    assert "christmas" in index.not_names
+
+
+@pytest.mark.parametrize("query, tickers", [
+    ("Should I buy Apple before Christmas?", ["AAPL"]),
+    ("Is Tesla a buy after Elon Musk comments?", ["TSLA"]),
+    ("How will China tariffs affect Nvidia?", ["NVDA"]),
+    ("Compare MSFT, Tesla and NVDA", ["MSFT", "TSLA", "NVDA"]),
+])
+def test_extractor_skips_the_llm_when_resolved(monkeypatch, query, tickers):
+    monkeypatch.setattr(ticker_extractor, "chat_with_groq",
+                        lambda *args, **kwargs: pytest.fail("unexpected LLM call"))
+    assert ticker_extractor.extract_tickers(query) == tickers
+
+
+def test_extractor_merges_the_llm_answer_for_unknown_names(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ticker_extractor, "chat_with_groq",
+                        lambda *args, **kwargs: calls.append(args) or '["rivn", "LCID"]')
+    assert ticker_extractor.extract_tickers("Compare Apple, Rivian and Lucid") == ["AAPL", "RIVN", "LCID"]
+    assert ticker_extractor.extract_tickers("what should I invest in?") == ["RIVN", "LCID"]
+    assert len(calls) == 2
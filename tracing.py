@@ -0,0 +1,311 @@
+"""
+Spans and metrics for the pipeline.
+
+A span times one unit of work (ticker extraction, a provider fetch, an LLM
+call, a PDF render) and carries attributes such as provider, bytes, token
+counts and cache hit/miss. Finished spans are
+
+- written as JSON lines to TRACE_LOG_PATH (TRACE_LOG_PATH=- prints them to
+  stdout as "[Trace] {...}"; unset, spans are not logged),
+- aggregated into Prometheus metrics, served on METRICS_PORT and/or written
+  to METRICS_PATH,
+- collected on the active trace so the UI can show a per-query breakdown.
+
+The current span and trace live in contextvars; work submitted to thread
+pools must go through wrap() to stay attached to its query.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH")  # "-" for stdout
+METRICS_PATH = os.getenv("METRICS_PATH")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Attributes that become metric labels
+LABELS = ("provider", "agent", "cache")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    def __init__(self, name, trace=None, parent=None, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace = trace
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def end(self):
+        """Finish the span and export it (only the first call counts)"""
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+            _export(self)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace.trace_id if self.trace else None,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 2) if self.duration is not None else None,
+            **self.attrs,
+        }
+
+
+class Trace:
+    """All spans finished under one query"""
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """Finished spans as dicts, in start order"""
+        with self._lock:
+            spans = list(self.spans)
+        return [s.to_dict() for s in sorted(spans, key=lambda s: s.start)]
+
+
+def start_span(name, **attrs):
+    """
+    Start a span without making it current (for generators and callbacks
+    that finish elsewhere); call .end() when done.
+    """
+    return Span(name, trace=_current_trace.get(), parent=_current_span.get(), **attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as the current span; exceptions are recorded and re-raised"""
+    s = start_span(name, **attrs)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(status="error", error=type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        s.end()
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if any"""
+    s = _current_span.get()
+    if s is not None:
+        s.set(**attrs)
+
+
+def _traced_generator(gen, s):
+    """Drive gen with s as the current span at each step, ending s when gen does"""
+    try:
+        while True:
+            token = _current_span.set(s)
+            try:
+                item = next(gen)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                _current_span.reset(token)
+            yield item
+    except Exception as e:
+        s.set(status="error", error=type(e).__name__)
+        raise
+    finally:
+        gen.close()
+        s.end()
+
+
+def traced(name, **attrs):
+    """
+    Decorator: run each call of the function in a span. Generator functions
+    get a span covering the whole iteration.
+    """
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                return _traced_generator(func(*args, **kwargs), start_span(name, **attrs))
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace(name, **attrs):
+    """Collect every span finished inside the block (including wrap()ped threads)"""
+    t = Trace(name, **attrs)
+    token = _current_trace.set(t)
+    try:
+        with span(name, **attrs):
+            yield t
+    finally:
+        _current_trace.reset(token)
+        if METRICS_PATH:
+            write_metrics(METRICS_PATH)
+
+
+def wrap(func):
+    """Bind func to the caller's context (current trace/span) for another thread"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(func, *args, **kwargs)
+
+
+class _Metrics:
+    """Counters and duration histograms per (span name, labels)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = {}  # key -> [bucket counts..., sum, count]
+        self.errors = {}
+        self.bytes = {}
+        self.tokens = {}  # (agent, direction) -> count
+
+    def observe(self, s):
+        key = (s.name,) + tuple(str(s.attrs.get(label, "")) for label in LABELS)
+        with self.lock:
+            hist = self.durations.setdefault(key, [0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if s.duration <= bound:
+                    hist[i] += 1
+            hist[-2] += s.duration
+            hist[-1] += 1
+            if s.attrs.get("status") == "error":
+                self.errors[key] = self.errors.get(key, 0) + 1
+            if s.attrs.get("bytes"):
+                self.bytes[key] = self.bytes.get(key, 0) + s.attrs["bytes"]
+            for direction in ("input", "output"):
+                count = s.attrs.get(f"{direction}_tokens")
+                if count:
+                    token_key = (str(s.attrs.get("agent", "")), direction)
+                    self.tokens[token_key] = self.tokens.get(token_key, 0) + count
+
+    def render(self):
+        """Prometheus text exposition format"""
+        def labels(key, **extra):
+            pairs = list(zip(("span",) + LABELS, key)) + list(extra.items())
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs if v != "") + "}"
+
+        lines = []
+        with self.lock:
+            lines += ["# HELP stockwise_span_duration_seconds Duration of pipeline spans",
+                      "# TYPE stockwise_span_duration_seconds histogram"]
+            for key, hist in sorted(self.durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, hist):
+                    lines.append(f"stockwise_span_duration_seconds_bucket{labels(key, le=bound)} {count}")
+                lines.append(f"stockwise_span_duration_seconds_bucket{labels(key, le='+Inf')} {hist[-1]}")
+                lines.append(f"stockwise_span_duration_seconds_sum{labels(key)} {hist[-2]:.6f}")
+                lines.append(f"stockwise_span_duration_seconds_count{labels(key)} {hist[-1]}")
+
+            lines += ["# HELP stockwise_span_errors_total Spans that ended with an error",
+                      "# TYPE stockwise_span_errors_total counter"]
+            lines += [f"stockwise_span_errors_total{labels(k)} {v}" for k, v in sorted(self.errors.items())]
+
+            lines += ["# HELP stockwise_response_bytes_total Bytes received from providers",
+                      "# TYPE stockwise_response_bytes_total counter"]
+            lines += [f"stockwise_response_bytes_total{labels(k)} {v}" for k, v in sorted(self.bytes.items())]
+
+            lines += ["# HELP stockwise_llm_tokens_total LLM tokens by agent and direction",
+                      "# TYPE stockwise_llm_tokens_total counter"]
+            lines += [f'stockwise_llm_tokens_total{{agent="{a}",direction="{d}"}} {v}'
+                      for (a, d), v in sorted(self.tokens.items())]
+        return "\n".join(lines) + "\n"
+
+
+metrics = _Metrics()
+
+
+def _export(s):
+    if not ENABLED:
+        return
+    if s.trace is not None:
+        s.trace.add(s)
+    metrics.observe(s)
+    if not TRACE_LOG_PATH:
+        return
+
+    line = json.dumps(s.to_dict(), default=str)
+    with _log_lock:
+        if TRACE_LOG_PATH == "-":
+            print(f"[Trace] {line}")
+        else:
+            with open(TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def metrics_text():
+    return metrics.render()
+
+
+def write_metrics(path):
+    """Write the metrics to a file (atomically, for node_exporter's textfile collector)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(metrics.render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics on port in a daemon thread (once per process; port 0 = disabled)"""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+            except OSError as e:
+                print(f"[Tracing] Metrics server not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+            print(f"[Tracing] Serving Prometheus metrics on :{port}/metrics")
+    return _server